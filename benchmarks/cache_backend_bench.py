@@ -0,0 +1,242 @@
+"""Cache backend latency and cross-worker behaviour: in-process LRU vs shared Redis.
+
+Three parts:
+    latency   p50/p99 of hit, miss and set for each backend, with a cached
+              answer (~1.5 KB dict) and a query embedding (768 floats) as values
+    workers   ``--workers`` processes embed the same questions through
+              CachedEmbeddings (model stand-in sleeping ``--model-latency``);
+              reports the model calls made with each backend
+    checks    with two RedisCache clients standing in for two workers: an
+              entry set by one is a hit for the other, an invalidation by one
+              is seen by the other within ``--version-check`` seconds, and an
+              unreachable server degrades to misses instead of errors
+    outage    against a stand-in that answers after 1 s: concurrent async
+              lookups time out without stalling the event loop, then the
+              circuit opens and lookups return without reaching the server
+
+Without ``--redis-url`` a local stand-in (benchmarks.e2e.stubs.StubRedisServer)
+is started; its latencies are those of a Python server, so run against a real
+Redis for numbers worth quoting. Exits 1 if a check fails.
+
+Usage:
+    python -m benchmarks.cache_backend_bench [--ops 2000] [--workers 4] [--questions 50] \\
+        [--redis-url redis://localhost:6379/0]
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import random
+import sys
+import time
+from uuid import uuid4
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from src.cache import CachedEmbeddings, MemoryCache, RedisCache
+from benchmarks.common import percentile
+from benchmarks.e2e.stubs import StubRedisServer
+
+
+def timed(fn, count):
+    latencies = []
+    for index in range(count):
+        started = time.perf_counter()
+        fn(index)
+        latencies.append(time.perf_counter() - started)
+    return {
+        "p50_us": round(percentile(latencies, 0.5) * 1e6, 1),
+        "p99_us": round(percentile(latencies, 0.99) * 1e6, 1),
+    }
+
+
+def latency_report(cache, ops):
+    answer = {"answer": "Học phí học kỳ này được đóng trước ngày 15. " * 35, "latency": 2.4}
+    namespace = f"bench-{uuid4().hex[:8]}"
+    # Embeddings go through CachedEmbeddings so the vector encoding is included
+    vector = DeterministicFakeEmbedding(size=768).embed_query("học phí")
+    embeddings = CachedEmbeddings(None, cache, model=namespace)
+    return {
+        "answer": {
+            "set": timed(lambda index: cache.set(namespace, f"q{index}", answer, ttl=60), ops),
+            "hit": timed(lambda index: cache.get(namespace, f"q{index}"), ops),
+            "miss": timed(lambda index: cache.get(namespace, f"q{index + ops}"), ops),
+        },
+        "embedding": {
+            "set": timed(lambda index: embeddings._set(embeddings._key(f"q{index}"), vector), ops),
+            "hit": timed(lambda index: embeddings._get(embeddings._key(f"q{index}")), ops),
+            "miss": timed(lambda index: embeddings._get(embeddings._key(f"q{index + ops}")), ops),
+        },
+    }
+
+
+class SlowEmbeddings(DeterministicFakeEmbedding):
+    """Fake embedding model that takes ``latency`` seconds per query, like a CPU model."""
+
+    latency: float = 0.02
+
+    def embed_query(self, text):
+        time.sleep(self.latency)
+        return super().embed_query(text)
+
+
+def embed_worker(backend, redis_url, model, questions, latency, seed, results):
+    cache = MemoryCache() if backend == "memory" else RedisCache(redis_url)
+    embeddings = CachedEmbeddings(SlowEmbeddings(size=768, latency=latency), cache, model)
+    model_calls = 0
+    order = list(questions)
+    random.Random(seed).shuffle(order)
+    started = time.perf_counter()
+    for question in order:
+        if embeddings._get(embeddings._key(question)) is None:
+            model_calls += 1
+        embeddings.embed_query(question)
+    results.put({"model_calls": model_calls, "seconds": time.perf_counter() - started})
+
+
+def workers_report(backend, redis_url, args):
+    questions = [f"Câu hỏi số {index} về quy chế đào tạo" for index in range(args.questions)]
+    # A fresh model name keeps earlier runs from warming the shared cache
+    model = f"bench-{uuid4().hex[:8]}"
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    processes = [
+        context.Process(target=embed_worker, args=(backend, redis_url, model, questions, args.model_latency, seed, results))
+        for seed in range(args.workers)
+    ]
+    for process in processes:
+        process.start()
+    outcomes = [results.get(timeout=300) for _ in processes]
+    for process in processes:
+        process.join()
+    return {
+        "lookups": args.workers * args.questions,
+        "model_calls": sum(outcome["model_calls"] for outcome in outcomes),
+        "slowest_worker_s": round(max(outcome["seconds"] for outcome in outcomes), 3),
+    }
+
+
+def cross_worker_checks(redis_url, version_check):
+    failures = []
+    namespace = f"bench-{uuid4().hex[:8]}"
+    worker_a = RedisCache(redis_url, version_check_seconds=version_check)
+    worker_b = RedisCache(redis_url, version_check_seconds=version_check)
+
+    worker_a.set(namespace, "question", {"answer": "42"}, ttl=60)
+    if worker_b.get(namespace, "question") != {"answer": "42"}:
+        failures.append("entry set by worker A is not a hit for worker B")
+
+    worker_a.invalidate(namespace)
+    if worker_a.get(namespace, "question") is not None:
+        failures.append("invalidating worker still sees the entry")
+    invalidated = time.monotonic()
+    while worker_b.get(namespace, "question") is not None and time.monotonic() - invalidated < version_check * 5:
+        time.sleep(version_check / 20)
+    stale_seconds = time.monotonic() - invalidated
+    if stale_seconds > version_check * 1.5:
+        failures.append(f"worker B saw the invalidation after {stale_seconds:.2f}s (limit {version_check}s)")
+
+    worker_b.set(namespace, "question", {"answer": "43"}, ttl=0.2)
+    time.sleep(0.3)
+    if worker_a.get(namespace, "question") is not None:
+        failures.append("entry outlived its ttl")
+
+    # Nothing listens on port 1: every call must fail fast and count as an error
+    unreachable = RedisCache("redis://127.0.0.1:1/0", socket_timeout=0.1, failure_threshold=100)
+    started = time.perf_counter()
+    value = unreachable.get(namespace, "question")
+    unreachable.set(namespace, "question", "x")
+    unreachable.invalidate(namespace)
+    degraded_seconds = time.perf_counter() - started
+    if value is not None or unreachable.stats()["errors"] < 3:
+        failures.append("unreachable server did not degrade to a counted miss")
+    if degraded_seconds > 2:
+        failures.append(f"unreachable server took {degraded_seconds:.2f}s for three calls")
+
+    return {
+        "invalidation_seen_after_s": round(stale_seconds, 3),
+        "unreachable_three_calls_s": round(degraded_seconds, 3),
+        "worker_b": worker_b.stats(),
+    }, failures
+
+
+async def outage_checks(lookups: int = 20) -> tuple:
+    failures = []
+    stalled = StubRedisServer(latency=1.0).start()
+    cache = RedisCache(stalled.url, socket_timeout=0.1, failure_threshold=3, open_seconds=60)
+    lags = []
+    stop = asyncio.Event()
+
+    async def ticker():
+        while not stop.is_set():
+            started = time.perf_counter()
+            await asyncio.sleep(0.01)
+            lags.append(time.perf_counter() - started - 0.01)
+
+    ticking = asyncio.create_task(ticker())
+    try:
+        started = time.perf_counter()
+        values = await asyncio.gather(*(cache.aget("outage", f"q{index}") for index in range(lookups)))
+        timed_out_seconds = time.perf_counter() - started
+        started = time.perf_counter()
+        for index in range(1000):
+            values.append(await cache.aget("outage", f"q{index}"))
+        open_call_us = (time.perf_counter() - started) / 1000 * 1e6
+    finally:
+        stop.set()
+        await ticking
+        stalled.stop()
+
+    stats = cache.stats()
+    if any(value is not None for value in values):
+        failures.append("lookup against a hung server returned a value")
+    if max(lags) > 0.05:
+        failures.append(f"event loop stalled {max(lags):.3f}s during the outage")
+    if not stats["circuit_open"] or stats["skipped"] < 1000:
+        failures.append("circuit did not open after repeated timeouts")
+    if open_call_us > 100:
+        failures.append(f"lookups with the circuit open took {open_call_us:.0f}us each")
+    return {
+        "concurrent_lookups": lookups,
+        "timed_out_lookups_s": round(timed_out_seconds, 3),
+        "max_event_loop_lag_ms": round(max(lags) * 1000, 1),
+        "open_circuit_lookup_us": round(open_call_us, 2),
+        "errors": stats["errors"],
+        "skipped": stats["skipped"],
+    }, failures
+
+
+def main(args):
+    server = None
+    redis_url = args.redis_url
+    if not redis_url:
+        server = StubRedisServer().start()
+        redis_url = server.url
+    try:
+        backends = {"memory": MemoryCache(), "redis": RedisCache(redis_url)}
+        checks, failures = cross_worker_checks(redis_url, args.version_check)
+        outage, outage_failures = asyncio.run(outage_checks())
+        failures += outage_failures
+        report = {
+            "redis": args.redis_url or "local stand-in",
+            "latency": {name: latency_report(cache, args.ops) for name, cache in backends.items()},
+            "workers": {name: workers_report(name, redis_url, args) for name in backends},
+            "checks": checks,
+            "outage": outage,
+            "failures": failures,
+            "ok": not failures,
+        }
+    finally:
+        if server is not None:
+            server.stop()
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    sys.exit(0 if report["ok"] else 1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--redis-url", default=None, help="Real Redis to measure (default: local stand-in)")
+    parser.add_argument("--ops", type=int, default=2000, help="Operations per latency measurement")
+    parser.add_argument("--workers", type=int, default=4, help="Worker processes sharing the questions")
+    parser.add_argument("--questions", type=int, default=50)
+    parser.add_argument("--model-latency", type=float, default=0.02, help="Seconds per embedding by the model stand-in")
+    parser.add_argument("--version-check", type=float, default=0.5, help="version_check_seconds of the check clients")
+    main(parser.parse_args())
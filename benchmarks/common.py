@@ -0,0 +1,18 @@
+"""Helpers shared by the benchmarks; importing this must not build the graph or any model."""
+import json
+
+DEFAULT_LABELS = "benchmarks/data/router_labels.jsonl"
+
+
+def load_labels(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def expected_routes(item):
+    return item.get("routes") or [item["route"]]
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else 0.0
@@ -0,0 +1,93 @@
+"""Tokens sent to each agent per turn: full history vs per-agent context policies.
+
+Replays recorded conversations (JSONL, one conversation per line):
+    {"turns": [{"query": "...", "agent": "rag_agent", "answer": "..."}, ...]}
+or, with ``--synthetic N``, N generated conversations that mix the four agents.
+For every turn it counts the conversation tokens the routed agent would receive
+with the previous behaviour (all of ``state["messages"]``) and with
+``select_context`` (see src.agents.context); system prompts are excluded and
+summarisation is not simulated.
+
+Usage:
+    python -m benchmarks.context_tokens_report conversations.jsonl
+    python -m benchmarks.context_tokens_report --synthetic 20 --turns 30
+"""
+import argparse
+import json
+import random
+from collections import defaultdict
+from langchain_core.messages import HumanMessage, AIMessage
+from src.agents.context import context_policies, select_context
+from src.utils.token_counter import count_messages_tokens
+from benchmarks.summary_tokens_bench import synthetic_text
+
+AGENTS = ("rag_agent", "schedule_agent", "generic_agent", "analytic_agent")
+ANSWER_TOKENS = {"rag_agent": (300, 1500), "schedule_agent": (50, 300), "generic_agent": (150, 800), "analytic_agent": (400, 1200)}
+
+
+def load_conversations(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line)["turns"] for line in f if line.strip()]
+
+
+def synthetic_conversations(count, turns, seed):
+    rng = random.Random(seed)
+    conversations = []
+    for _ in range(count):
+        conversation = []
+        for _ in range(turns):
+            agent = rng.choice(AGENTS)
+            conversation.append({
+                "query": synthetic_text(rng, rng.randint(10, 60)),
+                "agent": agent,
+                "answer": synthetic_text(rng, rng.randint(*ANSWER_TOKENS[agent])),
+            })
+        conversations.append(conversation)
+    return conversations
+
+
+def replay(conversations):
+    sent = defaultdict(lambda: {"turns": 0, "before": 0, "after": 0})
+    for turns in conversations:
+        messages = []
+        for turn in turns:
+            agent = turn["agent"]
+            messages.append(HumanMessage(content=turn["query"]))
+            state = {"messages": messages, "summary": ""}
+            sent[agent]["turns"] += 1
+            sent[agent]["before"] += count_messages_tokens(messages)
+            sent[agent]["after"] += count_messages_tokens(select_context(state, agent))
+            messages.append(AIMessage(content=turn["answer"], name=agent))
+    return sent
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("conversations", nargs="?", help="JSONL file of recorded conversations")
+    parser.add_argument("--synthetic", type=int, default=0, help="Generate N conversations instead")
+    parser.add_argument("--turns", type=int, default=30, help="Turns per synthetic conversation")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    if not args.conversations and not args.synthetic:
+        parser.error("pass a conversations file or --synthetic N")
+
+    conversations = (
+        load_conversations(args.conversations) if args.conversations
+        else synthetic_conversations(args.synthetic, args.turns, args.seed)
+    )
+    report = {}
+    for agent, totals in sorted(replay(conversations).items()):
+        before = totals["before"] / totals["turns"]
+        after = totals["after"] / totals["turns"]
+        report[agent] = {
+            "policy": vars(context_policies[agent]) if agent in context_policies else None,
+            "turns": totals["turns"],
+            "avg_tokens_before": round(before, 1),
+            "avg_tokens_after": round(after, 1),
+            "reduction": round(1 - after / before, 3) if before else 0.0,
+        }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
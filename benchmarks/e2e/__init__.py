@@ -0,0 +1 @@
+"""Offline end-to-end benchmark of the chat API (see benchmarks/e2e/run.py)."""
@@ -0,0 +1,109 @@
+"""Concurrent load driver for POST /chatbot/stream/{conversation_id}."""
+import asyncio
+import json
+import random
+import time
+from collections import defaultdict
+from uuid import uuid4
+import httpx
+from benchmarks.common import percentile
+from benchmarks.e2e.stubs import make_token
+
+
+def parse_events(buffer: str) -> tuple:
+    """Complete stream events in ``buffer`` and the unparsed rest.
+
+    The endpoint sends JSON objects separated by blank lines; the final one has no separator.
+    """
+    parts = buffer.split("\n\n")
+    events = []
+    for part in parts[:-1]:
+        if part.strip():
+            events.append(json.loads(part))
+    return events, parts[-1]
+
+
+async def stream_turn(client: httpx.AsyncClient, token: str, conversation_id: str, query: str) -> dict:
+    started = time.perf_counter()
+    ttft = None
+    answer = ""
+    buffer = ""
+    async with client.stream(
+        "POST",
+        f"/chatbot/stream/{conversation_id}",
+        data={"query": query},
+        headers={"Authorization": f"Bearer {token}"},
+    ) as response:
+        if response.status_code != 200:
+            await response.aread()
+            return {"ok": False, "status": response.status_code, "latency": time.perf_counter() - started}
+        async for text in response.aiter_text():
+            events, buffer = parse_events(buffer + text)
+            for event in events:
+                if event["type"] == "message" and event["content"] and ttft is None:
+                    ttft = time.perf_counter() - started
+    if buffer.strip():
+        final = json.loads(buffer)
+        answer = final.get("content", "")
+    latency = time.perf_counter() - started
+    return {"ok": bool(answer), "status": 200, "ttft": ttft if ttft is not None else latency, "latency": latency}
+
+
+def latency_summary(turns: list, duration: float = None) -> dict:
+    ok = [turn for turn in turns if turn["ok"]]
+    summary = {"requests": len(turns), "errors": len(turns) - len(ok)}
+    if duration:
+        summary["throughput_rps"] = round(len(ok) / duration, 3)
+    for key in ("ttft", "latency"):
+        values = [turn[key] for turn in ok]
+        for q in (0.5, 0.95, 0.99):
+            summary[f"{key}_p{int(q * 100)}_s"] = round(percentile(values, q), 4)
+    return summary
+
+
+async def run_load(base_url: str, workload: list, requests: int, concurrency: int,
+                   turns_per_conversation: int = 1, first_user_id: int = 1000, seed: int = 0) -> dict:
+    """Send ``requests`` turns from ``workload`` ({"query", "route"} items) with ``concurrency`` virtual users.
+
+    Each virtual user has its own user id, so per-user limits apply as in production,
+    and starts a new conversation every ``turns_per_conversation`` turns.
+    """
+    items = [workload[i % len(workload)] for i in range(requests)]
+    random.Random(seed).shuffle(items)
+    queue = asyncio.Queue()
+    for item in items:
+        queue.put_nowait(item)
+    results = []
+
+    async def virtual_user(user_id: int):
+        token = make_token(user_id)
+        conversation_id, turns = str(uuid4()), 0
+        async with httpx.AsyncClient(base_url=base_url, timeout=httpx.Timeout(300.0)) as client:
+            while not queue.empty():
+                item = queue.get_nowait()
+                if turns == turns_per_conversation:
+                    conversation_id, turns = str(uuid4()), 0
+                turns += 1
+                try:
+                    turn = await stream_turn(client, token, conversation_id, item["query"])
+                except (httpx.HTTPError, json.JSONDecodeError) as e:
+                    turn = {"ok": False, "status": type(e).__name__, "latency": 0.0}
+                results.append({**turn, "route": item["route"]})
+
+    started = time.perf_counter()
+    await asyncio.gather(*(virtual_user(first_user_id + i) for i in range(concurrency)))
+    duration = time.perf_counter() - started
+
+    by_route = defaultdict(list)
+    for turn in results:
+        by_route[turn["route"]].append(turn)
+    statuses = defaultdict(int)
+    for turn in results:
+        if not turn["ok"]:
+            statuses[str(turn["status"])] += 1
+    return {
+        "duration_s": round(duration, 3),
+        "totals": latency_summary(results, duration),
+        "routes": {route: latency_summary(turns) for route, turns in sorted(by_route.items())},
+        "error_statuses": dict(statuses),
+    }
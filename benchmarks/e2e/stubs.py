@@ -0,0 +1,208 @@
+"""Local stand-ins for the services the API calls: the auth service, Tavily and Redis."""
+import asyncio
+import json
+import socketserver
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import jwt
+
+
+def make_token(user_id: int) -> str:
+    """A bearer token the auth middleware accepts; it only decodes the payload."""
+    payload = {"id": user_id, "email": f"bench{user_id}@example.com", "role": "student"}
+    return jwt.encode(payload, "bench-secret", algorithm="HS256")
+
+
+class StubAuthServer:
+    """Answers every token validation with ``{"data": {"valid": true}}`` after ``latency`` seconds."""
+
+    def __init__(self, latency: float = 0.0, host: str = "127.0.0.1"):
+        stub = self
+        self.latency = latency
+        self.requests = 0
+        self._lock = threading.Lock()
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                with stub._lock:
+                    stub.requests += 1
+                time.sleep(stub.latency)
+                body = json.dumps({"data": {"valid": True}}).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, 0), Handler)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}/auth/validate"
+
+    def start(self) -> "StubAuthServer":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class StubTavilySearch:
+    """Drop-in for langchain_tavily.TavilySearch returning canned results after ``latency`` seconds.
+
+    ``calls`` counts the searches started, ``completed`` those that returned and
+    ``in_flight`` those still running; a cancelled search never completes.
+    """
+
+    latency = 0.3
+    calls = 0
+    completed = 0
+    in_flight = 0
+
+    def __init__(self, max_results: int = 3, **kwargs):
+        self.max_results = max_results
+
+    def _results(self, query: str) -> dict:
+        return {
+            "results": [
+                {
+                    "title": f"Kết quả {i} cho {query}",
+                    "url": f"https://example.com/search/{i}",
+                    "content": f"Nội dung mô phỏng số {i} liên quan tới: {query}",
+                }
+                for i in range(1, self.max_results + 1)
+            ]
+        }
+
+    def invoke(self, payload: dict) -> dict:
+        StubTavilySearch.calls += 1
+        StubTavilySearch.in_flight += 1
+        try:
+            time.sleep(StubTavilySearch.latency)
+        finally:
+            StubTavilySearch.in_flight -= 1
+        StubTavilySearch.completed += 1
+        return self._results(payload.get("query", ""))
+
+    async def ainvoke(self, payload: dict) -> dict:
+        StubTavilySearch.calls += 1
+        StubTavilySearch.in_flight += 1
+        try:
+            await asyncio.sleep(StubTavilySearch.latency)
+        finally:
+            StubTavilySearch.in_flight -= 1
+        StubTavilySearch.completed += 1
+        return self._results(payload.get("query", ""))
+
+
+class StubRedisServer:
+    """In-memory server speaking enough of the Redis protocol (RESP2) for RedisCache.
+
+    Supports PING, GET, SET (PX / EX), DEL, EXISTS, INCR / INCRBY, FLUSHDB and expiry;
+    CLIENT and SELECT are acknowledged. Not a Redis replacement: a single
+    dict behind a lock, for benchmarks and checks without a Redis server.
+    Every reply is delayed by ``latency`` seconds (a slow or hung server).
+    """
+
+    def __init__(self, latency: float = 0.0, host: str = "127.0.0.1"):
+        stub = self
+        self.latency = latency
+        self.data = {}  # key -> (value, expires_at or None)
+        self.commands = 0
+        self._lock = threading.Lock()
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                while True:
+                    try:
+                        command = self._read_command()
+                    except (ConnectionError, ValueError):
+                        return
+                    if command is None:
+                        return
+                    time.sleep(stub.latency)
+                    self.wfile.write(stub._execute(command))
+                    self.wfile.flush()
+
+            def _read_command(self):
+                line = self.rfile.readline()
+                if not line:
+                    return None
+                if not line.startswith(b"*"):
+                    return line.split()  # inline command (e.g. redis-cli PING)
+                args = []
+                for _ in range(int(line[1:])):
+                    length = int(self.rfile.readline()[1:])
+                    args.append(self.rfile.read(length + 2)[:-2])
+                return args
+
+        class Server(socketserver.ThreadingTCPServer):
+            daemon_threads = True
+            allow_reuse_address = True
+
+        self._server = Server((host, 0), Handler)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    def _get(self, key: bytes):
+        item = self.data.get(key)
+        if item is not None and item[1] is not None and item[1] <= time.monotonic():
+            del self.data[key]
+            return None
+        return item[0] if item is not None else None
+
+    def _execute(self, command) -> bytes:
+        name, args = command[0].upper(), command[1:]
+        with self._lock:
+            self.commands += 1
+            if name == b"PING":
+                return b"+PONG\r\n"
+            if name in (b"CLIENT", b"SELECT"):
+                return b"+OK\r\n"
+            if name == b"GET":
+                value = self._get(args[0])
+                return b"$-1\r\n" if value is None else b"$%d\r\n%s\r\n" % (len(value), value)
+            if name == b"SET":
+                expires_at = None
+                options = [option.upper() for option in args[2:]]
+                for unit, scale in ((b"PX", 0.001), (b"EX", 1.0)):
+                    if unit in options:
+                        expires_at = time.monotonic() + int(args[2 + options.index(unit) + 1]) * scale
+                self.data[args[0]] = (args[1], expires_at)
+                return b"+OK\r\n"
+            if name in (b"DEL", b"EXISTS"):
+                found = [key for key in args if self._get(key) is not None]
+                if name == b"DEL":
+                    for key in found:
+                        del self.data[key]
+                return b":%d\r\n" % len(found)
+            if name in (b"INCR", b"INCRBY"):
+                value = int(self._get(args[0]) or 0) + (int(args[1]) if name == b"INCRBY" else 1)
+                item = self.data.get(args[0])
+                self.data[args[0]] = (str(value).encode(), item[1] if item else None)
+                return b":%d\r\n" % value
+            if name == b"FLUSHDB":
+                self.data.clear()
+                return b"+OK\r\n"
+        return b"-ERR unknown command '%s'\r\n" % name
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address
+        return f"redis://{host}:{port}/0"
+
+    def start(self) -> "StubRedisServer":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,113 @@
+"""Compare the router and supervisor graph layouts on the same questions.
+
+Each labelled question (see benchmarks/data/router_labels.jsonl) is sent as the
+first turn of a fresh conversation through both layouts. Reported per layout:
+LLM calls per turn, time to first token and total latency (p50/p95), and with
+``--judge`` an answer quality score: a judge model rates every answer from 1 to 5
+for how well it addresses the question.
+
+Tools run for real, so the database, vector store and Tavily settings of the
+environment are used; pass a ``--user-id`` whose todos may be read and written.
+
+Usage:
+    python -m benchmarks.graph_mode_bench --user-id 1 [--limit 20] [--judge]
+"""
+import argparse
+import asyncio
+import json
+import time
+from uuid import uuid4
+from langchain_core.callbacks import AsyncCallbackHandler
+from langchain_core.messages import HumanMessage
+from langchain_core.prompts import ChatPromptTemplate
+from langgraph.checkpoint.memory import MemorySaver
+from src.agents.graph import GRAPH_MODES, create_graph, turn_answer
+from src.config.llm import get_llm
+from src.utils.token_counter import count_message_tokens, message_text
+from benchmarks.common import DEFAULT_LABELS, load_labels, percentile
+
+JUDGE_PROMPT = """Bạn là giám khảo đánh giá chất lượng câu trả lời của một trợ lý cho sinh viên.
+
+Câu hỏi: {question}
+
+Câu trả lời: {answer}
+
+Chấm điểm từ 1 (không liên quan / sai) đến 5 (đầy đủ, chính xác, hữu ích). Chỉ trả về một chữ số."""
+
+
+class LLMCallCounter(AsyncCallbackHandler):
+    def __init__(self):
+        self.calls = 0
+
+    async def on_chat_model_start(self, serialized, messages, **kwargs):
+        self.calls += 1
+
+
+async def run_turn(compiled_graph, question, user_id, configurable=None):
+    counter = LLMCallCounter()
+    message = HumanMessage(content=question)
+    config = {
+        "configurable": {"thread_id": str(uuid4()), "user_id": user_id, **(configurable or {})},
+        "callbacks": [counter],
+    }
+    started = time.perf_counter()
+    first_token = None
+    async for event in compiled_graph.astream_events(
+        {
+            "messages": [message],
+            "user_id": user_id,
+            "context_tokens": count_message_tokens(message),
+        },
+        config=config,
+        version="v2",
+    ):
+        if first_token is None and event["event"] == "on_chat_model_stream" and event["metadata"]["langgraph_node"] == "agent":
+            first_token = time.perf_counter() - started
+    total = time.perf_counter() - started
+    state = (await compiled_graph.aget_state(config)).values
+    return {
+        "llm_calls": counter.calls,
+        "ttft": first_token if first_token is not None else total,
+        "latency": total,
+        "answer": turn_answer(state.get("messages", []), state.get("routes") or []),
+    }
+
+
+async def judge(question, answer):
+    chain = ChatPromptTemplate.from_template(JUDGE_PROMPT) | get_llm("generic_agent")
+    reply = message_text(await chain.ainvoke({"question": question, "answer": answer}))
+    digits = [int(char) for char in reply if char in "12345"]
+    return digits[0] if digits else 1
+
+
+async def main(args):
+    labels = load_labels(args.labels)[: args.limit or None]
+    report = {"questions": len(labels), "modes": {}}
+    for mode in GRAPH_MODES:
+        compiled_graph = create_graph(mode).compile(checkpointer=MemorySaver())
+        turns = []
+        for item in labels:
+            turn = await run_turn(compiled_graph, item["query"], args.user_id)
+            if args.judge:
+                turn["score"] = await judge(item["query"], turn["answer"])
+            turns.append(turn)
+        summary = {
+            "llm_calls_per_turn": round(sum(t["llm_calls"] for t in turns) / len(turns), 2),
+            "ttft_p50_s": round(percentile([t["ttft"] for t in turns], 0.5), 3),
+            "ttft_p95_s": round(percentile([t["ttft"] for t in turns], 0.95), 3),
+            "latency_p50_s": round(percentile([t["latency"] for t in turns], 0.5), 3),
+            "latency_p95_s": round(percentile([t["latency"] for t in turns], 0.95), 3),
+        }
+        if args.judge:
+            summary["avg_quality"] = round(sum(t["score"] for t in turns) / len(turns), 2)
+        report["modes"][mode] = summary
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--labels", default=DEFAULT_LABELS)
+    parser.add_argument("--user-id", default="1")
+    parser.add_argument("--limit", type=int, default=0, help="Only use the first N questions")
+    parser.add_argument("--judge", action="store_true", help="Score answers with a judge model")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,90 @@
+"""Evaluate dense vs hybrid (BM25 + dense, RRF) retrieval on a labelled query set.
+
+The query file is JSONL, one object per line:
+    {"query": "Học phí ngành SE kỳ 1?", "relevant": ["hoc_phi_2025.pdf"]}
+"relevant" lists the chunk ids or ``source_file`` names that answer the query;
+a query counts as recalled when any of its top-k chunks matches.
+
+With ``--agent`` the RAG agent also answers every query in both modes and the
+script reports the average number of ``rag_retrieve`` calls per question, i.e.
+the agent tool calls (and LLM steps) saved by hybrid retrieval.
+
+Usage:
+    python -m benchmarks.hybrid_retrieval_eval queries.jsonl --rrf-k 60 [--agent]
+"""
+import argparse
+import asyncio
+import json
+import time
+from langchain_core.messages import HumanMessage
+from src.config.vector_store import vector_store_crud
+
+MODES = ("dense", "hybrid")
+
+
+def load_queries(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def is_hit(doc, relevant):
+    return doc.id in relevant or doc.metadata.get("source_file") in relevant
+
+
+async def evaluate_retrieval(queries, mode):
+    hits, latencies = 0, []
+    for item in queries:
+        start = time.perf_counter()
+        docs = await vector_store_crud.search(item["query"], mode=mode)
+        latencies.append((time.perf_counter() - start) * 1000)
+        if any(is_hit(doc, set(item["relevant"])) for doc in docs):
+            hits += 1
+    return {
+        f"recall@{vector_store_crud.k}": round(hits / len(queries), 4),
+        "avg_latency_ms": round(sum(latencies) / len(latencies), 2),
+    }
+
+
+async def count_agent_tool_calls(queries, mode):
+    from src.agents.graph import rag_agent
+
+    vector_store_crud.search_mode = mode
+    tool_calls = []
+    for item in queries:
+        result = await rag_agent.ainvoke({"messages": [HumanMessage(content=item["query"])]})
+        tool_calls.append(sum(
+            1
+            for message in result["messages"]
+            for call in getattr(message, "tool_calls", None) or []
+            if call["name"] == "rag_retrieve"
+        ))
+    return sum(tool_calls) / len(tool_calls)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("queries", help="JSONL file of labelled queries")
+    parser.add_argument("--rrf-k", type=int, default=vector_store_crud.rrf_k)
+    parser.add_argument("--candidates", type=int, default=vector_store_crud.candidate_k)
+    parser.add_argument("--agent", action="store_true", help="Also count rag_retrieve calls made by the RAG agent")
+    args = parser.parse_args()
+
+    queries = load_queries(args.queries)
+    vector_store_crud.rrf_k = args.rrf_k
+    vector_store_crud.candidate_k = args.candidates
+
+    report = {"queries": len(queries), "rrf_k": args.rrf_k, "candidates": args.candidates}
+    for mode in MODES:
+        report[mode] = await evaluate_retrieval(queries, mode)
+
+    if args.agent:
+        for mode in MODES:
+            report[mode]["avg_rag_retrieve_calls"] = round(await count_agent_tool_calls(queries, mode), 3)
+        saved = report["dense"]["avg_rag_retrieve_calls"] - report["hybrid"]["avg_rag_retrieve_calls"]
+        report["tool_calls_saved_per_question"] = round(saved, 3)
+
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,177 @@
+"""Check the BM25 keyword index: incremental writes, sharing between workers, hybrid threshold.
+
+Three parts:
+    writes     latency of re-indexing and removing one file's chunks at two corpus
+               sizes; with incremental writes it does not grow with the corpus
+    workers    ``--workers`` processes index their own chunks into one index file
+               at the same time; every chunk must be found afterwards (no lost
+               updates), including by an index opened before the writes
+    threshold  hybrid search on a local store where one keyword hit is unrelated
+               in embedding space: it must not be returned, while a related
+               keyword hit outside the dense candidates still is
+
+Exits 1 if a check fails.
+
+Usage:
+    python -m benchmarks.keyword_index_check [--sizes 2000 20000] [--workers 4]
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from langchain.schema import Document
+from langchain_core.embeddings import Embeddings
+from src.retrieval import BM25Index, LocalVectorStoreCRUD
+from benchmarks.common import percentile
+
+WORDS = "học phí ngành kỳ tín chỉ sinh viên quy chế đào tạo điểm thi lịch môn chương trình".split()
+
+
+def chunk(index: int, file_index: int) -> Document:
+    words = [WORDS[(index * 7 + offset) % len(WORDS)] for offset in range(60)]
+    return Document(
+        page_content=f"SWP{index % 997} " + " ".join(words),
+        metadata={"source_file": f"file_{file_index}.pdf"},
+    )
+
+
+def writes_report(size: int, chunks_per_file: int = 20, rounds: int = 20):
+    directory = tempfile.mkdtemp()
+    index = BM25Index(os.path.join(directory, "bm25.sqlite"))
+    ids = [f"c{i}" for i in range(size)]
+    started = time.perf_counter()
+    index.add([chunk(i, i // chunks_per_file) for i in range(size)], ids)
+    build_seconds = time.perf_counter() - started
+
+    add_latencies, remove_latencies = [], []
+    for round_index in range(rounds):
+        file_ids = ids[round_index * chunks_per_file:(round_index + 1) * chunks_per_file]
+        documents = [chunk(i + 1, round_index) for i in range(len(file_ids))]
+        started = time.perf_counter()
+        index.add(documents, file_ids)
+        add_latencies.append(time.perf_counter() - started)
+        started = time.perf_counter()
+        index.remove(file_ids[-1:])
+        remove_latencies.append(time.perf_counter() - started)
+    return {
+        "chunks": size,
+        "build_s": round(build_seconds, 3),
+        "reindex_file_p50_ms": round(percentile(add_latencies, 0.5) * 1000, 2),
+        "remove_chunk_p50_ms": round(percentile(remove_latencies, 0.5) * 1000, 2),
+    }
+
+
+def index_worker(path: str, worker: int, count: int, batch: int):
+    index = BM25Index(path)
+    for start in range(0, count, batch):
+        ids = [f"w{worker}-{i}" for i in range(start, min(start + batch, count))]
+        index.add([chunk(i, worker) for i in range(start, start + len(ids))], ids)
+
+
+def workers_report(workers: int, count: int = 500, batch: int = 10):
+    path = os.path.join(tempfile.mkdtemp(), "bm25.sqlite")
+    reader = BM25Index(path)
+    context = multiprocessing.get_context("spawn")
+    processes = [context.Process(target=index_worker, args=(path, worker, count, batch)) for worker in range(workers)]
+    started = time.perf_counter()
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    seconds = time.perf_counter() - started
+    found = sum(
+        reader.get_document(f"w{worker}-{i}") is not None
+        for worker in range(workers)
+        for i in range(count)
+    )
+    return {
+        "workers": workers,
+        "chunks_written": workers * count,
+        "chunks_found": found,
+        "indexed_count": len(reader),
+        "failed_processes": sum(process.exitcode != 0 for process in processes),
+        "seconds": round(seconds, 3),
+    }
+
+
+class FixedEmbeddings(Embeddings):
+    """Embeddings looked up from a table, so the similarity of every chunk to the query is known."""
+
+    def __init__(self, vectors):
+        self.vectors = vectors
+
+    def embed_documents(self, texts):
+        return [self.vectors[text] for text in texts]
+
+    def embed_query(self, text):
+        return self.vectors[text]
+
+
+async def threshold_report():
+    query = "Học phí SWP391"
+    # id -> (text, vector); the query is [1, 0], so a chunk's similarity is its first component
+    chunks = {
+        "fees": ("Học phí SWP391 đóng trước ngày 15", [1.0, 0.0]),
+        "deadline": ("Hạn nộp tiền là ngày 15 hằng tháng", [0.9, 0.436]),
+        "late": ("Nộp tiền trễ hạn bị phạt", [0.8, 0.6]),
+        "fees_2": ("SWP391 học phí được đóng theo kỳ", [0.6, 0.8]),
+        "library": ("SWP391 thư viện mở cửa đến 21 giờ", [0.0, 1.0]),
+    }
+    vectors = {text: vector for text, vector in chunks.values()}
+    vectors[query] = [1.0, 0.0]
+    store = LocalVectorStoreCRUD(
+        FixedEmbeddings(vectors),
+        directory=tempfile.mkdtemp(),
+        k=5,
+        score_threshold=0.3,
+        keyword_index=BM25Index(),
+        search_mode="hybrid",
+        candidate_k=3,
+    )
+    await store.add_documents([Document(page_content=text) for text, _ in chunks.values()], list(chunks))
+    # Dense candidates: fees, deadline, late. Keyword hits: fees, fees_2 (similarity 0.6), library (0.0)
+    hits = [doc.id for doc in await store.search(query)]
+    return {"returned": hits}, [
+        *(["keyword hit below the score threshold was returned"] if "library" in hits else []),
+        *(["related keyword hit outside the dense candidates was dropped"] if "fees_2" not in hits else []),
+    ]
+
+
+def main(args):
+    failures = []
+    writes = [writes_report(size) for size in args.sizes]
+    smallest, largest = writes[0], writes[-1]
+    growth = largest["reindex_file_p50_ms"] / max(smallest["reindex_file_p50_ms"], 1e-3)
+    # A full rewrite grows with the corpus (10x here); incremental writes stay flat
+    if growth > 3:
+        failures.append(f"re-indexing one file got {growth:.1f}x slower on a {largest['chunks'] // smallest['chunks']}x corpus")
+
+    workers = workers_report(args.workers)
+    if workers["chunks_found"] != workers["chunks_written"] or workers["indexed_count"] != workers["chunks_written"]:
+        failures.append(f"{workers['chunks_written'] - workers['chunks_found']} chunks written by concurrent workers were lost")
+    if workers["failed_processes"]:
+        failures.append(f"{workers['failed_processes']} writer processes failed")
+
+    threshold, threshold_failures = asyncio.run(threshold_report())
+    failures += threshold_failures
+
+    report = {
+        "writes": writes,
+        "workers": workers,
+        "threshold": threshold,
+        "failures": failures,
+        "ok": not failures,
+    }
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    sys.exit(0 if report["ok"] else 1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[2000, 20000], help="Corpus sizes for the write latency")
+    parser.add_argument("--workers", type=int, default=4, help="Processes writing to one index at the same time")
+    main(parser.parse_args())
@@ -0,0 +1,152 @@
+"""Burst load against a fake provider: bare client with naive retries vs LLMGateway.
+
+The fake provider (src.config.fake_llm) answers after ``--latency`` seconds and
+rejects with a 429 every call beyond ``--quota`` concurrent ones. A burst of
+``--requests`` calls from ``--users`` users is sent at once; ``--duplicates`` of
+them repeat an earlier prompt, as when many students ask the same question.
+
+Reported per client: successful calls, provider calls (load amplification),
+429s seen by the provider, and p50/p95/max latency of successful calls.
+
+Then, for ainvoke and astream: the caller leading a coalesced call is
+cancelled mid-call (its client disconnected), and the callers sharing
+its call must still get an answer. Exits 1 if they do not.
+
+Usage:
+    python -m benchmarks.llm_gateway_bench --requests 200 --users 40 --quota 8
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from langchain_core.messages import HumanMessage
+from src.config.fake_llm import FakeChatModel, FakeRateLimitError
+from src.config.llm_gateway import LLMGateway, current_user
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else 0.0
+
+
+async def run_burst(client, prompts, users):
+    latencies, failures = [], 0
+
+    async def one(prompt, user):
+        nonlocal failures
+        current_user.set(user)
+        started = time.perf_counter()
+        try:
+            await client.ainvoke([HumanMessage(content=prompt)])
+            latencies.append(time.perf_counter() - started)
+        except Exception:
+            failures += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*[one(prompt, user) for prompt, user in zip(prompts, users)])
+    return latencies, failures, time.perf_counter() - started
+
+
+def make_provider(args):
+    return FakeChatModel(
+        latency=args.latency,
+        latency_jitter=args.latency / 4,
+        tokens_per_second=200,
+        max_in_flight=args.quota,
+        error_rate=args.error_rate,
+        seed=args.seed,
+    )
+
+
+async def leader_cancelled(args, streaming: bool) -> dict:
+    """Cancel the leader of a coalesced call; its followers must finish with their own call."""
+    provider = FakeChatModel(latency=args.latency, tokens_per_second=200, seed=args.seed)
+    gateway = LLMGateway(inner=provider, deadline_seconds=args.deadline)
+    prompt = [HumanMessage(content="Lịch thi cuối kỳ khi nào?")]
+
+    async def call():
+        if not streaming:
+            return (await gateway.ainvoke(prompt)).content
+        return "".join([chunk.content async for chunk in gateway.astream(prompt)])
+
+    leader = asyncio.create_task(call())
+    await asyncio.sleep(args.latency / 4)
+    followers = [asyncio.create_task(call()) for _ in range(3)]
+    await asyncio.sleep(args.latency / 4)
+    leader.cancel()
+    answers = await asyncio.gather(*followers, return_exceptions=True)
+    failed = [repr(answer) for answer in answers if isinstance(answer, BaseException) or not answer]
+    return {
+        "followers": len(followers),
+        "followers_answered": len(followers) - len(failed),
+        "provider_calls": provider.calls,
+        "errors": failed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--users", type=int, default=40)
+    parser.add_argument("--duplicates", type=float, default=0.2, help="Fraction of prompts that repeat an earlier one")
+    parser.add_argument("--quota", type=int, default=8, help="Concurrent calls the fake provider accepts")
+    parser.add_argument("--error-rate", type=float, default=0.02, help="Random 429s on top of the quota")
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--deadline", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    prompts = []
+    for i in range(args.requests):
+        prompts.append(rng.choice(prompts) if prompts and rng.random() < args.duplicates else f"Câu hỏi số {i}")
+    users = [f"user-{rng.randrange(args.users)}" for _ in range(args.requests)]
+
+    report = {}
+    # Previous setup: the provider client's own retries (max_retries=2), exponential backoff, no jitter
+    provider = make_provider(args)
+    client = provider.with_retry(
+        retry_if_exception_type=(FakeRateLimitError,),
+        wait_exponential_jitter=False,
+        stop_after_attempt=3,
+    )
+    latencies, failures, elapsed = asyncio.run(run_burst(client, prompts, users))
+    report["direct"] = summarize(latencies, failures, elapsed, provider)
+
+    provider = make_provider(args)
+    gateway = LLMGateway(
+        inner=provider,
+        max_concurrency=args.quota,
+        max_concurrency_per_user=2,
+        max_attempts=4,
+        base_delay=0.5,
+        deadline_seconds=args.deadline,
+    )
+    latencies, failures, elapsed = asyncio.run(run_burst(gateway, prompts, users))
+    report["gateway"] = summarize(latencies, failures, elapsed, provider)
+    report["gateway"].update({key: value for key, value in gateway.stats.items() if key != "calls"})
+    report["leader_cancelled"] = {
+        "ainvoke": asyncio.run(leader_cancelled(args, streaming=False)),
+        "astream": asyncio.run(leader_cancelled(args, streaming=True)),
+    }
+    print(json.dumps(report, indent=2))
+    sys.exit(1 if any(check["errors"] for check in report["leader_cancelled"].values()) else 0)
+
+
+def summarize(latencies, failures, elapsed, provider):
+    return {
+        "succeeded": len(latencies),
+        "failed": failures,
+        "provider_calls": provider.calls,
+        "provider_429s": provider.errors,
+        "p50_s": round(percentile(latencies, 0.5), 3),
+        "p95_s": round(percentile(latencies, 0.95), 3),
+        "max_s": round(max(latencies, default=0.0), 3),
+        "wall_s": round(elapsed, 3),
+    }
+
+
+if __name__ == "__main__":
+    main()
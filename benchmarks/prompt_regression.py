@@ -0,0 +1,112 @@
+"""Check that the agent prompts keep their tool-call behaviour on recorded conversations.
+
+Each case in benchmarks/data/prompt_regression.jsonl is a conversation ending
+in a user message, the tool the agent's next step must call (``null``: answer
+without a tool, e.g. to ask for a missing field or confirm a change) and
+optionally a subset of the expected arguments:
+    {"agent": "schedule_agent", "messages": [["user", "Xem task của mình"]],
+     "expect_tool": "get_todos", "expect_args": {"userId": 7}}
+
+Only the first model step is run, so no tool touches the database. Cases are
+rendered for user id 7. With ``--baseline-ref`` the prompts of that git
+revision are checked too, to tell prompt regressions from model flakiness.
+Exits non-zero when a case fails with the current prompts.
+
+Usage:
+    python -m benchmarks.prompt_regression [--cases ...] [--repeat 3] [--baseline-ref <git-ref>]
+"""
+import argparse
+import asyncio
+import json
+import sys
+from datetime import datetime
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from src.agents.graph import AGENT_PROMPTS, AGENT_TOOLS, SESSION_AGENTS, session_context
+from src.config.llm import get_llm
+from benchmarks.prompt_token_report import baseline_system_text, load_baseline_prompts
+
+DEFAULT_CASES = "benchmarks/data/prompt_regression.jsonl"
+USER_ID = "7"
+NOW = datetime(2025, 8, 14, 9, 30)
+
+
+def current_prompt(agent):
+    messages = [SystemMessage(content=AGENT_PROMPTS[agent])]
+    if agent in SESSION_AGENTS:
+        messages += session_context(USER_ID, NOW)
+    return messages
+
+
+def flatten_args(args):
+    """Tool arguments with nested pydantic inputs ({"input": {...}}) lifted to the top."""
+    flat = {}
+    for key, value in args.items():
+        if isinstance(value, dict):
+            flat.update(flatten_args(value))
+        else:
+            flat[key] = value
+    return flat
+
+
+def args_match(expected, args):
+    flat = flatten_args(args)
+    for key, value in expected.items():
+        actual = flat.get(key)
+        if isinstance(value, str) and isinstance(actual, str):
+            if value.lower() != actual.lower():
+                return False
+        elif str(actual) != str(value):
+            return False
+    return True
+
+
+async def run_case(case, system_messages):
+    history = [
+        HumanMessage(content=text) if role == "user" else AIMessage(content=text)
+        for role, text in case["messages"]
+    ]
+    model = get_llm(case["agent"]).bind_tools(AGENT_TOOLS[case["agent"]])
+    reply = await model.ainvoke(system_messages + history)
+    call = reply.tool_calls[0] if reply.tool_calls else None
+    tool = call["name"] if call else None
+    passed = tool == case["expect_tool"]
+    if passed and call and case.get("expect_args"):
+        passed = args_match(case["expect_args"], call["args"])
+    return {"passed": passed, "tool": tool, "args": call["args"] if call else None}
+
+
+async def check(cases, prompt_for, repeat):
+    failures = []
+    passed = 0
+    for case in cases:
+        for _ in range(repeat):
+            result = await run_case(case, prompt_for(case["agent"]))
+            if result["passed"]:
+                passed += 1
+            else:
+                failures.append({"case": case, **result})
+    return {"runs": len(cases) * repeat, "passed": passed, "failures": failures}
+
+
+async def main(args):
+    with open(args.cases, "r", encoding="utf-8") as f:
+        cases = [json.loads(line) for line in f if line.strip()]
+
+    report = {"current": await check(cases, current_prompt, args.repeat)}
+    if args.baseline_ref:
+        prompts = load_baseline_prompts(args.baseline_ref)
+        report["baseline"] = await check(
+            cases,
+            lambda agent: [SystemMessage(content=baseline_system_text(prompts, agent, USER_ID, NOW))],
+            args.repeat,
+        )
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    return 1 if report["current"]["failures"] else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cases", default=DEFAULT_CASES)
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per case; models are not deterministic")
+    parser.add_argument("--baseline-ref", help="git revision whose prompts are checked for comparison")
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,93 @@
+"""Prompt token accounting per agent, and how much of each prompt is a stable prefix.
+
+For every agent the system prompt is split into the static part (identical for
+all users and turns), the per-request session suffix and the tool schemas sent
+with each model call. ``cacheable_prefix_tokens`` is the length of the longest
+common prefix of the system instruction rendered for two different users at two
+different times: only that part can be reused by provider-side prompt caching.
+
+With ``--baseline-ref`` the prompts of src/agents/prompts.py at that git revision
+are measured the same way (they were formatted with the user id and the time
+inside the prompt), for a before/after comparison.
+
+Usage:
+    python -m benchmarks.prompt_token_report [--baseline-ref <git-ref>]
+"""
+import argparse
+import json
+import os
+import subprocess
+from datetime import datetime
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from src.agents.graph import AGENT_PROMPTS, AGENT_TOOLS, SESSION_AGENTS, session_context
+from src.utils.token_counter import count_tokens, message_text
+
+# Two requests that share nothing but the agent
+PROBES = [("1", datetime(2025, 8, 14, 9, 30)), ("2048", datetime(2025, 9, 2, 21, 5))]
+
+
+def common_prefix(a, b):
+    size = len(os.path.commonprefix([a, b]))
+    return a[:size]
+
+
+def current_system_text(agent, user_id, now):
+    parts = [AGENT_PROMPTS[agent]]
+    if agent in SESSION_AGENTS:
+        parts += [message_text(msg) for msg in session_context(user_id, now)]
+    return "\n\n".join(parts)
+
+
+def load_baseline_prompts(ref):
+    source = subprocess.run(
+        ["git", "show", f"{ref}:src/agents/prompts.py"], capture_output=True, text=True, check=True
+    ).stdout
+    namespace = {}
+    exec(source, namespace)
+    return namespace
+
+
+def baseline_system_text(prompts, agent, user_id, now):
+    """The prompt as the agents of ``ref`` formatted it: values inside the template."""
+    values = {"user_id": user_id, "current_datetime": now.strftime("%Y-%m-%d %H:%M:%S")}
+    if agent != "supervisor":
+        key = {"rag_agent": "RAG", "schedule_agent": "SCHEDULE", "generic_agent": "GENERIC", "analytic_agent": "ANALYTIC"}[agent]
+        return prompts[f"{key}_AGENT_PROMPT"].format(**values)
+    tool_instructions = "\n\n".join([
+        f"### Khi dùng `rag_retrieve`\n{prompts['RAG_AGENT_PROMPT']}",
+        f"### Khi quản lý to-do list\n{prompts['SCHEDULE_AGENT_PROMPT'].format(**values)}",
+        f"### Khi dùng `todo_analytics`\n{prompts['ANALYTIC_AGENT_PROMPT'].format(**values)}",
+        f"### Khi dùng `tavily_search` hoặc trò chuyện chung\n{prompts['GENERIC_AGENT_PROMPT']}",
+    ])
+    return prompts["SUPERVISOR_PROMPT"].format(tool_instructions=tool_instructions, **values)
+
+
+def measure(render):
+    first, second = (render(user_id, now) for user_id, now in PROBES)
+    return {
+        "system_tokens": count_tokens(first),
+        "cacheable_prefix_tokens": count_tokens(common_prefix(first, second)),
+    }
+
+
+def main(args):
+    baseline = load_baseline_prompts(args.baseline_ref) if args.baseline_ref else None
+    report = {}
+    for agent in AGENT_PROMPTS:
+        tools = json.dumps([convert_to_openai_tool(tool) for tool in AGENT_TOOLS[agent]], ensure_ascii=False)
+        row = {
+            "static_tokens": count_tokens(AGENT_PROMPTS[agent]),
+            "session_tokens": sum(count_tokens(message_text(msg)) for msg in session_context(*PROBES[0])) if agent in SESSION_AGENTS else 0,
+            "tool_schema_tokens": count_tokens(tools),
+            **measure(lambda user_id, now: current_system_text(agent, user_id, now)),
+        }
+        if baseline is not None:
+            row["baseline"] = measure(lambda user_id, now: baseline_system_text(baseline, agent, user_id, now))
+        report[agent] = row
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--baseline-ref", help="git revision whose prompts are measured for comparison")
+    main(parser.parse_args())
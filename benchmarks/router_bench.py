@@ -0,0 +1,78 @@
+"""Compare router model configurations on a fixed labelled set: latency and accuracy.
+
+The labelled set is JSONL, one object per line:
+    {"query": "...", "route": "rag_agent", "chat_history": "Assistant: ..."}
+(``chat_history`` is optional). Compound requests list every expected agent:
+    {"query": "...", "routes": ["rag_agent", "schedule_agent"]}
+and count as correct when the router returns exactly that set of agents. Configurations come from a JSON file mapping a
+name to ModelConfig fields; by default the previous single-model setup is
+compared with the configured router model:
+    {"flash": {"model": "gemini-2.5-flash", "temperature": 0.3},
+     "flash-lite": {"model": "gemini-2.5-flash-lite", "temperature": 0, "max_tokens": 64, "thinking_budget": 0}}
+
+Usage:
+    python -m benchmarks.router_bench [--labels benchmarks/data/router_labels.jsonl] [--configs configs.json]
+"""
+import argparse
+import asyncio
+import json
+import time
+from collections import Counter
+from dataclasses import asdict
+from src.agents.graph import ROUTES, classify_route
+from src.config.llm import ModelConfig, create_llm, model_configs
+from benchmarks.common import DEFAULT_LABELS, expected_routes, load_labels, percentile
+
+
+async def evaluate(config, labels):
+    router_llm = create_llm(config)
+    latencies, correct, errors = [], 0, 0
+    confusion = Counter()
+    for item in labels:
+        started = time.perf_counter()
+        try:
+            routes = await classify_route(router_llm, item["query"], item.get("chat_history", ""))
+        except Exception:
+            errors += 1
+            continue
+        latencies.append(time.perf_counter() - started)
+        expected = expected_routes(item)
+        correct += set(routes) == set(expected)
+        if set(routes) != set(expected):
+            confusion[f"{'+'.join(expected)} -> {'+'.join(routes)}"] += 1
+    return {
+        "config": asdict(config),
+        "accuracy": round(correct / len(labels), 4),
+        "errors": errors,
+        "p50_ms": round(percentile(latencies, 0.5) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 1),
+        "mistakes": dict(confusion.most_common()),
+    }
+
+
+async def main(args):
+    labels = load_labels(args.labels)
+    unknown = {route for item in labels for route in expected_routes(item)} - set(ROUTES)
+    if unknown:
+        raise ValueError(f"Unknown routes in {args.labels}: {unknown}")
+
+    if args.configs:
+        with open(args.configs, "r", encoding="utf-8") as f:
+            configs = {name: ModelConfig(**fields) for name, fields in json.load(f).items()}
+    else:
+        configs = {
+            "previous": ModelConfig(model="gemini-2.5-flash", temperature=0.3),
+            "configured": model_configs["router"],
+        }
+
+    report = {"labels": len(labels), "configs": {}}
+    for name, config in configs.items():
+        report["configs"][name] = await evaluate(config, labels)
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--labels", default=DEFAULT_LABELS)
+    parser.add_argument("--configs", help="JSON file of named ModelConfig fields")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,60 @@
+"""Time to first token with and without speculative RAG retrieval.
+
+Runs the labelled questions (benchmarks/data/router_labels.jsonl) through the
+router graph twice, with ``speculative_rag`` off and on, each as the first turn
+of a fresh conversation with the response cache bypassed. Reports TTFT for
+rag_agent questions and for the rest (which pay for a discarded search), plus
+the wasted-work ratio of the prefetches.
+
+Usage:
+    python -m benchmarks.speculative_rag_bench --user-id 1 [--limit 20]
+"""
+import argparse
+import asyncio
+import json
+from langgraph.checkpoint.memory import MemorySaver
+from src.agents.graph import create_graph
+from src.agents.prefetch import prefetch_stats
+from src.agents.response_cache import response_cache
+from benchmarks.graph_mode_bench import run_turn
+from benchmarks.common import DEFAULT_LABELS, expected_routes, load_labels, percentile
+
+
+def ttft_summary(turns):
+    values = [turn["ttft"] for turn in turns]
+    return {
+        "turns": len(values),
+        "ttft_p50_s": round(percentile(values, 0.5), 3),
+        "ttft_p95_s": round(percentile(values, 0.95), 3),
+    }
+
+
+async def main(args):
+    labels = load_labels(args.labels)[: args.limit or None]
+    response_cache.enabled = False
+    compiled_graph = create_graph("router").compile(checkpointer=MemorySaver())
+
+    report = {"questions": len(labels), "runs": {}}
+    for speculative in (False, True):
+        prefetch_stats.reset()
+        rag_turns, other_turns = [], []
+        for item in labels:
+            turn = await run_turn(compiled_graph, item["query"], args.user_id, {"speculative_rag": speculative})
+            (rag_turns if "rag_agent" in expected_routes(item) else other_turns).append(turn)
+        run = {"rag_agent": ttft_summary(rag_turns), "other_routes": ttft_summary(other_turns)}
+        if speculative:
+            run["prefetch"] = prefetch_stats.summary()
+        report["runs"]["speculative" if speculative else "baseline"] = run
+
+    baseline = report["runs"]["baseline"]["rag_agent"]["ttft_p50_s"]
+    speculative = report["runs"]["speculative"]["rag_agent"]["ttft_p50_s"]
+    report["rag_ttft_p50_improvement_s"] = round(baseline - speculative, 3)
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--labels", default=DEFAULT_LABELS)
+    parser.add_argument("--user-id", default="1")
+    parser.add_argument("--limit", type=int, default=0, help="Only use the first N questions")
+    asyncio.run(main(parser.parse_args()))
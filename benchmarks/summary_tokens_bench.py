@@ -0,0 +1,133 @@
+"""Prompt tokens per turn over long synthetic conversations, by summarisation policy.
+
+Policies:
+    none           full history every turn
+    message_count  previous policy: once 10 assistant messages accumulate, re-summarise
+                   the whole history from scratch and keep the last 2 messages
+    token_budget   current policy: once context exceeds CONTEXT_TOKEN_BUDGET, fold only
+                   the oldest messages into the rolling summary (see src.agents.summarization)
+
+The summariser is simulated with a fixed-size output so the run is offline and
+deterministic; the report covers the conversation context sent to the agent each
+turn (system prompts excluded) and the input tokens spent on summary calls.
+A ``--fan-out`` share of the turns get two or three agent answers. Exits 1 if a
+token_budget summary evicts the latest question or leaves the kept window
+starting with an assistant message.
+
+Usage:
+    python -m benchmarks.summary_tokens_bench --turns 100 --conversations 20
+"""
+import argparse
+import json
+import random
+import sys
+from langchain_core.messages import HumanMessage, AIMessage
+from src.agents.summarization import CONTEXT_TOKEN_BUDGET, CONTEXT_TOKEN_TARGET, select_evicted
+from src.utils.token_counter import count_tokens, count_message_tokens
+
+SUMMARY_TOKENS = 200
+WORDS = "học phí lịch thi môn học đăng ký tín chỉ ký túc xá việc cần làm deadline thư viện".split()
+
+
+def synthetic_text(rng, tokens):
+    text = ""
+    while count_tokens(text) < tokens:
+        text += rng.choice(WORDS) + " "
+    return text.strip()
+
+
+def synthetic_answer(rng):
+    """One answer in ten is a long RAG answer."""
+    answer_tokens = rng.randint(800, 1600) if rng.random() < 0.1 else rng.randint(20, 250)
+    return AIMessage(content=synthetic_text(rng, answer_tokens))
+
+
+def synthetic_turn(rng, fan_out):
+    """A user question plus its answers: one, or two or three for a fanned-out request."""
+    question = synthetic_text(rng, rng.randint(10, 60))
+    agents = rng.randint(2, 3) if rng.random() < fan_out else 1
+    return HumanMessage(content=question), [synthetic_answer(rng) for _ in range(agents)]
+
+
+def simulate(policy, turns, seed, fan_out=0.0):
+    rng = random.Random(seed)
+    messages, summary_tokens = [], 0
+    prompt_tokens, summary_calls, summary_input_tokens = [], 0, 0
+    context_tokens = 0
+    violations = 0
+
+    for _ in range(turns):
+        question, answers = synthetic_turn(rng, fan_out)
+        messages.append(question)
+        context_tokens += count_message_tokens(question)
+        prompt_tokens.append(summary_tokens + sum(count_message_tokens(msg) for msg in messages))
+        messages.extend(answers)
+        context_tokens += sum(count_message_tokens(answer) for answer in answers)
+
+        if policy == "message_count":
+            if sum(isinstance(msg, AIMessage) for msg in messages) >= 10:
+                summary_calls += 1
+                summary_input_tokens += summary_tokens + sum(count_message_tokens(msg) for msg in messages)
+                # The old summary was appended to the history as an assistant message
+                messages = messages[-2:] + [AIMessage(content=synthetic_text(rng, SUMMARY_TOKENS))]
+                summary_tokens = 0
+        elif policy == "token_budget":
+            if context_tokens > CONTEXT_TOKEN_BUDGET:
+                evicted = select_evicted(messages, summary_tokens)
+                summary_calls += 1
+                summary_input_tokens += summary_tokens + sum(count_message_tokens(msg) for msg in messages[:evicted])
+                messages = messages[evicted:]
+                if not isinstance(messages[0], HumanMessage) or question not in messages:
+                    violations += 1
+                summary_tokens = SUMMARY_TOKENS
+                context_tokens = summary_tokens + sum(count_message_tokens(msg) for msg in messages)
+
+    return prompt_tokens, summary_calls, summary_input_tokens, violations
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=100)
+    parser.add_argument("--conversations", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--fan-out", type=float, default=0.2, help="Share of turns answered by several agents")
+    args = parser.parse_args()
+
+    report = {
+        "turns": args.turns,
+        "conversations": args.conversations,
+        "context_token_budget": CONTEXT_TOKEN_BUDGET,
+        "context_token_target": CONTEXT_TOKEN_TARGET,
+        "fan_out": args.fan_out,
+        "policies": {},
+    }
+    for policy in ("none", "message_count", "token_budget"):
+        per_turn, calls, summary_input, violations = [], 0, 0, 0
+        for conversation in range(args.conversations):
+            prompt_tokens, summary_calls, summary_input_tokens, broken = simulate(
+                policy, args.turns, args.seed + conversation, args.fan_out
+            )
+            per_turn.extend(prompt_tokens)
+            calls += summary_calls
+            summary_input += summary_input_tokens
+            violations += broken
+        report["policies"][policy] = {
+            "avg_prompt_tokens": round(sum(per_turn) / len(per_turn), 1),
+            "p95_prompt_tokens": percentile(per_turn, 0.95),
+            "max_prompt_tokens": max(per_turn),
+            "summary_calls_per_conversation": round(calls / args.conversations, 2),
+            "summary_input_tokens_per_conversation": round(summary_input / args.conversations),
+        }
+        if policy == "token_budget":
+            report["latest_exchange_violations"] = violations
+    print(json.dumps(report, indent=2))
+    sys.exit(1 if report["latest_exchange_violations"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Benchmark the local vector index: HNSW vs exact brute force.
+
+Builds both index types over the same synthetic corpus (clustered, L2-normalised
+vectors with the dimension of gte-multilingual-base) and reports per-query
+latency percentiles and HNSW recall@k against the exact top-k.
+
+Usage:
+    python -m benchmarks.vector_index_bench --size 50000 --queries 500 --k 3
+"""
+import argparse
+import json
+import tempfile
+import time
+import numpy as np
+from src.retrieval.local_index import LocalVectorIndex, hnswlib
+
+
+def make_corpus(size: int, dim: int, clusters: int, rng: np.random.Generator) -> np.ndarray:
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    assignments = rng.integers(0, clusters, size)
+    vectors = centers[assignments] + 0.5 * rng.standard_normal((size, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def percentiles(samples_ms):
+    return {f"p{p}": round(float(np.percentile(samples_ms, p)), 3) for p in (50, 95, 99)}
+
+
+def run_queries(index: LocalVectorIndex, queries: np.ndarray, k: int, exact: bool):
+    latencies, results = [], []
+    for query in queries:
+        start = time.perf_counter()
+        hits = index.search(query, k, exact=exact)
+        latencies.append((time.perf_counter() - start) * 1000)
+        results.append([row for row, _ in hits])
+    return latencies, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=50000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--clusters", type=int, default=200)
+    parser.add_argument("--ef-search", type=int, default=64)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    corpus = make_corpus(args.size, args.dim, args.clusters, rng)
+    picks = rng.integers(0, args.size, args.queries)
+    queries = corpus[picks] + 0.3 * rng.standard_normal((args.queries, args.dim)).astype(np.float32)
+
+    report = {"size": args.size, "dim": args.dim, "queries": args.queries, "k": args.k}
+
+    with tempfile.TemporaryDirectory() as directory:
+        flat = LocalVectorIndex(directory, args.dim, index_type="flat")
+        flat.append(corpus)
+        flat_latencies, exact_results = run_queries(flat, queries, args.k, exact=True)
+        report["flat"] = {"latency_ms": percentiles(flat_latencies)}
+
+    if hnswlib is None:
+        report["hnsw"] = "skipped: hnswlib is not installed"
+    else:
+        with tempfile.TemporaryDirectory() as directory:
+            start = time.perf_counter()
+            hnsw = LocalVectorIndex(directory, args.dim, index_type="hnsw", hnsw_ef_search=args.ef_search)
+            hnsw.load([])
+            hnsw.append(corpus)
+            build_seconds = time.perf_counter() - start
+
+            hnsw_latencies, hnsw_results = run_queries(hnsw, queries, args.k, exact=False)
+            recall = np.mean([
+                len(set(approx) & set(exact)) / len(exact)
+                for approx, exact in zip(hnsw_results, exact_results)
+                if exact
+            ])
+            report["hnsw"] = {
+                "build_seconds": round(build_seconds, 2),
+                "ef_search": args.ef_search,
+                "latency_ms": percentiles(hnsw_latencies),
+                f"recall@{args.k}": round(float(recall), 4),
+            }
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+import json
+import os
+from dataclasses import dataclass, replace
+from typing import Dict, List
+from dotenv import load_dotenv
+from langchain_core.messages import BaseMessage, AIMessage, HumanMessage
+from src.agents.summarization import summary_message
+from src.utils.token_counter import CHARS_PER_TOKEN, count_message_tokens, message_text
+
+load_dotenv()
+
+OTHER_AGENT_POLICIES = ("keep", "compress", "drop")
+
+
+@dataclass(frozen=True)
+class ContextPolicy:
+    """Which part of the conversation an agent receives.
+
+    max_turns       user turns kept, counting the current question
+    token_budget    cap on the kept messages; oldest turns are dropped first
+    include_summary prepend the rolling summary as a system message
+    other_agents    what to do with answers written by other agents:
+                    keep them, compress them to ``compress_tokens``, or drop them
+    """
+    max_turns: int = 4
+    token_budget: int = 3000
+    include_summary: bool = True
+    other_agents: str = "compress"
+    compress_tokens: int = 80
+
+    def __post_init__(self):
+        if self.other_agents not in OTHER_AGENT_POLICIES:
+            raise ValueError(f"Unsupported other_agents policy: {self.other_agents}")
+
+
+DEFAULT_CONTEXT_POLICIES: Dict[str, ContextPolicy] = {
+    # Follow-up questions about the school rarely need more than the last few turns
+    "rag_agent": ContextPolicy(max_turns=3),
+    # Todo ids and titles from earlier schedule answers are needed for updates and deletes
+    "schedule_agent": ContextPolicy(max_turns=6, token_budget=4000),
+    "generic_agent": ContextPolicy(max_turns=4),
+    # Analytics are computed from the database, not from the conversation
+    "analytic_agent": ContextPolicy(max_turns=2, other_agents="drop"),
+    # Handles every kind of request, so it keeps the schedule agent's window
+    "supervisor": ContextPolicy(max_turns=6, token_budget=4000),
+}
+
+
+def load_context_policies() -> Dict[str, ContextPolicy]:
+    """Default policies, overridden per field by AGENT_CONTEXT_POLICIES (JSON), e.g.
+    ``{"rag_agent": {"max_turns": 2, "other_agents": "drop"}}``."""
+    policies = dict(DEFAULT_CONTEXT_POLICIES)
+    overrides = json.loads(os.getenv("AGENT_CONTEXT_POLICIES", "{}"))
+    for agent, fields in overrides.items():
+        policies[agent] = replace(policies.get(agent, ContextPolicy()), **fields)
+    return policies
+
+
+context_policies = load_context_policies()
+
+
+def compress_message(message: AIMessage, max_tokens: int) -> AIMessage:
+    text = message_text(message)
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return message
+    return AIMessage(content=text[:max_chars].rstrip() + " …", name=message.name)
+
+
+def select_context(state: dict, agent: str, policy: ContextPolicy = None) -> List[BaseMessage]:
+    """Messages to send to ``agent`` for the current turn, according to its context policy."""
+    policy = policy or context_policies.get(agent, ContextPolicy())
+    messages = state["messages"]
+
+    # Cut to the last max_turns user turns
+    turn_starts = [i for i, msg in enumerate(messages) if isinstance(msg, HumanMessage)]
+    start = turn_starts[-policy.max_turns] if len(turn_starts) >= policy.max_turns else 0
+    selected = []
+    for msg in messages[start:]:
+        # Unnamed answers predate agent attribution and are kept as they are
+        if isinstance(msg, AIMessage) and msg.name and msg.name != agent:
+            if policy.other_agents == "drop":
+                continue
+            if policy.other_agents == "compress":
+                msg = compress_message(msg, policy.compress_tokens)
+        selected.append(msg)
+
+    # Drop whole turns, oldest first, until under budget; the current question is always kept
+    tokens = [count_message_tokens(msg) for msg in selected]
+    total = sum(tokens)
+    cut = 0
+    while total > policy.token_budget and cut < len(selected) - 1:
+        total -= tokens[cut]
+        cut += 1
+        while cut < len(selected) - 1 and not isinstance(selected[cut], HumanMessage):
+            total -= tokens[cut]
+            cut += 1
+    selected = selected[cut:]
+
+    if policy.include_summary:
+        return summary_message(state.get("summary", "")) + selected
+    return selected
@@ -1,60 +1,89 @@
 from langgraph.graph import StateGraph, END
 from langgraph.prebuilt import create_react_agent
 from langgraph.graph.message import add_messages
-from langchain_core.messages import BaseMessage, HumanMessage, AIMessage, RemoveMessage
-from typing import TypedDict, List, Annotated
+from langchain_core.messages import BaseMessage, AIMessage, HumanMessage, SystemMessage
+from typing import TypedDict, List, Annotated, Literal
+from pydantic import BaseModel, Field
+import asyncio
+import operator
+import time
 from langchain_core.prompts import ChatPromptTemplate
-from src.config.llm import llm
-from src.agents.prompts import ROUTER_PROMPT, RAG_AGENT_PROMPT, SCHEDULE_AGENT_PROMPT, GENERIC_AGENT_PROMPT, ANALYTIC_AGENT_PROMPT, SUMMARIZE_PROMPT
+from langchain_core.runnables import RunnableConfig
+from src.config.llm import get_llm
+from src.agents.prompts import ROUTER_PROMPT, RAG_AGENT_PROMPT, SCHEDULE_AGENT_PROMPT, GENERIC_AGENT_PROMPT, ANALYTIC_AGENT_PROMPT, SUPERVISOR_PROMPT, SESSION_CONTEXT_PROMPT
+from src.agents.summarization import summarize_state
+from src.agents.context import select_context
+from src.agents.response_cache import response_cache
+from src.agents.prefetch import SPECULATIVE_RAG, start_prefetch, settle_prefetch, prefetched_tool_messages
 from src.agents.tools import rag_retrieve, create_todo, get_todos, update_todo, delete_todo, tavily_search, todo_analytics
+from src.utils.token_counter import count_message_tokens, message_text
+from src.monitoring.instrumentation import instrument_node
 from datetime import datetime
+import os
+
+# Let the router send a compound request to several agents at once
+MULTI_INTENT_ROUTING = os.getenv("MULTI_INTENT_ROUTING", "true").lower() == "true"
+MAX_PARALLEL_ROUTES = int(os.getenv("MAX_PARALLEL_ROUTES", "3"))
 
 class AgentState(TypedDict):
+    # The turn's answer is read from messages (turn_answer), not kept in a channel of its own
     messages: Annotated[List[BaseMessage], add_messages]
-    route_decision: str
-    response: str
+    routes: List[str]
     summary: str
     user_id: str
+    # Running token count of messages + summary; nodes return deltas
+    context_tokens: Annotated[int, operator.add]
+    # Knowledge base context prefetched during routing, consumed by rag_agent
+    rag_context: str
 
-def should_summarize(state: AgentState) -> str:
-    """Kiểm tra xem có cần tóm tắt ngữ cảnh không dựa trên số lượng tin nhắn AI."""
-    ai_message_count = sum(1 for msg in state["messages"] if isinstance(msg, AIMessage))
-    
-    if ai_message_count >= 10:
-        return "summarize"
-    else:
-        return "router"
+ROUTES = ("rag_agent", "schedule_agent", "analytic_agent", "generic_agent")
 
-def summarize_node(state: AgentState) -> AgentState:
-    """Node tóm tắt ngữ cảnh cuộc hội thoại khi quá dài."""
-    messages = state["messages"]
-    summary = state.get("summary", "")
+class RouteDecision(BaseModel):
+    """Agents that should handle the user's request."""
+    routes: List[Literal["rag_agent", "schedule_agent", "analytic_agent", "generic_agent"]] = Field(
+        min_length=1,
+        description="Các agent cần thiết để xử lý yêu cầu hiện tại, theo thứ tự các việc trong yêu cầu"
+    )
 
-    # Create chat history
-    chat_history = f"Summarized conversation:\n{summary}\n"
-    for msg in messages:
-        role = "User" if isinstance(msg, HumanMessage) else "Assistant"
-        chat_history += f"{role}: {msg.content}\n"
-    
-    summarize_prompt = ChatPromptTemplate.from_template(SUMMARIZE_PROMPT)
-    summarize_chain = summarize_prompt | llm
-    
-    response = summarize_chain.invoke({
+def normalize_routes(routes: List[str]) -> List[str]:
+    """Deduplicate routes, keep their order and apply the fan-out limits."""
+    routes = list(dict.fromkeys(route for route in routes if route in ROUTES)) or ["generic_agent"]
+    if not MULTI_INTENT_ROUTING:
+        return routes[:1]
+    return routes[:MAX_PARALLEL_ROUTES]
+
+def parse_route(text: str) -> List[str]:
+    """Map a free-text router answer to routes, in the order they are mentioned."""
+    text = text.strip().lower()
+    mentioned = sorted((text.find(route), route) for route in ROUTES if route in text)
+    # Default to generic if unclear
+    return normalize_routes([route for _, route in mentioned])
+
+async def classify_route(router_llm, user_input: str, chat_history: str) -> List[str]:
+    """Ask the router model for the routes of a request through structured output."""
+    router_prompt = ChatPromptTemplate.from_template(ROUTER_PROMPT)
+    router_chain = router_prompt | router_llm.with_structured_output(RouteDecision, include_raw=True)
+
+    # The question is also passed as run metadata, apart from the rendered prompt
+    result = await router_chain.ainvoke({
+        "user_input": user_input,
         "chat_history": chat_history
-    })
+    }, config={"metadata": {"user_input": user_input}})
+    if result["parsed"] is not None:
+        return normalize_routes(result["parsed"].routes)
+    # Models without tool calling (or a malformed call) still answer in text
+    return parse_route(message_text(result["raw"]))
 
-    # Delete all but the 2 most recent messages
-    remove_messages = [RemoveMessage(id=m.id) for m in state["messages"][:-2]]
-    
-    return {
-        **state,
-        "summary": response.content,
-        "messages": remove_messages + [AIMessage(content=response.content)]
-    }
+async def router_node(state: AgentState, config: RunnableConfig) -> AgentState:
+    """Router agent to decide which agents should handle the request.
 
+    A compound request ("học phí bao nhiêu và thêm task đóng học phí") gets
+    several routes; route_to_agent then runs those agents in parallel.
 
-def router_node(state: AgentState) -> AgentState:
-    """Router agent to decide which agent should handle the request."""
+    With speculative RAG (SPECULATIVE_RAG, or ``speculative_rag`` in the run's
+    configurable) the knowledge base search for the message runs concurrently
+    with the routing call and is kept only if the route is rag_agent.
+    """
     # Get user input from the last message
     user_input = state["messages"][-1].content
     messages = state["messages"]
@@ -64,151 +93,238 @@ def router_node(state: AgentState) -> AgentState:
     if len(messages) >= 2:
         last_ai_message += f"Assistant: {messages[-2].content}"
 
-    router_prompt = ChatPromptTemplate.from_template(ROUTER_PROMPT)
-    router_chain = router_prompt | llm
-
-    response = router_chain.invoke({
-        "user_input": user_input,
-        "chat_history": last_ai_message
-    })
-    
-    route_decision = response.content.strip().lower()
-    
-    if "rag_agent" in route_decision:
-        route_decision = "rag_agent"
-    elif "schedule_agent" in route_decision:
-        route_decision = "schedule_agent"
-    elif "analytic_agent" in route_decision:
-        route_decision = "analytic_agent"
-    elif "generic_agent" in route_decision:
-        route_decision = "generic_agent"
-    else:
-        # Default to generic if unclear
-        route_decision = "generic_agent"
+    speculative = config.get("configurable", {}).get("speculative_rag", SPECULATIVE_RAG)
+    prefetch = start_prefetch(user_input) if speculative else None
+    try:
+        routes = await classify_route(get_llm("router"), user_input, last_ai_message)
+    except BaseException:
+        if prefetch is not None:
+            prefetch.cancel()
+        raise
     
     return {
-        **state,
-        "route_decision": route_decision
+        "routes": routes,
+        "rag_context": await settle_prefetch(prefetch, routes)
     }
 
-def create_rag_agent():
-    """Create RAG agent using create_react_agent."""
-    tools = [rag_retrieve]
-    return create_react_agent(llm, tools, prompt=RAG_AGENT_PROMPT)
-
-def create_schedule_agent(user_id=""):
-    """Create Schedule agent using create_react_agent."""
-    tools = [create_todo, get_todos, update_todo, delete_todo]
-    current_datetime = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    formatted_prompt = SCHEDULE_AGENT_PROMPT.format(
-        current_datetime=current_datetime,
-        user_id=user_id
-    )
-    return create_react_agent(llm, tools, prompt=formatted_prompt)
-
-def create_generic_agent():
-    """Create Generic agent using create_react_agent."""
-    tools = [tavily_search]
-    current_datetime = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    formatted_prompt = GENERIC_AGENT_PROMPT.format(current_datetime=current_datetime)
-    return create_react_agent(llm, tools, prompt=formatted_prompt)
-
-def create_analytic_agent(user_id=""):
-    """Create Analytic agent using create_react_agent."""
-    tools = [todo_analytics]
-    formatted_prompt = ANALYTIC_AGENT_PROMPT.format(user_id=user_id)
-    return create_react_agent(llm, tools, prompt=formatted_prompt)
-
-# Create agent instances
-rag_agent = create_rag_agent()
-generic_agent = create_generic_agent()
-
-def rag_agent_node(state: AgentState) -> AgentState:
+# Tools of each agent; prompts are static, per-request values go in session_context()
+AGENT_TOOLS = {
+    "rag_agent": [rag_retrieve],
+    "schedule_agent": [create_todo, get_todos, update_todo, delete_todo],
+    "generic_agent": [tavily_search],
+    "analytic_agent": [todo_analytics],
+    "supervisor": [rag_retrieve, create_todo, get_todos, update_todo, delete_todo, todo_analytics, tavily_search],
+}
+
+def compose_supervisor_prompt() -> str:
+    """SUPERVISOR_PROMPT with the per-agent prompts as tool-scoped instructions."""
+    tool_instructions = "\n\n".join([
+        f"### Khi dùng `rag_retrieve`\n{RAG_AGENT_PROMPT}",
+        f"### Khi quản lý to-do list\n{SCHEDULE_AGENT_PROMPT}",
+        f"### Khi dùng `todo_analytics`\n{ANALYTIC_AGENT_PROMPT}",
+        f"### Khi dùng `tavily_search` hoặc trò chuyện chung\n{GENERIC_AGENT_PROMPT}",
+    ])
+    return SUPERVISOR_PROMPT.format(tool_instructions=tool_instructions)
+
+AGENT_PROMPTS = {
+    "rag_agent": RAG_AGENT_PROMPT,
+    "schedule_agent": SCHEDULE_AGENT_PROMPT,
+    "generic_agent": GENERIC_AGENT_PROMPT,
+    "analytic_agent": ANALYTIC_AGENT_PROMPT,
+    "supervisor": compose_supervisor_prompt(),
+}
+
+# Agents whose tools need the user id and the current time
+SESSION_AGENTS = ("schedule_agent", "analytic_agent", "supervisor")
+
+def session_context(user_id: str, now: datetime = None) -> List[BaseMessage]:
+    """Per-request suffix of the system prompt.
+
+    Sent after the static agent prompt (Gemini merges system messages into one
+    instruction in order), so the prompt prefix stays identical across users
+    and turns and can be served from the provider's prompt cache.
+    """
+    current_datetime = (now or datetime.now()).strftime("%Y-%m-%d %H:%M")
+    return [SystemMessage(content=SESSION_CONTEXT_PROMPT.format(user_id=user_id, current_datetime=current_datetime))]
+
+def create_agent(agent: str):
+    """Create a ReAct agent with its static prompt and tools."""
+    return create_react_agent(get_llm(agent), AGENT_TOOLS[agent], prompt=AGENT_PROMPTS[agent])
+
+def agent_update(final_message: str, agent: str) -> dict:
+    """State update for an agent's final answer, attributed to the agent."""
+    message = AIMessage(content=final_message, name=agent)
+    return {
+        "messages": [message],
+        "context_tokens": count_message_tokens(message)
+    }
+
+async def cache_lookup(state: AgentState, agent: str):
+    """Response cache lookup for the turn, or None when the turn must not use the cache.
+
+    Only the first question of a conversation is looked up: later questions may
+    depend on earlier turns ("còn kỳ sau thì sao?"), which the cache key ignores.
+    Compound requests are skipped too, the agent only answers part of the question.
+    """
+    if state.get("summary") or sum(isinstance(msg, HumanMessage) for msg in state["messages"]) != 1:
+        return None
+    if len(state.get("routes") or []) > 1:
+        return None
+    return await asyncio.to_thread(response_cache.lookup, agent, state["messages"][-1].content)
+
+async def cache_store(lookup, answer: str, started_at: float):
+    """Store the answer generated after a missed lookup; off the event loop like the lookup."""
+    await asyncio.to_thread(response_cache.store, lookup, answer, time.perf_counter() - started_at)
+
+def fan_out_note(state: AgentState, agent: str) -> List[BaseMessage]:
+    """Tell an agent which part of a compound request is its own."""
+    others = [route for route in state.get("routes") or [] if route != agent]
+    if not others:
+        return []
+    return [SystemMessage(
+        content=f"Yêu cầu này được xử lý song song bởi nhiều agent ({', '.join(others)} lo các phần còn lại). "
+                "Chỉ trả lời phần thuộc chuyên môn của bạn, không nhắc tới các phần khác."
+    )]
+
+# Create agent instances once; nothing in their prompts depends on the request
+rag_agent = create_agent("rag_agent")
+schedule_agent = create_agent("schedule_agent")
+generic_agent = create_agent("generic_agent")
+analytic_agent = create_agent("analytic_agent")
+supervisor_agent = create_agent("supervisor")
+
+async def rag_agent_node(state: AgentState) -> AgentState:
     """RAG agent node for school information queries."""
-    result = rag_agent.invoke({"messages": state["messages"]})
+    lookup = await cache_lookup(state, "rag_agent")
+    if lookup is not None and lookup.answer is not None:
+        return {**agent_update(lookup.answer, "rag_agent"), "rag_context": ""}
+
+    messages = fan_out_note(state, "rag_agent") + select_context(state, "rag_agent")
+    if state.get("rag_context"):
+        messages += prefetched_tool_messages(state["messages"][-1].content, state["rag_context"])
+
+    started_at = time.perf_counter()
+    result = await rag_agent.ainvoke({"messages": messages})
     
     final_message = result["messages"][-1].content if result["messages"] else "No response generated."
+    if lookup is not None and result["messages"]:
+        await cache_store(lookup, final_message, started_at)
     
-    return {
-        **state,
-        "response": final_message,
-        "messages": [AIMessage(content=final_message)]
-    }
+    return {**agent_update(final_message, "rag_agent"), "rag_context": ""}
 
-def schedule_agent_node(state: AgentState) -> AgentState:
+async def schedule_agent_node(state: AgentState) -> AgentState:
     """Schedule agent node for CRUD operations."""
-    user_id = state["user_id"]
+    messages = session_context(state["user_id"]) + fan_out_note(state, "schedule_agent") + select_context(state, "schedule_agent")
     
-    schedule_agent = create_schedule_agent(user_id=user_id)
-    
-    result = schedule_agent.invoke({"messages": state["messages"]})
+    result = await schedule_agent.ainvoke({"messages": messages})
     
     final_message = result["messages"][-1].content if result["messages"] else "No response generated."
     
-    return {
-        **state,
-        "response": final_message,
-        "messages": [AIMessage(content=final_message)]
-    }
+    return agent_update(final_message, "schedule_agent")
 
-def generic_agent_node(state: AgentState) -> AgentState:
+async def generic_agent_node(state: AgentState) -> AgentState:
     """Generic agent node for general queries."""
-    result = generic_agent.invoke({"messages": state["messages"]})
+    lookup = await cache_lookup(state, "generic_agent")
+    if lookup is not None and lookup.answer is not None:
+        return agent_update(lookup.answer, "generic_agent")
+
+    started_at = time.perf_counter()
+    result = await generic_agent.ainvoke({"messages": fan_out_note(state, "generic_agent") + select_context(state, "generic_agent")})
     
     final_message = result["messages"][-1].content if result["messages"] else "No response generated."
+    if lookup is not None and result["messages"]:
+        await cache_store(lookup, final_message, started_at)
     
-    return {
-        **state,
-        "response": final_message,
-        "messages": [AIMessage(content=final_message)]
-    }
+    return agent_update(final_message, "generic_agent")
 
-def analytic_agent_node(state: AgentState) -> AgentState:
+async def analytic_agent_node(state: AgentState) -> AgentState:
     """Analytic agent node for learning analytics and advice."""
-    user_id = state["user_id"]
+    messages = session_context(state["user_id"]) + fan_out_note(state, "analytic_agent") + select_context(state, "analytic_agent")
     
-    analytic_agent = create_analytic_agent(user_id=user_id)
-    
-    result = analytic_agent.invoke({"messages": state["messages"]})
+    result = await analytic_agent.ainvoke({"messages": messages})
     
     final_message = result["messages"][-1].content if result["messages"] else "No response generated."
     
-    return {
-        **state,
-        "response": final_message,
-        "messages": [AIMessage(content=final_message)]
-    }
+    return agent_update(final_message, "analytic_agent")
+
+async def supervisor_node(state: AgentState) -> AgentState:
+    """Supervisor node: answers directly or calls any agent's tools, in one ReAct loop."""
+    messages = session_context(state["user_id"]) + select_context(state, "supervisor")
 
-def route_to_agent(state: AgentState) -> str:
-    """Conditional routing function."""
-    route_decision = state.get("route_decision", "generic_agent")
-    return route_decision
+    result = await supervisor_agent.ainvoke({"messages": messages})
+
+    final_message = result["messages"][-1].content if result["messages"] else "No response generated."
+
+    return agent_update(final_message, "supervisor")
+
+def route_to_agent(state: AgentState) -> List[str]:
+    """Conditional routing function; several routes run as parallel branches."""
+    return state.get("routes") or ["generic_agent"]
+
+def turn_answer(messages: List[BaseMessage], routes: List[str]) -> str:
+    """The answer of the last turn as the client received it.
+
+    The agents' answers are the AI messages after the last user message; they
+    are joined in route order, so the result does not depend on which branch
+    finished first.
+    """
+    answers = {}
+    for msg in reversed(messages):
+        if isinstance(msg, HumanMessage):
+            break
+        if isinstance(msg, AIMessage):
+            answers.setdefault(msg.name, msg.content)
+    order = [route for route in routes if route in answers] + [name for name in reversed(list(answers)) if name not in routes]
+    return "\n\n".join(answers[name] for name in order if answers[name])
+
+async def merge_node(state: AgentState) -> AgentState:
+    """Join point of a fanned-out turn: runs once every branch has written its answer.
+
+    It writes nothing; the combined answer is derived from the messages by
+    turn_answer instead of being stored in the checkpoint a second time.
+    """
+    return {}
+
+GRAPH_MODES = ("router", "supervisor")
 
 # Create the graph
-def create_graph() -> StateGraph:
-    """Create the multi-agent workflow graph."""
+def create_graph(mode: str = None) -> StateGraph:
+    """Create the multi-agent workflow graph.
+
+    ``mode`` (default: GRAPH_MODE, else "router") selects the layout:
+    - router: a router call picks one or more of four ReAct agents; several
+      agents run in parallel and merge_node waits for all of them;
+    - supervisor: one ReAct agent over every tool answers directly, saving the
+      routing round trip.
+
+    Summarisation is not on the turn path: it runs in the background after the
+    response has been streamed and writes its result through
+    ``aupdate_state(..., as_node="summarize")`` (see src.agents.summarization).
+    """
+    mode = (mode or os.getenv("GRAPH_MODE", "router")).lower()
+    if mode not in GRAPH_MODES:
+        raise ValueError(f"Unsupported GRAPH_MODE: {mode}")
+
     graph = StateGraph(AgentState)
     
     # Add nodes
-    graph.add_node("summarize_check", lambda state: state)  # Node kiểm tra
-    graph.add_node("summarize", summarize_node)
-    graph.add_node("router", router_node)
-    graph.add_node("rag_agent", rag_agent_node)
-    graph.add_node("schedule_agent", schedule_agent_node)
-    graph.add_node("generic_agent", generic_agent_node)
-    graph.add_node("analytic_agent", analytic_agent_node)
+    graph.add_node("summarize", summarize_state)  # Chỉ được ghi bởi tác vụ tóm tắt nền
+
+    if mode == "supervisor":
+        graph.add_node("supervisor", instrument_node("supervisor", supervisor_node))
+        graph.set_entry_point("supervisor")
+        graph.add_edge("supervisor", END)
+        return graph
+
+    graph.add_node("router", instrument_node("router", router_node))
+    graph.add_node("rag_agent", instrument_node("rag_agent", rag_agent_node))
+    graph.add_node("schedule_agent", instrument_node("schedule_agent", schedule_agent_node))
+    graph.add_node("generic_agent", instrument_node("generic_agent", generic_agent_node))
+    graph.add_node("analytic_agent", instrument_node("analytic_agent", analytic_agent_node))
+    graph.add_node("merge", instrument_node("merge", merge_node))
 
     # Add edges
-    graph.set_entry_point("summarize_check")
-    graph.add_conditional_edges(
-        "summarize_check",
-        should_summarize,
-        {
-            "summarize": "summarize",
-            "router": "router"
-        }
-    )
-    graph.add_edge("summarize", "router")
+    graph.set_entry_point("router")
     graph.add_conditional_edges(
         "router",
         route_to_agent,
@@ -219,9 +335,11 @@ def create_graph() -> StateGraph:
             "generic_agent": "generic_agent"
         }
     )
-    graph.add_edge("rag_agent", END)
-    graph.add_edge("schedule_agent", END)
-    graph.add_edge("analytic_agent", END)
-    graph.add_edge("generic_agent", END)
+    # merge waits for every branch that ran in this step
+    graph.add_edge("rag_agent", "merge")
+    graph.add_edge("schedule_agent", "merge")
+    graph.add_edge("analytic_agent", "merge")
+    graph.add_edge("generic_agent", "merge")
+    graph.add_edge("merge", END)
     
     return graph
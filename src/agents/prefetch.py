@@ -0,0 +1,110 @@
+import asyncio
+import os
+import threading
+import time
+from typing import Dict, Any, List, Optional
+from uuid import uuid4
+from dotenv import load_dotenv
+from langchain_core.messages import AIMessage, ToolMessage
+from loguru import logger
+from src.agents.tools import format_documents
+from src.config.vector_store import vector_store_crud
+
+load_dotenv()
+
+# Start the rag_retrieve search while the router is still deciding
+SPECULATIVE_RAG = os.getenv("SPECULATIVE_RAG", "false").lower() == "true"
+
+
+class PrefetchStats:
+    """Counts of speculative retrievals that were used or thrown away."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._started = 0
+        self._used = 0
+        self._discarded = 0
+        self._failed = 0
+        self._search_seconds = 0.0
+
+    def reset(self):
+        with self._lock:
+            self._started = self._used = self._discarded = self._failed = 0
+            self._search_seconds = 0.0
+
+    def record(self, outcome: str, search_seconds: float = 0.0):
+        with self._lock:
+            if outcome == "started":
+                self._started += 1
+            elif outcome == "used":
+                self._used += 1
+                self._search_seconds += search_seconds
+            elif outcome == "discarded":
+                self._discarded += 1
+            elif outcome == "failed":
+                self._failed += 1
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": SPECULATIVE_RAG,
+                "started": self._started,
+                "used": self._used,
+                "discarded": self._discarded,
+                "failed": self._failed,
+                # Share of prefetches whose search was wasted work
+                "waste_ratio": round((self._discarded + self._failed) / self._started, 4) if self._started else 0.0,
+                "avg_used_search_ms": round(self._search_seconds / self._used * 1000, 1) if self._used else 0.0,
+            }
+
+
+prefetch_stats = PrefetchStats()
+
+
+async def _search(query: str) -> tuple:
+    started = time.perf_counter()
+    docs = await vector_store_crud.search(query)
+    return format_documents(docs), time.perf_counter() - started
+
+
+def start_prefetch(query: str) -> asyncio.Task:
+    """Start the knowledge base search for ``query`` in the background."""
+    prefetch_stats.record("started")
+    return asyncio.create_task(_search(query))
+
+
+async def settle_prefetch(task: Optional[asyncio.Task], routes: List[str]) -> str:
+    """Retrieved context if rag_agent is among the turn's routes, else cancel the search.
+
+    Returns "" when there is nothing to inject; rag_agent then searches on its own.
+    """
+    if task is None:
+        return ""
+    if "rag_agent" not in routes:
+        task.cancel()
+        prefetch_stats.record("discarded")
+        return ""
+    try:
+        context, search_seconds = await task
+    except Exception as e:
+        logger.warning(f"Speculative RAG search failed: {e}")
+        prefetch_stats.record("failed")
+        return ""
+    prefetch_stats.record("used", search_seconds)
+    return context
+
+
+def prefetched_tool_messages(query: str, context: str) -> list:
+    """A completed rag_retrieve call carrying the prefetched context.
+
+    Appended to the rag agent's input so its first model step can answer
+    straight away instead of calling the tool.
+    """
+    call_id = f"prefetch-{uuid4()}"
+    return [
+        AIMessage(
+            content="",
+            tool_calls=[{"name": "rag_retrieve", "args": {"input": {"query": query}}, "id": call_id}],
+        ),
+        ToolMessage(content=context, name="rag_retrieve", tool_call_id=call_id),
+    ]
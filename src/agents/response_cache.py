@@ -0,0 +1,204 @@
+import hashlib
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Any, Optional
+import numpy as np
+from dotenv import load_dotenv
+from langchain_core.embeddings import Embeddings
+from src.cache import CacheBackend
+from src.config.cache import cache
+from src.config.vector_store import vector_store_crud
+
+load_dotenv()
+
+# Only agents whose answers do not depend on who is asking may be cached.
+# schedule_agent and analytic_agent read the user's own todos and must never be.
+CACHEABLE_AGENTS = ("rag_agent", "generic_agent")
+
+
+def normalize_query(text: str) -> str:
+    """Exact-match key: NFC, lowercase, collapsed whitespace, no trailing punctuation."""
+    text = unicodedata.normalize("NFC", text).lower()
+    text = re.sub(r"\s+", " ", text).strip()
+    return text.rstrip("?!.… ")
+
+
+@dataclass
+class CacheEntry:
+    agent: str
+    query: str
+    vector: np.ndarray
+    answer: str
+    created_at: float
+    latency: float  # seconds it took to generate the answer
+    version: int  # version of the agent's cache namespace when written
+
+
+@dataclass
+class CacheLookup:
+    """Result of a lookup; on a miss it carries the key material for ``store``."""
+    agent: str
+    query: str
+    vector: Optional[np.ndarray]
+    answer: Optional[str] = None
+    kind: str = "miss"  # exact, shared, semantic, miss
+
+
+class ResponseCache:
+    """Cache of final agent answers for user-independent agents.
+
+    Lookups try the normalised question text first, then (when the cache
+    backend is shared) the answers other workers stored for that text, and then
+    the nearest question cached in this worker by embedding similarity.
+    Entries expire after their agent's TTL and are dropped when the agent's
+    namespace ``response:<agent>`` is invalidated; the vector store does that
+    for rag_agent on every write.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        cache: Optional[CacheBackend] = None,
+        ttl_seconds: Optional[Dict[str, float]] = None,
+        similarity_threshold: float = 0.92,
+        max_entries: int = 1000,
+        enabled: bool = True,
+    ):
+        self.embeddings = embeddings
+        self.cache = cache
+        self.ttl_seconds = ttl_seconds or {"rag_agent": 86400, "generic_agent": 3600}
+        self.similarity_threshold = similarity_threshold
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[tuple, CacheEntry]" = OrderedDict()
+        self._stats = {"lookups": 0, "exact_hits": 0, "shared_hits": 0, "semantic_hits": 0, "misses": 0, "saved_seconds": 0.0}
+
+    def _version(self, agent: str) -> int:
+        return self.cache.version(f"response:{agent}") if self.cache is not None else 0
+
+    def _is_fresh(self, entry: CacheEntry, now: float, versions: Dict[str, int]) -> bool:
+        if now - entry.created_at > self.ttl_seconds.get(entry.agent, 0):
+            return False
+        return entry.version == versions[entry.agent]
+
+    def _evict_stale(self, now: float, versions: Dict[str, int]):
+        for key in [key for key, entry in self._entries.items() if not self._is_fresh(entry, now, versions)]:
+            del self._entries[key]
+
+    @staticmethod
+    def _shared_key(query: str) -> str:
+        return hashlib.sha256(query.encode()).hexdigest()
+
+    def lookup(self, agent: str, question: str) -> Optional[CacheLookup]:
+        """Cached answer for ``question``, or None if the agent is not cacheable."""
+        if not self.enabled or agent not in CACHEABLE_AGENTS:
+            return None
+        started = time.perf_counter()
+        query = normalize_query(question)
+        result = CacheLookup(agent=agent, query=query, vector=None)
+        # Read outside the lock: a shared backend may need a round trip
+        versions = {cacheable: self._version(cacheable) for cacheable in CACHEABLE_AGENTS}
+
+        with self._lock:
+            self._stats["lookups"] += 1
+            now = time.time()
+            self._evict_stale(now, versions)
+            entry = self._entries.get((agent, query))
+            if entry is not None:
+                result.kind = "exact"
+            candidates = [entry for entry in self._entries.values() if entry.agent == agent]
+
+        if entry is None and self.cache is not None and self.cache.shared:
+            shared = self.cache.get(f"response:{agent}", self._shared_key(query))
+            if shared is not None:
+                entry = CacheEntry(agent=agent, query=query, vector=None, answer=shared["answer"],
+                                   created_at=now, latency=shared["latency"], version=0)
+                result.kind = "shared"
+
+        if entry is None:
+            result.vector = np.asarray(self.embeddings.embed_query(query), dtype=np.float32)
+            result.vector /= np.linalg.norm(result.vector) or 1.0
+            if candidates:
+                scores = np.stack([candidate.vector for candidate in candidates]) @ result.vector
+                best = int(np.argmax(scores))
+                if scores[best] >= self.similarity_threshold:
+                    entry = candidates[best]
+                    result.kind = "semantic"
+
+        with self._lock:
+            if entry is None:
+                self._stats["misses"] += 1
+                return result
+            self._stats[f"{result.kind}_hits"] += 1
+            self._stats["saved_seconds"] += max(0.0, entry.latency - (time.perf_counter() - started))
+        result.answer = entry.answer
+        return result
+
+    def store(self, lookup: CacheLookup, answer: str, latency: float):
+        """Cache the answer generated after a missed lookup."""
+        if lookup.vector is None:
+            return
+        entry = CacheEntry(
+            agent=lookup.agent,
+            query=lookup.query,
+            vector=lookup.vector,
+            answer=answer,
+            created_at=time.time(),
+            latency=latency,
+            version=self._version(lookup.agent),
+        )
+        with self._lock:
+            self._entries[(lookup.agent, lookup.query)] = entry
+            self._entries.move_to_end((lookup.agent, lookup.query))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        if self.cache is not None and self.cache.shared:
+            self.cache.set(
+                f"response:{lookup.agent}",
+                self._shared_key(lookup.query),
+                {"answer": answer, "latency": latency},
+                ttl=self.ttl_seconds.get(lookup.agent, 0),
+            )
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            entries = len(self._entries)
+        hits = stats["exact_hits"] + stats["shared_hits"] + stats["semantic_hits"]
+        return {
+            "enabled": self.enabled,
+            "entries": entries,
+            "lookups": stats["lookups"],
+            "exact_hits": stats["exact_hits"],
+            "shared_hits": stats["shared_hits"],
+            "semantic_hits": stats["semantic_hits"],
+            "misses": stats["misses"],
+            "hit_rate": round(hits / stats["lookups"], 4) if stats["lookups"] else 0.0,
+            "saved_latency_s": round(stats["saved_seconds"], 3),
+        }
+
+
+response_cache = ResponseCache(
+    vector_store_crud.embeddings,
+    cache=cache,
+    ttl_seconds={
+        "rag_agent": float(os.getenv("RESPONSE_CACHE_TTL_RAG", "86400")),
+        "generic_agent": float(os.getenv("RESPONSE_CACHE_TTL_GENERIC", "3600")),
+    },
+    similarity_threshold=float(os.getenv("RESPONSE_CACHE_SIMILARITY", "0.92")),
+    max_entries=int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "1000")),
+    enabled=os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() == "true",
+)
+
+# Answers grounded in the knowledge base go stale as soon as it changes
+vector_store_crud.add_change_listener(lambda: cache.ainvalidate("response:rag_agent"))
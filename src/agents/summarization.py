@@ -0,0 +1,149 @@
+import asyncio
+import os
+from collections import OrderedDict
+from typing import List
+from dotenv import load_dotenv
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage, RemoveMessage
+from langchain_core.prompts import ChatPromptTemplate
+from loguru import logger
+from src.config.llm import get_llm
+from src.agents.prompts import SUMMARIZE_PROMPT
+from src.utils.keyed_locks import thread_locks
+from src.utils.token_counter import count_tokens, count_message_tokens, message_text
+from src.monitoring.instrumentation import instrument_node
+
+load_dotenv()
+
+# Summarise once a thread's context (messages + summary) exceeds the budget,
+# evicting the oldest messages until it is back under the target.
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "6000"))
+CONTEXT_TOKEN_TARGET = int(os.getenv("CONTEXT_TOKEN_TARGET", str(CONTEXT_TOKEN_BUDGET // 2)))
+
+
+class RecentThreads:
+    """Set of thread ids that keeps only the ``max_size`` most recently added.
+
+    Threads whose next turn never comes to this worker would otherwise stay for
+    the life of the process.
+    """
+
+    def __init__(self, max_size: int = 10000):
+        self.max_size = max_size
+        self._ids: "OrderedDict[str, None]" = OrderedDict()
+
+    def add(self, thread_id: str):
+        self._ids[thread_id] = None
+        self._ids.move_to_end(thread_id)
+        while len(self._ids) > self.max_size:
+            self._ids.popitem(last=False)
+
+    def discard(self, thread_id: str):
+        self._ids.pop(thread_id, None)
+
+    def __contains__(self, thread_id: str) -> bool:
+        return thread_id in self._ids
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+
+# Threads summarised since their last turn; the next turn is labelled for TTFT tracking
+recently_summarized = RecentThreads()
+_background_tasks = set()
+
+
+def should_summarize(state: dict) -> bool:
+    """Kiểm tra xem ngữ cảnh của hội thoại có vượt ngân sách token không."""
+    return state.get("context_tokens", 0) > CONTEXT_TOKEN_BUDGET
+
+
+def select_evicted(messages: List[BaseMessage], summary_tokens: int, target: int = CONTEXT_TOKEN_TARGET) -> int:
+    """Number of oldest messages to fold into the summary to get under ``target`` tokens.
+
+    The latest exchange is always kept verbatim: the last user message and every
+    reply after it (several with fan-out). The kept window starts with a user
+    message, so the agents never see an orphaned assistant reply first.
+    """
+    tokens = [count_message_tokens(msg) for msg in messages]
+    total = summary_tokens + sum(tokens)
+    latest_question = max((i for i, msg in enumerate(messages) if isinstance(msg, HumanMessage)), default=0)
+    evicted = 0
+    while evicted < latest_question and total > target:
+        total -= tokens[evicted]
+        evicted += 1
+    while evicted < latest_question and not isinstance(messages[evicted], HumanMessage):
+        evicted += 1
+    return evicted
+
+
+def format_messages(messages: List[BaseMessage]) -> str:
+    return "\n".join(
+        f"{'User' if isinstance(msg, HumanMessage) else 'Assistant'}: {message_text(msg)}"
+        for msg in messages
+    )
+
+
+def summary_message(summary: str) -> List[SystemMessage]:
+    """Rolling summary as a system message to prepend to an agent's input (empty if none yet)."""
+    if not summary:
+        return []
+    return [SystemMessage(content=f"Tóm tắt phần trước của cuộc hội thoại:\n{summary}")]
+
+
+async def summarize_state(state: dict) -> dict:
+    """Gộp các tin nhắn cũ nhất vào bản tóm tắt hiện có, trả về bản cập nhật state."""
+    messages = state["messages"]
+    summary = state.get("summary", "")
+
+    evicted = select_evicted(messages, count_tokens(summary), CONTEXT_TOKEN_TARGET)
+    if not evicted:
+        return {}
+
+    summarize_prompt = ChatPromptTemplate.from_template(SUMMARIZE_PROMPT)
+    summarize_chain = summarize_prompt | get_llm("summarize")
+
+    response = await summarize_chain.ainvoke({
+        "summary": summary,
+        "new_messages": format_messages(messages[:evicted]),
+    })
+
+    # Recount the kept window exactly, which also corrects any drift in the running total
+    context_tokens = count_tokens(response.content) + sum(count_message_tokens(msg) for msg in messages[evicted:])
+
+    return {
+        "summary": response.content,
+        "messages": [RemoveMessage(id=msg.id) for msg in messages[:evicted]],
+        "context_tokens": context_tokens - state.get("context_tokens", 0),
+    }
+
+
+async def summarize_thread(compiled_graph, config: dict):
+    """Fold the oldest messages of a thread's checkpoint into its summary if it is over budget.
+
+    Runs after the turn's response has been streamed and holds the thread lock,
+    so it never interleaves with a turn on the same conversation.
+    """
+    thread_id = config["configurable"]["thread_id"]
+    async with thread_locks.hold(thread_id):
+        snapshot = await compiled_graph.aget_state(config)
+        if not snapshot.values or not should_summarize(snapshot.values):
+            return
+        update = await instrument_node("summarize", summarize_state)(snapshot.values)
+        if not update:
+            return
+        await compiled_graph.aupdate_state(config, update, as_node="summarize")
+        recently_summarized.add(thread_id)
+
+
+def schedule_summary(compiled_graph, config: dict):
+    """Run summarize_thread as a background task, off the response critical path."""
+    task = asyncio.create_task(summarize_thread(compiled_graph, config))
+    _background_tasks.add(task)
+
+    def on_done(task: asyncio.Task):
+        _background_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Background summary for thread {config['configurable']['thread_id']} failed: {task.exception()}")
+
+    task.add_done_callback(on_done)
+    return task
@@ -2,8 +2,8 @@ from langchain_core.tools import tool
 from pydantic import Field, BaseModel
 from datetime import datetime
 from typing import Optional
-from sqlalchemy.orm import Session
-from src.config.database import TodoItem, SessionLocal
+from sqlalchemy import select
+from src.config.database import TodoItem, AsyncSessionLocal
 from src.config.vector_store import vector_store_crud
 from langchain_tavily import TavilySearch
 from src.analytics.todo_analytics import (
@@ -50,26 +50,31 @@ class TodoAnalyticsInput(BaseModel):
     days_back: Optional[int] = Field(default=30, description="Number of days to analyze")
     userId: int = Field(description="User ID")
 
+def format_documents(docs) -> str:
+    """Render retrieved chunks the way rag_retrieve returns them to the agent."""
+    if not docs:
+        return "No relevant information found in the knowledge base."
+    return "\n\n".join([f"Source: {doc.metadata.get('source_file') or doc.metadata.get('source', 'Unknown')}\nContent: {doc.page_content}" for doc in docs])
+
+# The tools are coroutines so that cancelling a turn (client disconnect) also
+# cancels their searches, web requests and queries; a sync tool would run to
+# completion in an executor thread.
+
 @tool
-def rag_retrieve(input: RAGInput) -> str:
+async def rag_retrieve(input: RAGInput) -> str:
     """Retrieve relevant information from the school knowledge base."""
     try:
-        import asyncio
-        docs = asyncio.run(vector_store_crud.search(input.query))
-        if docs:
-            context = "\n\n".join([f"Source: {doc.metadata.get('source', 'Unknown')}\nContent: {doc.page_content}" for doc in docs])
-            return context
-        else:
-            return "No relevant information found in the knowledge base."
+        docs = await vector_store_crud.search(input.query)
+        return format_documents(docs)
     except Exception as e:
         return f"Error retrieving information: {str(e)}"
 
 @tool
-def tavily_search(input: TavilySearchInput) -> str:
+async def tavily_search(input: TavilySearchInput) -> str:
     """Search the web using Tavily for current information."""
     try:
         tavily_tool = TavilySearch(max_results=input.max_results, time_range="day")
-        tool_msg = tavily_tool.invoke({"query": input.query})
+        tool_msg = await tavily_tool.ainvoke({"query": input.query})
         
         if tool_msg:
             formatted_results = []
@@ -83,7 +88,7 @@ def tavily_search(input: TavilySearchInput) -> str:
         return f"Error performing web search: {str(e)}"
 
 @tool
-def create_todo(input: TodoInput) -> str:
+async def create_todo(input: TodoInput) -> str:
     """Create a new todo item.
 
     Args:
@@ -93,7 +98,7 @@ def create_todo(input: TodoInput) -> str:
         A confirmation message with the created todo's ID
     """
     try:
-        db = SessionLocal()
+        db = AsyncSessionLocal()
         
         deadline_date = None
         if input.deadline:
@@ -116,18 +121,18 @@ def create_todo(input: TodoInput) -> str:
         )
         
         db.add(todo)
-        db.commit()
-        db.refresh(todo)
+        await db.commit()
+        await db.refresh(todo)
         
         return f"Todo created successfully with ID: {todo.id}"
     
     except Exception as e:
         return f"Error creating todo: {str(e)}"
     finally:
-        db.close()
+        await db.close()
 
 @tool
-def get_todos(userId: int) -> str:
+async def get_todos(userId: int) -> str:
     """Get all todo items for a specific user from current date to future.
     
     Args:
@@ -137,16 +142,16 @@ def get_todos(userId: int) -> str:
         A JSON string representation of the user's todos
     """
     try:
-        db = SessionLocal()
+        db = AsyncSessionLocal()
         
         # Lấy ngày hiện tại và đặt giờ về 00:00:00
         current_date = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
         
         # Lọc todo theo userId và chỉ lấy các todo có deadline từ ngày hiện tại trở đi hoặc không có deadline
-        query = db.query(TodoItem).filter(TodoItem.userId == userId,
+        query = select(TodoItem).where(TodoItem.userId == userId,
             ((TodoItem.deadline.is_(None)) | (TodoItem.deadline >= current_date))
         )
-        todos = query.all()
+        todos = (await db.scalars(query)).all()
         
         if not todos:
             return str({"message": "No todos found", "todos": []})
@@ -175,10 +180,10 @@ def get_todos(userId: int) -> str:
     except Exception as e:
         return str({"error": f"Error retrieving todos: {str(e)}", "todos": []})
     finally:
-        db.close()
+        await db.close()
 
 @tool
-def update_todo(input: TodoUpdateInput) -> str:
+async def update_todo(input: TodoUpdateInput) -> str:
     """Update an existing todo item with authorization check.
     
     Args:
@@ -188,10 +193,10 @@ def update_todo(input: TodoUpdateInput) -> str:
         A confirmation message or error message
     """
     try:
-        db = SessionLocal()
+        db = AsyncSessionLocal()
         
-        query = db.query(TodoItem).filter(TodoItem.id == input.todo_id, TodoItem.userId == input.userId)
-        todo = query.first()
+        query = select(TodoItem).where(TodoItem.id == input.todo_id, TodoItem.userId == input.userId)
+        todo = (await db.scalars(query)).first()
         
         if not todo:
             return f"Todo with ID {input.todo_id} not found or you don't have permission to update it."
@@ -216,17 +221,17 @@ def update_todo(input: TodoUpdateInput) -> str:
                     return "Invalid date format. Please use YYYY-MM-DD or YYYY-MM-DD HH:MM"
         
         todo.updatedAt = datetime.utcnow()
-        db.commit()
+        await db.commit()
         
         return f"Todo {input.todo_id} updated successfully."
     
     except Exception as e:
         return f"Error updating todo: {str(e)}"
     finally:
-        db.close()
+        await db.close()
 
 @tool
-def delete_todo(todo_id: int, userId: int) -> str:
+async def delete_todo(todo_id: int, userId: int) -> str:
     """Delete a todo item by its ID with user authorization.
     
     Args:
@@ -237,51 +242,46 @@ def delete_todo(todo_id: int, userId: int) -> str:
         A confirmation message or error message
     """
     try:
-        db = SessionLocal()
+        db = AsyncSessionLocal()
         
-        query = db.query(TodoItem).filter(TodoItem.id == todo_id, TodoItem.userId == userId)
-        todo = query.first()
+        query = select(TodoItem).where(TodoItem.id == todo_id, TodoItem.userId == userId)
+        todo = (await db.scalars(query)).first()
         
         if not todo:
             return f"Todo with ID {todo_id} not found or you don't have permission to delete it."
         
-        db.delete(todo)
-        db.commit()
+        await db.delete(todo)
+        await db.commit()
         
         return f"Todo {todo_id} deleted successfully."
     
     except Exception as e:
         return f"Error deleting todo: {str(e)}"
     finally:
-        db.close()
+        await db.close()
 
 @tool
-def todo_analytics(input: TodoAnalyticsInput) -> str:
+async def todo_analytics(input: TodoAnalyticsInput) -> str:
     """Analyze todo patterns and provide insights for better productivity."""
     try:
-        db = SessionLocal()
+        db = AsyncSessionLocal()
         
         # Calculate date range using utils helper
         start_date, end_date = get_date_range(input.days_back)
         
-        # Prepare base query with user filtering
-        base_query = db.query(TodoItem).filter(TodoItem.createdAt >= start_date)
-        if input.userId:
-            base_query = base_query.filter(TodoItem.userId == input.userId)
-        
-        # Use analytics helpers from utils with user filtering
+        # Use analytics helpers from utils with user filtering; they take a sync Session
         if input.analysis_type == "productivity":
-            return analyze_productivity(db, start_date, end_date, input.userId)
+            return await db.run_sync(analyze_productivity, start_date, end_date, input.userId)
         elif input.analysis_type == "patterns":
-            return analyze_patterns(db, start_date, end_date, input.userId)
+            return await db.run_sync(analyze_patterns, start_date, end_date, input.userId)
         elif input.analysis_type == "completion_rate":
-            return analyze_completion_rate(db, start_date, end_date, input.userId)
+            return await db.run_sync(analyze_completion_rate, start_date, end_date, input.userId)
         elif input.analysis_type == "workload":
-            return analyze_workload(db, start_date, end_date, input.userId)
+            return await db.run_sync(analyze_workload, start_date, end_date, input.userId)
         else:
             return "Invalid analysis type. Available types: productivity, patterns, completion_rate, workload"
     
     except Exception as e:
         return f"Error performing analytics: {str(e)}"
     finally:
-        db.close()
+        await db.close()
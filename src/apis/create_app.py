@@ -1,16 +1,43 @@
+import asyncio
+import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, APIRouter
 from fastapi.middleware.cors import CORSMiddleware
+from loguru import logger
 from src.apis.routers.vector_store_router import router as vector_store_router
-from src.apis.routers.multi_agent_router import router as multi_agent_router
+from src.apis.routers.multi_agent_router import router as multi_agent_router, get_retention
+from src.checkpoints.retention import CHECKPOINT_RETENTION_ENABLED
+from src.checkpoints.threads import create_thread_table
+from src.apis.middlewares.profiling_middleware import ProfilingMiddleware
+from src.apis.middlewares.admission import AdmissionMiddleware
+from src.apis.routers.monitoring_router import router as monitoring_router, metrics_router
 
 api_router = APIRouter()
 api_router.include_router(vector_store_router)
 api_router.include_router(multi_agent_router)
+api_router.include_router(monitoring_router)
+api_router.include_router(metrics_router)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    background = []
+    try:
+        await asyncio.to_thread(create_thread_table)
+    except Exception as e:
+        logger.error(f"Creating the conversation_threads table failed: {e}")
+    if CHECKPOINT_RETENTION_ENABLED:
+        retention = await get_retention()
+        interval = float(os.getenv("CHECKPOINT_RETENTION_INTERVAL_SECONDS", "3600"))
+        background.append(asyncio.create_task(retention.run_forever(interval)))
+    yield
+    for task in background:
+        task.cancel()
 
 def create_app():
     app = FastAPI(
         docs_url="/docs",
-        title="AI Service"
+        title="AI Service",
+        lifespan=lifespan,
     )
 
     @app.get("/")
@@ -25,6 +52,9 @@ def create_app():
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=["X-Profile-Id", "X-Profile-Status"],
     )
+    app.add_middleware(AdmissionMiddleware)
+    app.add_middleware(ProfilingMiddleware)
 
     return app
\ No newline at end of file
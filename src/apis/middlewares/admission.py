@@ -0,0 +1,249 @@
+import asyncio
+import math
+import os
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, Optional
+import jwt
+from dotenv import load_dotenv
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+from loguru import logger
+from src.apis.middlewares.auth_middleware import authenticate
+from src.monitoring.metrics import admission_queue_depth, admission_in_flight, admission_wait, admission_rejected
+from src.utils.keyed_locks import KeyedLocks
+
+load_dotenv()
+
+ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "true").lower() == "true"
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+@dataclass
+class Ticket:
+    user: str
+    conversation_id: str
+    admitted_at: float
+
+
+class AdmissionController:
+    """Admission of chat turns, in front of the checkpointer pool and the LLM quota.
+
+    - at most ``max_in_flight`` turns run at once, and ``max_per_user`` per user;
+    - turns of one conversation run one after the other;
+    - a free slot goes to the waiting user with the fewest running turns,
+      round-robin among equals, so a user with many queued turns cannot
+      starve the others;
+    - a turn waits at most ``max_wait`` seconds and the queue holds at most
+      ``max_queue`` turns; beyond that AdmissionRejected carries a Retry-After
+      estimate.
+    """
+
+    def __init__(self, max_in_flight: int = 16, max_per_user: int = 2, max_queue: int = 200, max_wait: float = 15.0):
+        self.max_in_flight = max_in_flight
+        self.max_per_user = max_per_user
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self._in_flight = 0
+        self._per_user: Dict[str, int] = {}
+        # user -> waiting futures in arrival order; _rotation holds the users that have any
+        self._waiters: Dict[str, Deque[asyncio.Future]] = {}
+        self._rotation: Deque[str] = deque()
+        self._queued = 0
+        self._conversations = KeyedLocks()
+        # Moving average of how long a turn holds its slot, for Retry-After
+        self._turn_seconds = 5.0
+        self._stats = {"admitted": 0, "rejected": 0}
+
+    def retry_after(self) -> int:
+        """Seconds until a slot is likely to be free for a new turn."""
+        turns_ahead = self._queued + 1
+        return max(1, min(60, math.ceil(self._turn_seconds * turns_ahead / self.max_in_flight)))
+
+    def _reject(self, reason: str, waited: float):
+        self._stats["rejected"] += 1
+        admission_rejected.inc(reason=reason)
+        admission_wait.observe(waited, outcome="rejected")
+        raise AdmissionRejected(reason, self.retry_after())
+
+    def _grant(self, user: str):
+        self._in_flight += 1
+        self._per_user[user] = self._per_user.get(user, 0) + 1
+        admission_in_flight.set(self._in_flight)
+
+    def _dispatch(self):
+        """Hand free slots to waiting turns: the user with the fewest running turns first, ties in rotation order."""
+        while self._in_flight < self.max_in_flight and self._rotation:
+            eligible = [user for user in self._rotation if self._per_user.get(user, 0) < self.max_per_user]
+            if not eligible:
+                # Every waiting user is at their own cap
+                return
+            user = min(eligible, key=lambda name: self._per_user.get(name, 0))
+            waiters = self._waiters[user]
+            future = waiters.popleft()
+            # Served users go to the back of the rotation
+            self._rotation.remove(user)
+            if waiters:
+                self._rotation.append(user)
+            else:
+                del self._waiters[user]
+            self._grant(user)
+            future.set_result(None)
+
+    def _dequeue(self, user: str, future: asyncio.Future):
+        waiters = self._waiters.get(user)
+        if waiters is not None and future in waiters:
+            waiters.remove(future)
+            if not waiters:
+                del self._waiters[user]
+                self._rotation.remove(user)
+
+    async def acquire(self, user: str, conversation_id: str) -> Ticket:
+        started = time.monotonic()
+        deadline = started + self.max_wait
+        if self._queued >= self.max_queue:
+            self._reject("queue_full", 0.0)
+
+        self._queued += 1
+        admission_queue_depth.set(self._queued)
+        try:
+            if not await self._conversations.acquire(conversation_id, timeout=max(0.0, deadline - time.monotonic())):
+                self._reject("conversation_busy", time.monotonic() - started)
+            try:
+                future = asyncio.get_running_loop().create_future()
+                self._waiters.setdefault(user, deque()).append(future)
+                if user not in self._rotation:
+                    self._rotation.append(user)
+                self._dispatch()
+                try:
+                    await asyncio.wait_for(asyncio.shield(future), timeout=max(0.0, deadline - time.monotonic()))
+                except asyncio.TimeoutError:
+                    if not future.done():
+                        self._dequeue(user, future)
+                        self._reject("timeout", time.monotonic() - started)
+                except asyncio.CancelledError:
+                    self._dequeue(user, future)
+                    if future.done():
+                        # Granted just as the waiter went away
+                        self._release_slot(user)
+                    raise
+            except BaseException:
+                self._conversations.release(conversation_id)
+                raise
+        finally:
+            self._queued -= 1
+            admission_queue_depth.set(self._queued)
+
+        waited = time.monotonic() - started
+        self._stats["admitted"] += 1
+        admission_wait.observe(waited, outcome="admitted")
+        return Ticket(user=user, conversation_id=conversation_id, admitted_at=time.monotonic())
+
+    def _release_slot(self, user: str):
+        self._in_flight -= 1
+        self._per_user[user] -= 1
+        if not self._per_user[user]:
+            del self._per_user[user]
+        admission_in_flight.set(self._in_flight)
+        self._dispatch()
+
+    def release(self, ticket: Ticket):
+        self._turn_seconds = 0.9 * self._turn_seconds + 0.1 * (time.monotonic() - ticket.admitted_at)
+        self._conversations.release(ticket.conversation_id)
+        self._release_slot(ticket.user)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": ADMISSION_ENABLED,
+            "in_flight": self._in_flight,
+            "queued": self._queued,
+            "users_waiting": len(self._rotation),
+            "max_in_flight": self.max_in_flight,
+            "max_per_user": self.max_per_user,
+            "avg_turn_seconds": round(self._turn_seconds, 2),
+            **self._stats,
+        }
+
+
+admission = AdmissionController(
+    max_in_flight=int(os.getenv("ADMISSION_MAX_IN_FLIGHT", "16")),
+    max_per_user=int(os.getenv("ADMISSION_MAX_PER_USER", "2")),
+    max_queue=int(os.getenv("ADMISSION_MAX_QUEUE", "200")),
+    max_wait=float(os.getenv("ADMISSION_MAX_WAIT_SECONDS", "15")),
+)
+
+
+async def request_user(scope) -> Optional[str]:
+    """Admission key of the request: the validated user of the bearer token.
+
+    The token is validated here as the route would (auth service or token
+    cache), so a forged ``id`` claim cannot take another user's slots; the
+    user is left in the request state for get_current_user. Requests without
+    a valid token get None: the route rejects them without admission. If the
+    auth service fails, the client address is the key instead.
+    """
+    authorization = dict(scope["headers"]).get(b"authorization", b"").decode("latin-1")
+    if not authorization.lower().startswith("bearer ") or not authorization[7:]:
+        return None
+    token = authorization[7:]
+    try:
+        user = await authenticate(token)
+    except (jwt.PyJWTError, HTTPException):
+        return None
+    except Exception as e:
+        logger.warning(f"Token validation for admission failed: {e}")
+        client = scope.get("client")
+        return f"client:{client[0] if client else 'unknown'}"
+    scope.setdefault("state", {})["authenticated"] = (token, user)
+    return f"user:{user.user_id}"
+
+
+class AdmissionMiddleware:
+    """Admission control for POST ``path_prefix``{conversation_id}.
+
+    An ASGI middleware rather than a dependency, so the slot is held until the
+    streamed body is finished (or the client is gone) and always released.
+    """
+
+    def __init__(self, app, controller: Optional[AdmissionController] = None, path_prefix: str = "/chatbot/stream/"):
+        self.app = app
+        self.controller = controller or admission
+        self.path_prefix = path_prefix
+
+    async def __call__(self, scope, receive, send):
+        if (
+            not ADMISSION_ENABLED
+            or scope["type"] != "http"
+            or scope["method"] != "POST"
+            or not scope["path"].startswith(self.path_prefix)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        user = await request_user(scope)
+        if user is None:
+            # Unauthenticated: the route answers 401/403 at once, no slot or conversation lock needed
+            await self.app(scope, receive, send)
+            return
+        conversation_id = scope["path"][len(self.path_prefix):]
+        try:
+            ticket = await self.controller.acquire(user, conversation_id)
+        except AdmissionRejected as e:
+            response = JSONResponse(
+                status_code=429,
+                content={"error": "Too many requests, please retry later", "reason": e.reason},
+                headers={"Retry-After": str(e.retry_after)},
+            )
+            await response(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(ticket)
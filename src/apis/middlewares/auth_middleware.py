@@ -1,50 +1,108 @@
 from typing import Annotated
-from fastapi import Depends, HTTPException
+from fastapi import Depends, HTTPException, Request
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel, Field, EmailStr
 import jwt
 import requests
+import asyncio
+import hashlib
 import os
+import time
 from dotenv import load_dotenv
+from src.config.cache import cache
+from src.monitoring.metrics import auth_duration
 
 load_dotenv()
 
 security = HTTPBearer()
 
+# Roles allowed on admin-only endpoints
+ADMIN_ROLES = {role.strip() for role in os.getenv("ADMIN_ROLES", "admin").split(",") if role.strip()}
+
+# Seconds a token the auth service accepted is trusted without asking again; never past the
+# token's own exp. Off by default: a revoked or logged-out token stays valid for this long
+AUTH_CACHE_TTL = float(os.getenv("AUTH_CACHE_TTL_SECONDS", "0"))
+
 class User(BaseModel):
     user_id: int = Field("", description="User's id")
     email: EmailStr = Field("", description="User's email")
     role: str = Field("", description="User's role")
 
-async def get_current_user(
-    credentials: Annotated[HTTPAuthorizationCredentials, Depends(security)],
-):
+async def authenticate(token: str) -> User:
+    """The user of ``token`` once the auth service (or the token cache) accepts it.
 
+    Raises jwt.PyJWTError for a malformed token and HTTPException(401) for one
+    the auth service rejects.
+    """
+    started = time.perf_counter()
+    result_status = "error"
     try:
-        token = credentials.credentials
-        if not token:
-            return JSONResponse(
-                content={"msg": "Authentication failed"}, status_code=401
-            )
         payload = jwt.decode(token, options={"verify_signature": False})
         user_id = payload.get("id")
         email = payload.get("email")
         role = payload.get("role")
+        expires_at = payload.get("exp")
 
         if not user_id:
+            result_status = "invalid"
             raise HTTPException(status_code=401, detail="Invalid token - missing user ID")
+
+        # Only accepted tokens are cached, keyed by their hash; a revoked token stays valid up to AUTH_CACHE_TTL
+        token_key = hashlib.sha256(token.encode()).hexdigest()
+        if AUTH_CACHE_TTL > 0 and await cache.aget("auth", token_key) is not None:
+            result_status = "cached"
+            return User(user_id=user_id, email=email, role=role)
+
         url = os.getenv("AUTH_SERVICE_URL")
         headers = {"accept": "*/*", "Content-Type": "application/json"}
         payload = {"token": token}
 
-        response = requests.post(url, json=payload, headers=headers)
+        response = await asyncio.to_thread(requests.post, url, json=payload, headers=headers)
         result = response.json()
-        
+
         if not result.get("data").get("valid"):
+            result_status = "invalid"
             raise HTTPException(status_code=401, detail="Invalid token")
-        
+
+        ttl = AUTH_CACHE_TTL
+        if isinstance(expires_at, (int, float)):
+            ttl = min(ttl, expires_at - time.time())
+        if ttl > 0:
+            await cache.aset("auth", token_key, True, ttl=ttl)
+
+        result_status = "ok"
         return User(user_id=user_id, email=email, role=role)
-    
     except jwt.PyJWTError:
-        return JSONResponse(content={"msg": "Authentication failed"}, status_code=401)
\ No newline at end of file
+        result_status = "invalid"
+        raise
+    finally:
+        auth_duration.observe(time.perf_counter() - started, status=result_status)
+
+
+async def get_current_user(
+    request: Request,
+    credentials: Annotated[HTTPAuthorizationCredentials, Depends(security)],
+):
+    token = credentials.credentials
+    if not token:
+        auth_duration.observe(0.0, status="invalid")
+        return JSONResponse(
+            content={"msg": "Authentication failed"}, status_code=401
+        )
+    # Already validated for this request by the admission middleware
+    authenticated = getattr(request.state, "authenticated", None)
+    if authenticated is not None and authenticated[0] == token:
+        return authenticated[1]
+    try:
+        return await authenticate(token)
+    except jwt.PyJWTError:
+        return JSONResponse(content={"msg": "Authentication failed"}, status_code=401)
+
+
+async def require_admin(user: Annotated[User, Depends(get_current_user)]) -> User:
+    if not isinstance(user, User):
+        raise HTTPException(status_code=401, detail="Authentication failed")
+    if user.role not in ADMIN_ROLES:
+        raise HTTPException(status_code=403, detail="Admin role required")
+    return user
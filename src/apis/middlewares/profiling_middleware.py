@@ -0,0 +1,47 @@
+import asyncio
+import hmac
+from src.monitoring.profiler import PROFILING_ENABLED, PROFILING_TOKEN, request_profiler
+
+
+class ProfilingMiddleware:
+    """Profile single requests with cProfile when they carry ``X-Profile: cprofile``.
+
+    The request must also send ``X-Profile-Token`` equal to PROFILING_TOKEN. The
+    response gets ``X-Profile-Id``; the report is served at
+    /monitoring/profiles/{profile_id}. Streaming bodies are profiled until the
+    last chunk is sent.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    def _requested(self, scope) -> bool:
+        if scope["type"] != "http" or not PROFILING_ENABLED or not PROFILING_TOKEN:
+            return False
+        headers = dict(scope["headers"])
+        if headers.get(b"x-profile", b"").lower() != b"cprofile":
+            return False
+        return hmac.compare_digest(headers.get(b"x-profile-token", b""), PROFILING_TOKEN.encode())
+
+    async def __call__(self, scope, receive, send):
+        if not self._requested(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profiler = request_profiler.start()
+        profile_id = request_profiler.new_id() if profiler is not None else None
+
+        async def send_with_profile_id(message):
+            if message["type"] == "http.response.start":
+                header = (b"x-profile-id", profile_id.encode()) if profile_id else (b"x-profile-status", b"busy")
+                message = {**message, "headers": [*message.get("headers", []), header]}
+            await send(message)
+
+        if profiler is None:
+            await self.app(scope, receive, send_with_profile_id)
+            return
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            request_profiler.stop(profiler)
+            await asyncio.to_thread(request_profiler.save, profiler, profile_id)
@@ -0,0 +1,140 @@
+import asyncio
+from dataclasses import asdict
+from typing import Annotated, Literal
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+from src.monitoring.metrics import metrics
+from src.monitoring.tracing import trace_store
+from src.monitoring.profiler import (
+    PROFILING_ENABLED, PROFILING_MAX_SECONDS, ProfilerBusy, sampling_profiler, request_profiler
+)
+from src.apis.middlewares.admission import admission
+from src.apis.middlewares.auth_middleware import get_current_user, require_admin, User
+from src.monitoring.latency import ttft_tracker
+from src.agents.response_cache import response_cache
+from src.config.cache import cache
+from src.agents.prefetch import prefetch_stats
+from src.apis.routers.multi_agent_router import record_pool_stats, get_retention
+
+router = APIRouter(prefix="/monitoring", tags=["Monitoring"])
+# Served at /metrics, where Prometheus scrapes by default
+metrics_router = APIRouter(tags=["Monitoring"])
+
+
+@router.get("/ttft")
+async def time_to_first_token():
+    """p50/p99 time to first streamed token for regular turns, turns following a background summary and cache hits."""
+    return ttft_tracker.summary()
+
+
+@router.get("/response-cache")
+async def response_cache_stats():
+    """Hit rate of the RAG / generic response cache and the generation time it saved."""
+    return response_cache.stats()
+
+
+@router.get("/cache")
+async def cache_stats():
+    """Lookups of the cache backend behind the token, embedding and response caches, as seen by this worker."""
+    return cache.stats()
+
+
+@router.get("/speculative-rag")
+async def speculative_rag_stats():
+    """How many speculative knowledge base searches were used, discarded or failed."""
+    return prefetch_stats.summary()
+
+
+@router.get("/admission")
+async def admission_stats():
+    """Chat turns running and queued for admission, and how many were admitted or rejected with 429."""
+    return admission.stats()
+
+
+@router.get("/traces/{conversation_id}")
+async def conversation_traces(
+    user: Annotated[User, Depends(get_current_user)],
+    conversation_id: str,
+    limit: int = Query(20, ge=1, le=100),
+):
+    """Timelines of the caller's debug turns in a conversation (sent with debug=true), newest first."""
+    traces = await asyncio.to_thread(trace_store.list, conversation_id, str(user.user_id), limit)
+    return {"conversation_id": conversation_id, "traces": traces}
+
+
+def _check_profiling():
+    if not PROFILING_ENABLED:
+        raise HTTPException(status_code=404, detail="Profiling is disabled")
+
+
+@router.post("/profile", response_class=PlainTextResponse)
+async def sample_profile(
+    admin: Annotated[User, Depends(require_admin)],
+    seconds: float = Query(10, gt=0),
+    interval_ms: float = Query(10, ge=1, le=1000),
+    include_idle: bool = Query(False),
+):
+    """Sample every thread of this worker for ``seconds`` and return collapsed stacks for a flamegraph.
+
+    The sampler runs in a worker thread, so the event loop keeps serving requests meanwhile.
+    """
+    _check_profiling()
+    seconds = min(seconds, PROFILING_MAX_SECONDS)
+    try:
+        counts = await asyncio.to_thread(sampling_profiler.sample, seconds, interval_ms / 1000, include_idle)
+    except ProfilerBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return PlainTextResponse(
+        sampling_profiler.collapsed(counts),
+        headers={"Content-Disposition": 'attachment; filename="profile.collapsed"'},
+    )
+
+
+@router.get("/profiles/{profile_id}", response_class=PlainTextResponse)
+async def request_profile(
+    admin: Annotated[User, Depends(require_admin)],
+    profile_id: str,
+    sort: Literal["cumulative", "tottime", "calls"] = Query("cumulative"),
+    limit: int = Query(50, ge=1, le=500),
+):
+    """pstats report of a request profiled with the X-Profile header."""
+    _check_profiling()
+    try:
+        return await asyncio.to_thread(request_profiler.report, profile_id, sort, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Profile not found")
+
+
+@router.get("/checkpoints")
+async def checkpoint_storage(
+    admin: Annotated[User, Depends(require_admin)],
+    thread_id: str = Query(None),
+    limit: int = Query(50, ge=1, le=500),
+    offset: int = Query(0, ge=0),
+):
+    """Checkpoint rows and bytes per conversation thread, largest first, with the retention policy."""
+    retention = await get_retention()
+    report = await retention.storage_report(thread_id=thread_id, limit=limit, offset=offset)
+    report["last_prune"] = asdict(retention.last_result) if retention.last_result else None
+    return report
+
+
+@router.post("/checkpoints/prune")
+async def prune_checkpoints(
+    admin: Annotated[User, Depends(require_admin)],
+    max_batches: int = Query(None, ge=1),
+):
+    """Run a retention pass now instead of waiting for the background job."""
+    retention = await get_retention()
+    return asdict(await retention.prune(max_batches=max_batches))
+
+
+@metrics_router.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Histograms and counters in the Prometheus text format; 404 unless METRICS_ENABLED."""
+    if not metrics.enabled:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    record_pool_stats()
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
@@ -1,8 +1,25 @@
-from fastapi import APIRouter, status, Depends, Form
+from fastapi import APIRouter, status, Depends, Form, HTTPException, Query, Request, Response
 from fastapi.responses import JSONResponse, StreamingResponse
+import asyncio
 import json
-from langchain_core.messages import HumanMessage
+import time
+from contextlib import aclosing
+from langchain_core.messages import AIMessage, HumanMessage
+from loguru import logger
 from src.agents.graph import create_graph
+from src.agents.summarization import schedule_summary, recently_summarized
+from src.monitoring.latency import ttft_tracker
+from src.monitoring.metrics import metrics, turn_duration, tool_calls_per_turn, pool_wait, pool_connections
+from src.monitoring.instrumentation import TurnMetricsHandler
+from src.monitoring.tracing import TRACING_ENABLED, TurnTrace, TracedCheckpointer, trace_store
+from src.config.llm_gateway import current_user
+from src.utils.token_counter import count_message_tokens
+from src.utils.keyed_locks import thread_locks
+from src.utils.disconnect import cancel_on_disconnect
+from src.checkpoints.retention import create_retention
+from src.checkpoints.serializer import checkpoint_serde
+from src.checkpoints.history import HistoryReader, etag_matches, message_payload, page_messages
+from src.checkpoints.threads import list_threads, record_turn_in_background
 from src.apis.middlewares.auth_middleware import get_current_user, User
 from typing import Annotated
 from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
@@ -23,10 +40,37 @@ connection_kwargs = {
 
 _pool = None
 
+
+class InstrumentedConnectionPool(AsyncConnectionPool):
+    """Records how long each checkout waits for a free connection."""
+
+    async def getconn(self, timeout=None):
+        if not metrics.enabled:
+            return await super().getconn(timeout)
+        started = time.perf_counter()
+        try:
+            return await super().getconn(timeout)
+        finally:
+            pool_wait.observe(time.perf_counter() - started)
+
+
+def record_pool_stats():
+    """Set the pool gauges; called when /metrics is scraped."""
+    if _pool is None:
+        return
+    stats = _pool.get_stats()
+    size = stats.get("pool_size", 0)
+    available = stats.get("pool_available", 0)
+    pool_connections.set(size, state="open")
+    pool_connections.set(size - available, state="in_use")
+    pool_connections.set(available, state="idle")
+    pool_connections.set(stats.get("requests_waiting", 0), state="waiting")
+
+
 async def get_pool():
     global _pool
     if _pool is None:
-        _pool = AsyncConnectionPool(
+        _pool = InstrumentedConnectionPool(
             os.getenv("DB_URI"),
             min_size=5, max_size=20,
             kwargs=connection_kwargs,
@@ -35,33 +79,152 @@ async def get_pool():
         await _pool.open()
     return _pool
 
+_retention = None
+
+async def get_retention():
+    global _retention
+    if _retention is None:
+        _retention = create_retention(await get_pool())
+    return _retention
+
 graph = create_graph()
 
-async def message_generator(input_graph: dict, config: dict):
+AGENT_NODES = ("rag_agent", "schedule_agent", "generic_agent", "analytic_agent", "supervisor")
+# Recorded instead of an answer when the client left before any text was streamed
+INTERRUPTED_NOTE = "(Câu trả lời bị gián đoạn vì người dùng đã rời cuộc trò chuyện.)"
+# The node an interrupted turn is recorded as; its only successor is END
+PARTIAL_TURN_NODE = "merge" if "merge" in graph.nodes else "supervisor"
+
+
+def merge_order(routes: list, buffers: dict) -> list:
+    """Agents in the same order as turn_answer, whichever branch streams first."""
+    return [route for route in routes if route in buffers] + [name for name in buffers if name not in routes]
+
+
+async def record_partial_turn(compiled_graph, config: dict, routes: list, buffers: dict):
+    """Close a turn cut short by a disconnect with the text the client had received.
+
+    Written as if ``PARTIAL_TURN_NODE`` had run, so the checkpoint has no pending
+    tasks and the next turn starts from a complete user/assistant exchange.
+    """
+    messages = [
+        AIMessage(content=buffers[name], name=name, response_metadata={"interrupted": True})
+        for name in merge_order(routes, buffers)
+        if buffers[name]
+    ]
+    if not messages:
+        messages = [AIMessage(content=INTERRUPTED_NOTE, response_metadata={"interrupted": True})]
+    try:
+        await compiled_graph.aupdate_state(
+            config,
+            {
+                "messages": messages,
+                # Counted toward CONTEXT_TOKEN_BUDGET like the answers of a complete turn
+                "context_tokens": sum(count_message_tokens(message) for message in messages),
+            },
+            as_node=PARTIAL_TURN_NODE,
+        )
+    except Exception as e:
+        logger.error(f"Recording the interrupted turn of thread {config['configurable']['thread_id']} failed: {e}")
+
+async def message_generator(input_graph: dict, config: dict, started_at: float, trace: TurnTrace = None):
     pool = await get_pool()
-    checkpointer = AsyncPostgresSaver(pool)
+    checkpointer = AsyncPostgresSaver(pool, serde=checkpoint_serde)
     # await checkpointer.setup()
+    if trace is not None:
+        checkpointer = TracedCheckpointer(checkpointer, trace)
     
     multi_agent_graph = graph.compile(checkpointer=checkpointer)
 
+    # Turns right after a background summary are the ones that used to run summarize_node inline
+    thread_id = config["configurable"]["thread_id"]
+    turn_type = "post_summary" if thread_id in recently_summarized else "regular"
+    recently_summarized.discard(thread_id)
+
+    # Per-user LLM concurrency limit for every call made on behalf of this turn
+    current_user.set(str(config["configurable"]["user_id"]))
+
+    run_config = config
+    turn_metrics = None
+    if metrics.enabled:
+        turn_metrics = TurnMetricsHandler()
+        run_config = {**config, "callbacks": [turn_metrics]}
+    turn_status = "error"
+
+    # One buffer per agent branch: fanned-out agents stream concurrently
+    buffers = {}
+    routes = []
     stream_text = ""
-    async for event in multi_agent_graph.astream_events(
-        input=input_graph,
-        config=config,
-        version="v2",
-    ):
-        if event["event"] == "on_chat_model_stream" and event["metadata"]["langgraph_node"] == "agent":
-            chunk_content = event["data"]["chunk"].content
-            stream_text += chunk_content
-
-            yield json.dumps(
-                {
-                    "type": "message",
-                    "content": stream_text,
-                },
-                ensure_ascii=False,
-            ) + "\n\n"
-    
+    # TTFT is the first visible text of the turn; tool-call chunks carry none
+    ttft_recorded = False
+    try:
+        async with thread_locks.hold(thread_id):
+            try:
+                # Closing the stream cancels the graph run behind it, node tasks and LLM calls included
+                async with aclosing(multi_agent_graph.astream_events(
+                    input=input_graph,
+                    config=run_config,
+                    version="v2",
+                )) as events:
+                    async for event in events:
+                        if trace is not None:
+                            trace.observe(event)
+                            for item in trace.drain():
+                                yield json.dumps(item, ensure_ascii=False) + "\n\n"
+
+                        agent = event["metadata"].get("langgraph_checkpoint_ns", "").split(":")[0]
+                        if event["event"] == "on_chain_end" and event["name"] == "router" and event["metadata"].get("langgraph_node") == "router":
+                            routes = event["data"]["output"].get("routes", [])
+                            continue
+                        if event["event"] == "on_chat_model_stream" and event["metadata"]["langgraph_node"] == "agent":
+                            content = event["data"]["chunk"].content
+                            if content and not ttft_recorded:
+                                ttft_tracker.record(turn_type, time.perf_counter() - started_at)
+                                ttft_recorded = True
+                            buffers[agent] = buffers.get(agent, "") + content
+                        elif (
+                            event["event"] == "on_chain_end"
+                            and event["name"] in AGENT_NODES
+                            and event["metadata"].get("langgraph_node") == event["name"]
+                            and not buffers.get(event["name"])
+                        ):
+                            # Answers served from the response cache produce no model tokens
+                            answer = event["data"]["output"].get("messages") or []
+                            buffers[event["name"]] = answer[-1].content if answer else ""
+                            if buffers[event["name"]] and not ttft_recorded:
+                                ttft_tracker.record("cache_hit", time.perf_counter() - started_at)
+                                ttft_recorded = True
+                        else:
+                            continue
+
+                        stream_text = "\n\n".join(buffers[name] for name in merge_order(routes, buffers) if buffers[name])
+
+                        yield json.dumps(
+                            {
+                                "type": "message",
+                                "content": stream_text,
+                            },
+                            ensure_ascii=False,
+                        ) + "\n\n"
+            except asyncio.CancelledError:
+                # The client went away: close the turn with what it had received
+                turn_status = "cancelled"
+                await record_partial_turn(multi_agent_graph, config, routes, buffers)
+                if trace is not None:
+                    trace.finish(turn_status)
+                    await asyncio.to_thread(trace_store.save, thread_id, str(config["configurable"]["user_id"]), trace.events)
+                raise
+        turn_status = "ok"
+    finally:
+        if turn_metrics is not None:
+            turn_duration.observe(time.perf_counter() - started_at, status=turn_status)
+            tool_calls_per_turn.observe(turn_metrics.tool_calls)
+
+    if trace is not None:
+        trace.finish(turn_status)
+        for item in trace.drain():
+            yield json.dumps(item, ensure_ascii=False) + "\n\n"
+
     yield json.dumps(
         {
             "type": "final_message",
@@ -70,8 +233,22 @@ async def message_generator(input_graph: dict, config: dict):
         ensure_ascii=False,
     )
 
+    if trace is not None:
+        await asyncio.to_thread(trace_store.save, thread_id, str(config["configurable"]["user_id"]), trace.events)
+
+    # Summarise after the response is out, so the user never waits for it
+    schedule_summary(multi_agent_graph, config)
+
 @router.post("/stream/{conversation_id}")
-async def multi_agent_stream(user: user_dependency, conversation_id: str, query: str = Form(...)):
+async def multi_agent_stream(
+    request: Request, user: user_dependency, conversation_id: str, query: str = Form(...), debug: bool = Form(False)
+):
+    """Stream the answer; with ``debug`` (and TRACING_ENABLED) timing events of type "trace"
+    are interleaved with the messages and the turn's trace is saved for /monitoring/traces.
+
+    If the client disconnects, the graph run is cancelled and the partial turn recorded.
+    """
+    started_at = time.perf_counter()
     try:
         config = {
             "configurable": {
@@ -82,18 +259,24 @@ async def multi_agent_stream(user: user_dependency, conversation_id: str, query:
             }
         }
 
+        record_turn_in_background(conversation_id, user.user_id, query)
+
+        message = HumanMessage(content=query)
         input_graph = {
-            "messages": [HumanMessage(content=query)],
-            "route_decision": "",
-            "response": "",
-            "summary": "",
-            "user_id": str(user.user_id)
+            "messages": [message],
+            "user_id": str(user.user_id),
+            "context_tokens": count_message_tokens(message)
         }
 
         return StreamingResponse(
-            message_generator(
-                input_graph=input_graph,
-                config=config,
+            cancel_on_disconnect(
+                request,
+                message_generator(
+                    input_graph=input_graph,
+                    config=config,
+                    started_at=started_at,
+                    trace=TurnTrace(started_at) if debug and TRACING_ENABLED else None,
+                ),
             ),
             media_type="text/event-stream",
         )
@@ -101,4 +284,53 @@ async def multi_agent_stream(user: user_dependency, conversation_id: str, query:
         return JSONResponse(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             content={"error": f"Streaming error: {str(e)}"},
-        )
\ No newline at end of file
+        )
+
+
+@router.get("/conversations")
+async def list_conversations(
+    user: user_dependency,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: str = Query(None),
+):
+    """The user's conversations, most recently active first; pass ``next_cursor`` back for the next page."""
+    try:
+        return await asyncio.to_thread(list_threads, user.user_id, limit, cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+@router.get("/conversations/{conversation_id}/messages")
+async def conversation_messages(
+    request: Request,
+    user: user_dependency,
+    conversation_id: str,
+    limit: int = Query(50, ge=1, le=200),
+    before: str = Query(None),
+):
+    """A page of the conversation read from its latest checkpoint, newest page first, with the summary.
+
+    The ETag is the checkpoint id: a request whose ``If-None-Match`` lists it
+    (weak or strong) or is ``*`` gets 304 without loading any message.
+    """
+    reader = HistoryReader(await get_pool(), checkpoint_serde)
+    latest = await reader.latest(conversation_id)
+    if latest is None or latest.user_id != str(user.user_id):
+        raise HTTPException(status_code=404, detail="Conversation not found")
+
+    etag = f'"{latest.checkpoint_id}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    history = await reader.load(latest)
+    page, next_cursor = page_messages(history.messages, before, limit)
+    return JSONResponse(
+        content={
+            "conversation_id": conversation_id,
+            "summary": history.summary,
+            "messages": [message_payload(message) for message in page],
+            "next_cursor": next_cursor,
+        },
+        headers=headers,
+    )
@@ -1,121 +1,159 @@
-from src.config.vector_store import vector_store_crud
-from typing import List
-from fastapi import APIRouter, Query, UploadFile, File
+from src.config.vector_store import vector_store_crud, document_manifest, ingestion_jobs
+from src.retrieval import content_hash
+from typing import List, Optional
+from fastapi import APIRouter, Query, UploadFile, File, HTTPException, status
 from pydantic import Field, BaseModel
-from langchain_community.document_loaders import PyMuPDFLoader
-from langchain_community.document_loaders import UnstructuredWordDocumentLoader
-from langchain_community.document_loaders import TextLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
+from uuid import uuid4
+import asyncio
 import os
 import tempfile
 import shutil
-from uuid import uuid4
 
 router = APIRouter(prefix="/vector-store", tags=["Vector Store"])
 
 
 @router.get("/get-documents")
-async def get_documents():
-    documents = await vector_store_crud.get_documents()
+async def get_documents(offset: int = Query(0, ge=0), limit: int = Query(100, ge=1, le=1000)):
+    _, chunks = document_manifest.list_chunks(offset=offset, limit=limit)
+    documents = await vector_store_crud.get_documents_by_ids([chunk["chunk_id"] for chunk in chunks])
     return [doc.__dict__ for doc in documents]
 
 
+@router.get("/files")
+async def list_files(offset: int = Query(0, ge=0), limit: int = Query(50, ge=1, le=500)):
+    total, files = document_manifest.list_files(offset=offset, limit=limit)
+    return {"total": total, "offset": offset, "limit": limit, "items": files}
+
+
+@router.get("/files/{filename}/chunks")
+async def list_file_chunks(
+    filename: str,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    include_content: bool = False,
+):
+    total, chunks = document_manifest.list_chunks(filename=filename, offset=offset, limit=limit)
+    if include_content:
+        documents = await vector_store_crud.get_documents_by_ids([chunk["chunk_id"] for chunk in chunks])
+        contents = {doc.id: doc.page_content for doc in documents}
+        for chunk in chunks:
+            chunk["content"] = contents.get(chunk["chunk_id"])
+    return {"total": total, "offset": offset, "limit": limit, "items": chunks}
+
+
 @router.get("/search")
-async def search(query: str):
-    documents = await vector_store_crud.search(query)
+async def search(query: str, mode: Optional[str] = Query(None, description="dense | hybrid")):
+    try:
+        documents = await vector_store_crud.search(query, mode=mode)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     return [doc.__dict__ for doc in documents]
 
 
+@router.post("/rebuild-keyword-index")
+async def rebuild_keyword_index():
+    chunks_count = await vector_store_crud.rebuild_keyword_index()
+    return {"message": f"Keyword index rebuilt from {chunks_count} chunks"}
+
+
 class FileIngressResponse(BaseModel):
     file_path: str = Field(..., title="Path to the processed file")
-    chunks_count: int = Field(..., title="Number of chunks created")
-    success: bool = Field(..., title="Whether the ingestion was successful")
+    status: str = Field("queued", title="queued, parsing, embedding, done or failed")
+    chunks_count: int = Field(0, title="Number of chunks created")
+    chunks_embedded: int = Field(0, title="Number of new chunks embedded so far")
+    added: int = Field(0, title="Number of new or changed chunks embedded and upserted")
+    unchanged: int = Field(0, title="Number of chunks already indexed with the same content")
+    removed: int = Field(0, title="Number of stale chunks deleted")
+    success: bool = Field(False, title="Whether the ingestion was successful")
     message: str = Field(
         "File processed and indexed successfully", title="Status message"
     )
 
 
-@router.post("/add-documents", response_model=List[FileIngressResponse])
+class IngestionJobResponse(BaseModel):
+    job_id: str = Field(..., title="Ingestion job id")
+    status: str = Field(..., title="queued, running, done or failed")
+    created_at: str = Field(..., title="Job creation time (UTC, ISO 8601)")
+    finished_at: Optional[str] = Field(None, title="Job completion time (UTC, ISO 8601)")
+    files: List[FileIngressResponse] = Field(..., title="Per-file progress")
+
+
+def _document_name(filename: Optional[str]) -> str:
+    """The name an upload is ingested under: its file name without any client-side directories."""
+    name = os.path.basename((filename or "").replace("\\", "/")).strip()
+    if name in ("", ".", ".."):
+        raise HTTPException(status_code=400, detail=f"Invalid file name: {filename!r}")
+    return name
+
+
+def _save_uploads(files: List[UploadFile], names: List[str], temp_dir: str) -> List[str]:
+    """Save each upload under a unique generated name; the document name only travels as metadata."""
+    paths = []
+    for file, name in zip(files, names):
+        path = os.path.join(temp_dir, f"{uuid4().hex}{os.path.splitext(name)[1].lower()}")
+        with open(path, "wb") as buffer:
+            shutil.copyfileobj(file.file, buffer)
+        paths.append(path)
+    return paths
+
+
+@router.post("/add-documents", response_model=IngestionJobResponse, status_code=status.HTTP_202_ACCEPTED)
 async def add_documents(
     files: List[UploadFile] = File(...),
 ):
-    responses = []
-    
-    for file in files:
-        try:
-            temp_dir = tempfile.mkdtemp()
-            temp_file_path = os.path.join(temp_dir, file.filename)
-
-            with open(temp_file_path, "wb") as buffer:
-                shutil.copyfileobj(file.file, buffer)
-
-            if file.filename.endswith(".pdf"):
-                loader = PyMuPDFLoader(temp_file_path)
-            elif file.filename.endswith(".docx"):
-                loader = UnstructuredWordDocumentLoader(temp_file_path)
-            elif file.filename.endswith(".txt"):
-                loader = TextLoader(temp_file_path)
-            else:
-                raise ValueError(f"Unsupported file format: {file.filename}")
-
-            docs = loader.load()
-            splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
-            chunks = splitter.split_documents(docs)
-
-            for chunk in chunks:
-                chunk.metadata.update({'source_file': file.filename})
-
-            ids = [str(uuid4()) for _ in chunks]
-            await vector_store_crud.add_documents(chunks, ids=ids)
-
-            shutil.rmtree(temp_dir)
-            chunks_count = len(chunks)
-
-            responses.append(
-                FileIngressResponse(
-                    file_path=file.filename,
-                    chunks_count=chunks_count,
-                    success=True,
-                    message=f"File processed and indexed successfully. Created {chunks_count} chunks.",
-                )
-            )
-
-        except Exception as e:
-            responses.append(
-                FileIngressResponse(
-                    file_path=file.filename if file else "unknown",
-                    chunks_count=0,
-                    success=False,
-                    message=f"Error processing file: {str(e)}",
-                )
-            )
-    
-    return responses
+    names = [_document_name(file.filename) for file in files]
+    if len(set(names)) < len(names):
+        raise HTTPException(status_code=400, detail="Each uploaded file needs a distinct name")
+
+    temp_dir = tempfile.mkdtemp()
+    try:
+        paths = await asyncio.to_thread(_save_uploads, files, names, temp_dir)
+    except Exception as e:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+        raise HTTPException(status_code=400, detail=f"Error saving uploaded files: {str(e)}")
+
+    job = ingestion_jobs.submit(list(zip(names, paths)), temp_dir)
+    return job.to_dict()
+
+
+@router.get("/jobs/{job_id}", response_model=IngestionJobResponse)
+async def get_job(job_id: str):
+    job = ingestion_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job.to_dict()
 
 
 @router.delete("/delete-documents")
 async def delete_documents(filenames: List[str] = Query(None)):
-    document_data = await vector_store_crud.get_documents()
-    
     if not filenames:
         # If no filenames provided, delete all documents
-        document_ids = [doc.id for doc in document_data]
-        await vector_store_crud.delete_documents(ids=document_ids)
-        return {"message": f"Deleted all {len(document_ids)} documents"}
-    
-    # Filter documents by source matching the provided filenames
-    docs_to_delete = []
-    for doc in document_data:
-        if "source" in doc.metadata and doc.metadata["source"] in filenames:
-            docs_to_delete.append(doc)
-    
-    if not docs_to_delete:
+        chunks_count, _ = document_manifest.list_chunks(limit=0)
+        await vector_store_crud.delete_all()
+        document_manifest.clear()
+        return {"message": f"Deleted all {chunks_count} documents"}
+
+    delete_ids = document_manifest.chunk_ids(filenames)
+    if not delete_ids:
         return {"message": "No matching documents found to delete"}
-    
-    # Extract IDs of documents to delete
-    delete_ids = [doc.id for doc in docs_to_delete]
-    
+
     await vector_store_crud.delete_documents(ids=delete_ids)
+    document_manifest.remove_chunks(delete_ids)
     return {
-        "message": f"Deleted {len(delete_ids)} chunks from files: {list(set([doc.metadata.get('source') for doc in docs_to_delete]))}"
-    }
\ No newline at end of file
+        "message": f"Deleted {len(delete_ids)} chunks from files: {filenames}"
+    }
+
+
+@router.post("/rebuild-manifest")
+async def rebuild_manifest():
+    """One-off scan of the vector store to register chunks ingested before the manifest existed."""
+    documents = await vector_store_crud.get_documents()
+    files = {}
+    for doc in documents:
+        filename = doc.metadata.get("source_file") or os.path.basename(doc.metadata.get("source", "unknown"))
+        files.setdefault(filename, []).append((doc.id, content_hash(doc.page_content)))
+
+    document_manifest.clear()
+    for filename, chunks in files.items():
+        document_manifest.add_chunks(filename, chunks)
+    return {"message": f"Manifest rebuilt with {len(documents)} chunks from {len(files)} files"}
@@ -0,0 +1,17 @@
+"""
+Cache package for the AI service.
+Contains the cache backends shared by the token, embedding and response caches:
+an in-process LRU and a Redis backend shared by every worker.
+"""
+
+from .base import CacheBackend
+from .memory import MemoryCache
+from .redis_cache import RedisCache
+from .embeddings import CachedEmbeddings
+
+__all__ = [
+    'CacheBackend',
+    'MemoryCache',
+    'RedisCache',
+    'CachedEmbeddings',
+]
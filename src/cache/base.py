@@ -0,0 +1,76 @@
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Optional
+from src.monitoring.metrics import cache_requests
+
+
+class CacheBackend(ABC):
+    """Key/value cache shared by the caches of the service (tokens, embeddings, responses).
+
+    Entries live in namespaces. ``invalidate(namespace)`` drops every entry of
+    a namespace at once by bumping the namespace version, which is part of
+    every key; ``version(namespace)`` lets in-process data derived from the
+    namespace check that it is still current.
+
+    Values must be msgpack-serialisable (dicts, lists, strings, numbers,
+    bytes) and must not be mutated after ``set`` or ``get``. The methods never
+    raise on a backend failure: a broken cache is a miss. ``get``/``set``/...
+    may block on the network; code on the event loop uses the ``a``-prefixed
+    variants, which backends doing I/O run in a worker thread.
+    """
+
+    # Backend label for stats and metrics
+    name = ""
+    # True when other workers see the same entries
+    shared = False
+
+    def __init__(self):
+        self._stats = {"hit": 0, "miss": 0, "error": 0, "skipped": 0}
+        self._stats_lock = threading.Lock()
+
+    def _record(self, namespace: str, result: str):
+        """Count a lookup (hit / miss), a failed backend call (error) or a call skipped while the backend is down."""
+        with self._stats_lock:
+            self._stats[result] += 1
+        cache_requests.inc(backend=self.name, namespace=namespace, result=result)
+
+    @abstractmethod
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        """The value stored under ``key``, or None if missing or expired."""
+
+    @abstractmethod
+    def set(self, namespace: str, key: str, value: Any, ttl: Optional[float] = None):
+        """Store ``value``; ``ttl`` in seconds (None: until evicted or invalidated)."""
+
+    @abstractmethod
+    def delete(self, namespace: str, key: str):
+        """Drop one entry."""
+
+    @abstractmethod
+    def version(self, namespace: str) -> int:
+        """Current version of the namespace."""
+
+    @abstractmethod
+    def invalidate(self, namespace: str) -> int:
+        """Drop every entry of the namespace, in every worker; returns the new version."""
+
+    async def aget(self, namespace: str, key: str) -> Optional[Any]:
+        return self.get(namespace, key)
+
+    async def aset(self, namespace: str, key: str, value: Any, ttl: Optional[float] = None):
+        self.set(namespace, key, value, ttl)
+
+    async def ainvalidate(self, namespace: str) -> int:
+        return self.invalidate(namespace)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self._stats["hit"] + self._stats["miss"]
+        return {
+            "backend": self.name,
+            "shared": self.shared,
+            "hits": self._stats["hit"],
+            "misses": self._stats["miss"],
+            "errors": self._stats["error"],
+            "skipped": self._stats["skipped"],
+            "hit_rate": round(self._stats["hit"] / lookups, 4) if lookups else 0.0,
+        }
@@ -0,0 +1,61 @@
+import hashlib
+from typing import List, Optional
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from src.cache.base import CacheBackend
+
+NAMESPACE = "embeddings"
+
+
+class CachedEmbeddings(Embeddings):
+    """Caches query embeddings (the same question asked again, in any worker).
+
+    Document embeddings go straight to the model: ingestion batches rarely
+    repeat and would only push queries out of the cache. Vectors are stored as
+    raw float64 bytes, so a hit returns exactly what the model returned.
+    """
+
+    def __init__(self, inner: Embeddings, cache: CacheBackend, model: str, ttl_seconds: float = 86400):
+        self.inner = inner
+        self.cache = cache
+        self.model = model
+        self.ttl_seconds = ttl_seconds
+
+    def _key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model}\0{text}".encode()).hexdigest()
+
+    @staticmethod
+    def _decode(data: Optional[bytes]) -> Optional[List[float]]:
+        return np.frombuffer(data, dtype=np.float64).tolist() if data is not None else None
+
+    @staticmethod
+    def _encode(vector: List[float]) -> bytes:
+        return np.asarray(vector, dtype=np.float64).tobytes()
+
+    def _get(self, key: str) -> Optional[List[float]]:
+        return self._decode(self.cache.get(NAMESPACE, key))
+
+    def _set(self, key: str, vector: List[float]):
+        self.cache.set(NAMESPACE, key, self._encode(vector), ttl=self.ttl_seconds)
+
+    def embed_query(self, text: str) -> List[float]:
+        key = self._key(text)
+        vector = self._get(key)
+        if vector is None:
+            vector = self.inner.embed_query(text)
+            self._set(key, vector)
+        return vector
+
+    async def aembed_query(self, text: str) -> List[float]:
+        key = self._key(text)
+        vector = self._decode(await self.cache.aget(NAMESPACE, key))
+        if vector is None:
+            vector = await self.inner.aembed_query(text)
+            await self.cache.aset(NAMESPACE, key, self._encode(vector), ttl=self.ttl_seconds)
+        return vector
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.inner.embed_documents(texts)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return await self.inner.aembed_documents(texts)
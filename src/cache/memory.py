@@ -0,0 +1,61 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+from src.cache.base import CacheBackend
+
+
+class MemoryCache(CacheBackend):
+    """In-process LRU cache with per-entry TTL; each worker has its own copy."""
+
+    name = "memory"
+
+    def __init__(self, max_entries: int = 10000):
+        super().__init__()
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        # (namespace, version, key) -> (expires_at or None, value)
+        self._entries: "OrderedDict[Tuple[str, int, str], Tuple[Optional[float], Any]]" = OrderedDict()
+        self._versions: Dict[str, int] = {}
+
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        with self._lock:
+            full_key = (namespace, self._versions.get(namespace, 0), key)
+            item = self._entries.get(full_key)
+            if item is not None and item[0] is not None and item[0] <= time.monotonic():
+                del self._entries[full_key]
+                item = None
+            if item is not None:
+                self._entries.move_to_end(full_key)
+        self._record(namespace, "hit" if item is not None else "miss")
+        return item[1] if item is not None else None
+
+    def set(self, namespace: str, key: str, value: Any, ttl: Optional[float] = None):
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            full_key = (namespace, self._versions.get(namespace, 0), key)
+            self._entries[full_key] = (expires_at, value)
+            self._entries.move_to_end(full_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, namespace: str, key: str):
+        with self._lock:
+            self._entries.pop((namespace, self._versions.get(namespace, 0), key), None)
+
+    def version(self, namespace: str) -> int:
+        return self._versions.get(namespace, 0)
+
+    def invalidate(self, namespace: str) -> int:
+        with self._lock:
+            version = self._versions.get(namespace, 0) + 1
+            self._versions[namespace] = version
+            # Entries of older versions can no longer be read; free them now
+            for full_key in [full_key for full_key in self._entries if full_key[0] == namespace]:
+                del self._entries[full_key]
+        return version
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = len(self._entries)
+        return {**super().stats(), "entries": entries, "max_entries": self.max_entries}
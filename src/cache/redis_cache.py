@@ -0,0 +1,177 @@
+import asyncio
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+import ormsgpack
+from loguru import logger
+from src.cache.base import CacheBackend
+
+try:
+    import redis
+except ImportError:  # only needed for CACHE_BACKEND=redis
+    redis = None
+
+_PACK_OPTIONS = ormsgpack.OPT_SERIALIZE_NUMPY | ormsgpack.OPT_NON_STR_KEYS
+
+
+class RedisCache(CacheBackend):
+    """Cache on a Redis-compatible server (Redis, Valkey, KeyDB), shared by every worker.
+
+    Keys are ``<prefix>:<namespace>:<version>:<key>`` and the namespace version
+    is the counter ``<prefix>:<namespace>:version``, so ``invalidate`` is one
+    INCR and old entries simply age out. Each worker reads a namespace version
+    at most every ``version_check_seconds``; another worker's invalidation is
+    seen within that time, and a hit costs a single GET.
+
+    A failing server turns lookups into misses and writes into no-ops. After
+    ``failure_threshold`` failures in a row the circuit opens: for
+    ``open_seconds`` no call reaches the server (counted as skipped), then one
+    call tries it again. The async variants run the client in a worker thread
+    and return at once while the circuit is open.
+    """
+
+    name = "redis"
+    shared = True
+
+    def __init__(
+        self,
+        url: str,
+        prefix: str = "ai-service",
+        version_check_seconds: float = 1.0,
+        socket_timeout: float = 0.25,
+        failure_threshold: int = 3,
+        open_seconds: float = 5.0,
+    ):
+        if redis is None:
+            raise RuntimeError("CACHE_BACKEND=redis needs the redis package (pip install redis)")
+        super().__init__()
+        self.client = redis.Redis.from_url(url, socket_timeout=socket_timeout, socket_connect_timeout=socket_timeout)
+        self.prefix = prefix
+        self.version_check_seconds = version_check_seconds
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self._lock = threading.Lock()
+        # namespace -> (version, monotonic time it was read)
+        self._versions: Dict[str, Tuple[int, float]] = {}
+        self._failures = 0
+        self._open_until = 0.0
+
+    def _circuit_open(self) -> bool:
+        return time.monotonic() < self._open_until
+
+    def _skip(self, namespace: str) -> bool:
+        """True (and counted) when the circuit is open and the call must not reach the server."""
+        if not self._circuit_open():
+            return False
+        self._record(namespace, "skipped")
+        return True
+
+    def _success(self):
+        if self._failures:
+            with self._lock:
+                if self._failures >= self.failure_threshold:
+                    logger.info("Redis cache reachable again, circuit closed")
+                self._failures = 0
+
+    def _error(self, namespace: str, action: str, error: Exception):
+        self._record(namespace, "error")
+        with self._lock:
+            self._failures += 1
+            if self._failures < self.failure_threshold:
+                return
+            opening = not self._circuit_open()
+            self._open_until = time.monotonic() + self.open_seconds
+        if opening:
+            logger.warning(f"Redis cache {action} in {namespace!r} failed ({error}); skipping Redis for {self.open_seconds}s")
+
+    def _version_key(self, namespace: str) -> str:
+        return f"{self.prefix}:{namespace}:version"
+
+    def _key(self, namespace: str, key: str) -> str:
+        return f"{self.prefix}:{namespace}:{self.version(namespace)}:{key}"
+
+    def version(self, namespace: str) -> int:
+        with self._lock:
+            cached = self._versions.get(namespace)
+        if cached is not None and (time.monotonic() - cached[1] < self.version_check_seconds or self._circuit_open()):
+            return cached[0]
+        if self._skip(namespace):
+            return 0
+        try:
+            version = int(self.client.get(self._version_key(namespace)) or 0)
+        except redis.RedisError as e:
+            self._error(namespace, "version read", e)
+            # Keep the last known version (0 if none) until the server is back
+            return cached[0] if cached is not None else 0
+        self._success()
+        with self._lock:
+            self._versions[namespace] = (version, time.monotonic())
+        return version
+
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        if self._skip(namespace):
+            return None
+        try:
+            data = self.client.get(self._key(namespace, key))
+        except redis.RedisError as e:
+            self._error(namespace, "get", e)
+            return None
+        self._success()
+        self._record(namespace, "hit" if data is not None else "miss")
+        return ormsgpack.unpackb(data) if data is not None else None
+
+    def set(self, namespace: str, key: str, value: Any, ttl: Optional[float] = None):
+        if self._skip(namespace):
+            return
+        try:
+            self.client.set(
+                self._key(namespace, key),
+                ormsgpack.packb(value, option=_PACK_OPTIONS),
+                px=max(1, int(ttl * 1000)) if ttl is not None else None,
+            )
+        except redis.RedisError as e:
+            self._error(namespace, "set", e)
+            return
+        self._success()
+
+    def delete(self, namespace: str, key: str):
+        if self._skip(namespace):
+            return
+        try:
+            self.client.delete(self._key(namespace, key))
+        except redis.RedisError as e:
+            self._error(namespace, "delete", e)
+            return
+        self._success()
+
+    def invalidate(self, namespace: str) -> int:
+        # Not skipped while the circuit is open: a lost invalidation would leave stale entries
+        try:
+            version = int(self.client.incr(self._version_key(namespace)))
+        except redis.RedisError as e:
+            self._error(namespace, "invalidate", e)
+            return self.version(namespace)
+        self._success()
+        with self._lock:
+            self._versions[namespace] = (version, time.monotonic())
+        return version
+
+    async def aget(self, namespace: str, key: str) -> Optional[Any]:
+        if self._skip(namespace):
+            return None
+        return await asyncio.to_thread(self.get, namespace, key)
+
+    async def aset(self, namespace: str, key: str, value: Any, ttl: Optional[float] = None):
+        if self._skip(namespace):
+            return
+        await asyncio.to_thread(self.set, namespace, key, value, ttl)
+
+    async def ainvalidate(self, namespace: str) -> int:
+        return await asyncio.to_thread(self.invalidate, namespace)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **super().stats(),
+            "version_check_seconds": self.version_check_seconds,
+            "circuit_open": self._circuit_open(),
+        }
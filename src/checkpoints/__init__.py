@@ -0,0 +1,20 @@
+"""
+Checkpoints package for the AI service.
+Contains the checkpoint serializer, conversation history reads and maintenance of the
+LangGraph Postgres checkpointer tables.
+"""
+
+from .retention import CheckpointRetention, PruneResult, create_retention
+from .serializer import CompactSerializer, checkpoint_serde
+from .history import HistoryReader, ConversationHistory, page_messages
+
+__all__ = [
+    'CheckpointRetention',
+    'PruneResult',
+    'create_retention',
+    'CompactSerializer',
+    'checkpoint_serde',
+    'HistoryReader',
+    'ConversationHistory',
+    'page_messages',
+]
@@ -0,0 +1,117 @@
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from langgraph.checkpoint.serde.base import SerializerProtocol
+from psycopg.rows import dict_row
+from psycopg_pool import AsyncConnectionPool
+from src.utils.token_counter import message_text
+
+# Latest root checkpoint of a thread: a backward scan of the primary key, no channel values
+LATEST_CHECKPOINT_SQL = """
+SELECT checkpoint_id,
+       metadata ->> 'user_id' AS user_id,
+       checkpoint -> 'channel_versions' ->> 'messages' AS messages_version,
+       checkpoint -> 'channel_versions' ->> 'summary' AS summary_version
+FROM checkpoints
+WHERE thread_id = %s AND checkpoint_ns = ''
+ORDER BY checkpoint_id DESC
+LIMIT 1
+"""
+
+# Only the two channels the history needs, by primary key
+CHANNEL_BLOBS_SQL = """
+SELECT channel, type, blob
+FROM checkpoint_blobs
+WHERE thread_id = %(thread_id)s
+  AND checkpoint_ns = ''
+  AND ((channel = 'messages' AND version = %(messages_version)s)
+       OR (channel = 'summary' AND version = %(summary_version)s))
+"""
+
+
+@dataclass
+class LatestCheckpoint:
+    thread_id: str
+    checkpoint_id: str
+    user_id: Optional[str]
+    messages_version: Optional[str]
+    summary_version: Optional[str]
+
+
+@dataclass
+class ConversationHistory:
+    checkpoint_id: str
+    summary: str
+    messages: List[BaseMessage]
+
+
+class HistoryReader:
+    """Reads a conversation from the checkpointer tables without compiling or running the graph.
+
+    Only the latest root checkpoint is looked at, and only its ``messages`` and
+    ``summary`` channels are loaded. Messages folded into the summary are no
+    longer in the checkpoint; the summary stands in for them.
+    """
+
+    def __init__(self, pool: AsyncConnectionPool, serde: SerializerProtocol):
+        self.pool = pool
+        self.serde = serde
+
+    async def latest(self, thread_id: str) -> Optional[LatestCheckpoint]:
+        async with self.pool.connection() as conn:
+            async with conn.cursor(row_factory=dict_row) as cur:
+                await cur.execute(LATEST_CHECKPOINT_SQL, (thread_id,))
+                row = await cur.fetchone()
+        return LatestCheckpoint(thread_id=thread_id, **row) if row else None
+
+    async def load(self, latest: LatestCheckpoint) -> ConversationHistory:
+        values: Dict[str, Any] = {}
+        async with self.pool.connection() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute(CHANNEL_BLOBS_SQL, {
+                    "thread_id": latest.thread_id,
+                    "messages_version": latest.messages_version,
+                    "summary_version": latest.summary_version,
+                })
+                for channel, type_, blob in await cur.fetchall():
+                    if type_ != "empty":
+                        values[channel] = self.serde.loads_typed((type_, blob))
+        return ConversationHistory(
+            checkpoint_id=latest.checkpoint_id,
+            summary=values.get("summary") or "",
+            messages=values.get("messages") or [],
+        )
+
+
+def message_payload(message: BaseMessage) -> Dict[str, Any]:
+    return {
+        "id": message.id,
+        "role": "user" if isinstance(message, HumanMessage) else "assistant",
+        "content": message_text(message),
+        "agent": message.name,
+        "interrupted": bool(message.response_metadata.get("interrupted")),
+    }
+
+
+def page_messages(messages: List[BaseMessage], before: Optional[str] = None, limit: int = 50) -> Tuple[List[BaseMessage], Optional[str]]:
+    """The ``limit`` user/assistant messages before message ``before`` (default: the newest), oldest first.
+
+    Returns the page and the cursor of the next (older) page, None once the
+    first message is reached. A cursor whose message has since been folded into
+    the summary gives an empty page.
+    """
+    visible = [message for message in messages if isinstance(message, (HumanMessage, AIMessage))]
+    end = len(visible)
+    if before is not None:
+        end = next((index for index, message in enumerate(visible) if message.id == before), 0)
+    start = max(0, end - limit)
+    return visible[start:end], visible[start].id if start > 0 else None
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header matches ``etag``: ``*``, or any listed tag by weak comparison."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag.removeprefix("W/") for tag in if_none_match.split(","))
@@ -0,0 +1,297 @@
+import asyncio
+import os
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+from dotenv import load_dotenv
+from loguru import logger
+from psycopg.rows import dict_row
+from psycopg_pool import AsyncConnectionPool
+from src.utils.keyed_locks import thread_locks
+
+load_dotenv()
+
+CHECKPOINT_RETENTION_ENABLED = os.getenv("CHECKPOINT_RETENTION_ENABLED", "false").lower() == "true"
+
+# Key of the Postgres advisory lock that keeps retention passes of several workers apart
+RETENTION_LOCK_KEY = 7_046_201_947
+
+# Threads with more root checkpoints than ``keep`` whose latest checkpoint is older than the idle window
+CANDIDATE_THREADS_SQL = """
+SELECT thread_id
+FROM checkpoints
+WHERE checkpoint_ns = '' AND thread_id > %(after)s
+GROUP BY thread_id
+HAVING count(*) > %(keep)s
+   AND max((checkpoint ->> 'ts')::timestamptz) < now() - %(idle_minutes)s * interval '1 minute'
+ORDER BY thread_id
+LIMIT %(limit)s
+"""
+
+# Root checkpoints beyond the latest ``keep`` of their thread and older than the history window
+DELETE_CHECKPOINTS_SQL = """
+WITH ranked AS (
+    SELECT thread_id, checkpoint_id,
+           row_number() OVER (PARTITION BY thread_id ORDER BY checkpoint_id DESC) AS position,
+           (checkpoint ->> 'ts')::timestamptz AS ts
+    FROM checkpoints
+    WHERE checkpoint_ns = '' AND thread_id = ANY(%(threads)s)
+)
+DELETE FROM checkpoints AS c
+USING ranked AS r
+WHERE c.thread_id = r.thread_id
+  AND c.checkpoint_ns = ''
+  AND c.checkpoint_id = r.checkpoint_id
+  AND r.position > %(keep)s
+  AND r.ts < now() - %(history_hours)s * interval '1 hour'
+"""
+
+# Checkpoints of ReAct subgraphs (namespace "<node>:<task id>") from turns older than the oldest kept
+# root checkpoint; checkpoint ids are time-ordered
+DELETE_SUBGRAPH_CHECKPOINTS_SQL = """
+DELETE FROM checkpoints AS c
+USING (
+    SELECT thread_id, min(checkpoint_id) AS oldest_kept
+    FROM checkpoints
+    WHERE checkpoint_ns = '' AND thread_id = ANY(%(threads)s)
+    GROUP BY thread_id
+) AS k
+WHERE c.thread_id = k.thread_id
+  AND c.checkpoint_ns <> ''
+  AND c.checkpoint_id < k.oldest_kept
+"""
+
+# Pending writes of deleted checkpoints; writes of a kept checkpoint's parent are read as its pending sends
+DELETE_WRITES_SQL = """
+DELETE FROM checkpoint_writes AS w
+WHERE w.thread_id = ANY(%(threads)s)
+  AND NOT EXISTS (
+      SELECT 1
+      FROM checkpoints AS c
+      WHERE c.thread_id = w.thread_id
+        AND c.checkpoint_ns = w.checkpoint_ns
+        AND (c.checkpoint_id = w.checkpoint_id OR c.parent_checkpoint_id = w.checkpoint_id)
+  )
+"""
+
+# Channel values no remaining checkpoint points at
+DELETE_BLOBS_SQL = """
+DELETE FROM checkpoint_blobs AS b
+WHERE b.thread_id = ANY(%(threads)s)
+  AND NOT EXISTS (
+      SELECT 1
+      FROM checkpoints AS c
+      WHERE c.thread_id = b.thread_id
+        AND c.checkpoint_ns = b.checkpoint_ns
+        AND c.checkpoint -> 'channel_versions' ->> b.channel = b.version
+  )
+"""
+
+THREAD_STORAGE_SQL = """
+WITH c AS (
+    SELECT thread_id,
+           count(*) FILTER (WHERE checkpoint_ns = '') AS checkpoints,
+           count(*) FILTER (WHERE checkpoint_ns <> '') AS subgraph_checkpoints,
+           sum(pg_column_size(checkpoint) + pg_column_size(metadata)) AS checkpoint_bytes,
+           max(checkpoint ->> 'ts') FILTER (WHERE checkpoint_ns = '') AS latest_ts
+    FROM checkpoints
+    WHERE %(thread_id)s::text IS NULL OR thread_id = %(thread_id)s
+    GROUP BY thread_id
+), b AS (
+    SELECT thread_id, count(*) AS blobs, coalesce(sum(pg_column_size(blob)), 0) AS blob_bytes
+    FROM checkpoint_blobs
+    WHERE %(thread_id)s::text IS NULL OR thread_id = %(thread_id)s
+    GROUP BY thread_id
+), w AS (
+    SELECT thread_id, count(*) AS writes, sum(pg_column_size(blob)) AS write_bytes
+    FROM checkpoint_writes
+    WHERE %(thread_id)s::text IS NULL OR thread_id = %(thread_id)s
+    GROUP BY thread_id
+)
+SELECT c.thread_id,
+       c.checkpoints,
+       c.subgraph_checkpoints,
+       coalesce(b.blobs, 0) AS blobs,
+       coalesce(w.writes, 0) AS writes,
+       c.checkpoint_bytes + coalesce(b.blob_bytes, 0) + coalesce(w.write_bytes, 0) AS total_bytes,
+       c.latest_ts
+FROM c
+LEFT JOIN b USING (thread_id)
+LEFT JOIN w USING (thread_id)
+ORDER BY total_bytes DESC
+LIMIT %(limit)s OFFSET %(offset)s
+"""
+
+TABLE_SIZES_SQL = """
+SELECT relname AS table_name, n_live_tup AS rows, pg_total_relation_size(relid) AS total_bytes
+FROM pg_catalog.pg_stat_user_tables
+WHERE relname IN ('checkpoints', 'checkpoint_blobs', 'checkpoint_writes')
+ORDER BY relname
+"""
+
+
+@dataclass
+class PruneResult:
+    threads: int = 0
+    skipped_busy: int = 0
+    checkpoints: int = 0
+    subgraph_checkpoints: int = 0
+    writes: int = 0
+    blobs: int = 0
+    locked_out: bool = False
+    errors: List[str] = field(default_factory=list)
+
+    def add(self, other: "PruneResult"):
+        self.threads += other.threads
+        self.checkpoints += other.checkpoints
+        self.subgraph_checkpoints += other.subgraph_checkpoints
+        self.writes += other.writes
+        self.blobs += other.blobs
+
+
+class CheckpointRetention:
+    """Prunes the AsyncPostgresSaver tables down to the checkpoints worth keeping.
+
+    Per thread, the root checkpoints kept are the latest ``keep_latest`` plus
+    every one written in the last ``history_hours``; the latest is always kept,
+    so the conversation state is never lost. Then the pending writes, subgraph
+    checkpoints and channel blobs that only the deleted checkpoints referenced
+    are removed.
+
+    Threads are pruned ``batch_size`` at a time, each batch in its own
+    transaction. Threads written in the last ``idle_minutes`` are skipped, and
+    so are threads with a turn running in this worker. A Postgres advisory lock
+    keeps passes of several workers from overlapping.
+    """
+
+    def __init__(
+        self,
+        pool: AsyncConnectionPool,
+        keep_latest: int = 10,
+        history_hours: float = 24,
+        batch_size: int = 100,
+        idle_minutes: float = 10,
+    ):
+        if keep_latest < 1:
+            raise ValueError("keep_latest must be at least 1: the latest checkpoint is the conversation state")
+        self.pool = pool
+        self.keep_latest = keep_latest
+        self.history_hours = history_hours
+        self.batch_size = batch_size
+        self.idle_minutes = idle_minutes
+        self.last_result: Optional[PruneResult] = None
+
+    async def _prune_batch(self, conn, threads: List[str]) -> PruneResult:
+        params = {"threads": threads, "keep": self.keep_latest, "history_hours": self.history_hours}
+        result = PruneResult(threads=len(threads))
+        async with conn.transaction():
+            async with conn.cursor() as cur:
+                await cur.execute(DELETE_CHECKPOINTS_SQL, params)
+                result.checkpoints = cur.rowcount
+                await cur.execute(DELETE_SUBGRAPH_CHECKPOINTS_SQL, params)
+                result.subgraph_checkpoints = cur.rowcount
+                await cur.execute(DELETE_WRITES_SQL, params)
+                result.writes = cur.rowcount
+                await cur.execute(DELETE_BLOBS_SQL, params)
+                result.blobs = cur.rowcount
+        return result
+
+    async def prune(self, max_batches: Optional[int] = None) -> PruneResult:
+        """One pass over every thread with more checkpoints than ``keep_latest``."""
+        total = PruneResult()
+        async with self.pool.connection() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute("SELECT pg_try_advisory_lock(%s)", (RETENTION_LOCK_KEY,))
+                if not (await cur.fetchone())[0]:
+                    total.locked_out = True
+                    return total
+            try:
+                after = ""
+                batches = 0
+                while max_batches is None or batches < max_batches:
+                    async with conn.cursor() as cur:
+                        await cur.execute(CANDIDATE_THREADS_SQL, {
+                            "after": after,
+                            "keep": self.keep_latest,
+                            "idle_minutes": self.idle_minutes,
+                            "limit": self.batch_size,
+                        })
+                        candidates = [row[0] for row in await cur.fetchall()]
+                    if not candidates:
+                        break
+                    after = candidates[-1]
+                    threads = [thread_id for thread_id in candidates if not thread_locks.locked(thread_id)]
+                    total.skipped_busy += len(candidates) - len(threads)
+                    if threads:
+                        try:
+                            total.add(await self._prune_batch(conn, threads))
+                        except Exception as e:
+                            logger.error(f"Checkpoint retention batch after {threads[0]!r} failed: {e}")
+                            total.errors.append(str(e))
+                    batches += 1
+            finally:
+                await self._unlock(conn)
+        self.last_result = total
+        return total
+
+    @staticmethod
+    async def _unlock(conn):
+        """Release the pass lock, even when the pass was cancelled.
+
+        The lock belongs to the session, not a transaction, so a pooled
+        connection returned still holding it would lock every later pass out.
+        If the unlock cannot run (cancelled again, or the connection is still
+        busy with the cancelled query), the connection is closed instead, which
+        releases the lock server-side; the pool discards closed connections.
+        """
+        try:
+            async with conn.cursor() as cur:
+                await cur.execute("SELECT pg_advisory_unlock(%s)", (RETENTION_LOCK_KEY,))
+        except Exception as e:
+            # Keep the pass's own outcome (result, error or cancellation)
+            logger.warning(f"Checkpoint retention unlock failed, closing the connection: {e}")
+            await conn.close()
+        except BaseException:
+            await conn.close()
+            raise
+
+    async def run_forever(self, interval_seconds: float):
+        """Background loop: a prune pass every ``interval_seconds``."""
+        while True:
+            try:
+                result = await self.prune()
+                if result.checkpoints or result.subgraph_checkpoints:
+                    logger.info(
+                        f"Checkpoint retention: {result.checkpoints} checkpoints, {result.subgraph_checkpoints} subgraph "
+                        f"checkpoints, {result.writes} writes and {result.blobs} blobs removed from {result.threads} threads"
+                    )
+            except Exception as e:
+                logger.error(f"Checkpoint retention pass failed: {e}")
+            await asyncio.sleep(interval_seconds)
+
+    async def storage_report(self, thread_id: Optional[str] = None, limit: int = 50, offset: int = 0) -> Dict[str, Any]:
+        """Checkpoint storage per thread, largest first, and the size of the checkpointer tables."""
+        async with self.pool.connection() as conn:
+            async with conn.cursor(row_factory=dict_row) as cur:
+                await cur.execute(THREAD_STORAGE_SQL, {"thread_id": thread_id, "limit": limit, "offset": offset})
+                threads = await cur.fetchall()
+                await cur.execute(TABLE_SIZES_SQL)
+                tables = await cur.fetchall()
+        return {
+            "policy": {
+                "keep_latest": self.keep_latest,
+                "history_hours": self.history_hours,
+                "idle_minutes": self.idle_minutes,
+            },
+            "tables": tables,
+            "threads": threads,
+        }
+
+
+def create_retention(pool: AsyncConnectionPool) -> CheckpointRetention:
+    return CheckpointRetention(
+        pool,
+        keep_latest=int(os.getenv("CHECKPOINT_KEEP_LATEST", "10")),
+        history_hours=float(os.getenv("CHECKPOINT_HISTORY_HOURS", "24")),
+        batch_size=int(os.getenv("CHECKPOINT_RETENTION_BATCH_SIZE", "100")),
+        idle_minutes=float(os.getenv("CHECKPOINT_RETENTION_IDLE_MINUTES", "10")),
+    )
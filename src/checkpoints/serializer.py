@@ -0,0 +1,105 @@
+import os
+import threading
+from typing import Any, Tuple
+import ormsgpack
+from dotenv import load_dotenv
+from langchain_core.messages import BaseMessage
+from langgraph.checkpoint.serde.base import SerializerProtocol
+from langgraph.checkpoint.serde.jsonplus import EXT_PYDANTIC_V2, JsonPlusSerializer, _msgpack_default, _option
+
+try:
+    import zstandard
+except ImportError:  # compression is optional, values are then stored as plain msgpack
+    zstandard = None
+
+load_dotenv()
+
+CHECKPOINT_COMPACT_SERDE = os.getenv("CHECKPOINT_COMPACT_SERDE", "true").lower() == "true"
+
+# Suffix of the type tag of a compressed value, e.g. "msgpack+zstd"
+ZSTD_SUFFIX = "+zstd"
+
+
+def _compact_default(obj: Any):
+    # Same extension type as JsonPlusSerializer, so its reader decodes these too; fields
+    # left at their default (empty additional_kwargs, tool_calls, ...) are not written
+    if isinstance(obj, BaseMessage):
+        return ormsgpack.Ext(
+            EXT_PYDANTIC_V2,
+            _compact_enc((
+                obj.__class__.__module__,
+                obj.__class__.__name__,
+                obj.model_dump(exclude_defaults=True),
+                "model_validate_json",
+            )),
+        )
+    return _msgpack_default(obj)
+
+
+def _compact_enc(obj: Any) -> bytes:
+    return ormsgpack.packb(obj, default=_compact_default, option=_option)
+
+
+class CompactSerializer(SerializerProtocol):
+    """Checkpoint serializer: msgpack without default message fields, zstd for large values.
+
+    Values are read with JsonPlusSerializer once a ``+zstd`` type tag has been
+    decompressed, so rows written before (or by other tools) load unchanged and
+    no migration is needed. With ``compact=False`` values are written exactly
+    as JsonPlusSerializer writes them, while compressed rows still load; this
+    is the way back to the default serializer.
+    """
+
+    def __init__(self, compact: bool = True, compress_min_bytes: int = 2048, level: int = 3):
+        self.fallback = JsonPlusSerializer()
+        self.compact = compact
+        self.compress_min_bytes = compress_min_bytes
+        self.level = level
+        # zstd contexts must not be shared by threads; the checkpointer serialises in a thread pool
+        self._local = threading.local()
+
+    def _zstd(self):
+        if not hasattr(self._local, "compressor"):
+            self._local.compressor = zstandard.ZstdCompressor(level=self.level)
+            self._local.decompressor = zstandard.ZstdDecompressor()
+        return self._local
+
+    def dumps(self, obj: Any) -> bytes:
+        return self.fallback.dumps(obj)
+
+    def loads(self, data: bytes) -> Any:
+        return self.fallback.loads(data)
+
+    def dumps_typed(self, obj: Any) -> Tuple[str, bytes]:
+        if not self.compact or obj is None or isinstance(obj, (bytes, bytearray)):
+            return self.fallback.dumps_typed(obj)
+        try:
+            type_, data = "msgpack", _compact_enc(obj)
+        except ormsgpack.MsgpackEncodeError:
+            # Invalid UTF-8 and other values msgpack cannot hold
+            type_, data = self.fallback.dumps_typed(obj)
+        if zstandard is not None and len(data) >= self.compress_min_bytes:
+            compressed = self._zstd().compressor.compress(data)
+            if len(compressed) < len(data):
+                return type_ + ZSTD_SUFFIX, compressed
+        return type_, data
+
+    def loads_typed(self, data: Tuple[str, bytes]) -> Any:
+        type_, payload = data
+        if type_.endswith(ZSTD_SUFFIX):
+            if zstandard is None:
+                raise RuntimeError(f"Checkpoint value of type {type_!r} needs the zstandard package")
+            type_, payload = type_[: -len(ZSTD_SUFFIX)], self._zstd().decompressor.decompress(payload)
+        return self.fallback.loads_typed((type_, payload))
+
+
+def create_serializer() -> CompactSerializer:
+    return CompactSerializer(
+        compact=CHECKPOINT_COMPACT_SERDE,
+        compress_min_bytes=int(os.getenv("CHECKPOINT_COMPRESS_MIN_BYTES", "2048")),
+        level=int(os.getenv("CHECKPOINT_ZSTD_LEVEL", "3")),
+    )
+
+
+# Shared by every checkpointer of the app: reads must use the serializer the values were written with
+checkpoint_serde = create_serializer()
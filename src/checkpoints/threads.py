@@ -0,0 +1,101 @@
+import asyncio
+import base64
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Tuple
+from loguru import logger
+from sqlalchemy import tuple_
+from sqlalchemy.dialects.postgresql import insert
+from src.config.database import ConversationThread, SessionLocal, engine
+
+# Titles are the first question of the conversation, cut to this length
+TITLE_MAX_CHARS = 100
+
+_background_tasks = set()
+
+
+def create_thread_table():
+    ConversationThread.__table__.create(bind=engine, checkfirst=True)
+
+
+def record_turn(thread_id: str, user_id: int, query: str):
+    """Create the thread row on its first turn (titled with the question), then bump it on each turn.
+
+    A thread id that already belongs to another user is left untouched.
+    """
+    now = datetime.now(timezone.utc)
+    statement = insert(ConversationThread).values(
+        threadId=thread_id,
+        userId=user_id,
+        title=query.strip()[:TITLE_MAX_CHARS],
+        turns=1,
+        createdAt=now,
+        updatedAt=now,
+    )
+    statement = statement.on_conflict_do_update(
+        index_elements=[ConversationThread.threadId],
+        set_={"turns": ConversationThread.turns + 1, "updatedAt": now},
+        where=ConversationThread.userId == statement.excluded.userId,
+    )
+    db = SessionLocal()
+    try:
+        db.execute(statement)
+        db.commit()
+    finally:
+        db.close()
+
+
+def record_turn_in_background(thread_id: str, user_id: int, query: str) -> asyncio.Task:
+    """Run record_turn off the turn's critical path."""
+    task = asyncio.create_task(asyncio.to_thread(record_turn, thread_id, user_id, query))
+    _background_tasks.add(task)
+
+    def on_done(task: asyncio.Task):
+        _background_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Recording the turn of thread {thread_id} failed: {task.exception()}")
+
+    task.add_done_callback(on_done)
+    return task
+
+
+def encode_cursor(updated_at: datetime, thread_id: str) -> str:
+    return base64.urlsafe_b64encode(f"{updated_at.isoformat()}|{thread_id}".encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """Raises ValueError for a cursor this API did not issue."""
+    try:
+        updated_at, thread_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|", 1)
+        return datetime.fromisoformat(updated_at), thread_id
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
+
+
+def list_threads(user_id: int, limit: int = 20, cursor: Optional[str] = None) -> Dict[str, Any]:
+    """A page of the user's conversations, most recently active first (keyset pagination on idx_thread_user_updated)."""
+    db = SessionLocal()
+    try:
+        query = db.query(ConversationThread).filter(ConversationThread.userId == user_id)
+        if cursor:
+            updated_at, thread_id = decode_cursor(cursor)
+            query = query.filter(
+                tuple_(ConversationThread.updatedAt, ConversationThread.threadId) < tuple_(updated_at, thread_id)
+            )
+        rows = query.order_by(ConversationThread.updatedAt.desc(), ConversationThread.threadId.desc()).limit(limit + 1).all()
+    finally:
+        db.close()
+
+    page = rows[:limit]
+    return {
+        "conversations": [
+            {
+                "conversation_id": row.threadId,
+                "title": row.title,
+                "turns": row.turns,
+                "created_at": row.createdAt.isoformat(),
+                "updated_at": row.updatedAt.isoformat(),
+            }
+            for row in page
+        ],
+        "next_cursor": encode_cursor(page[-1].updatedAt, page[-1].threadId) if len(rows) > limit else None,
+    }
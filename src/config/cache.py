@@ -0,0 +1,27 @@
+from src.cache import CacheBackend, MemoryCache, RedisCache
+from dotenv import load_dotenv
+import os
+
+load_dotenv()
+
+def create_cache() -> CacheBackend:
+    """Cache backend selected by CACHE_BACKEND (memory | redis).
+
+    memory keeps one LRU per uvicorn worker; redis shares the entries (and
+    their invalidation) between every worker and replica.
+    """
+    backend = os.getenv("CACHE_BACKEND", "memory").lower()
+    if backend == "memory":
+        return MemoryCache(max_entries=int(os.getenv("CACHE_MAX_ENTRIES", "10000")))
+    if backend == "redis":
+        return RedisCache(
+            os.getenv("CACHE_REDIS_URL", "redis://localhost:6379/0"),
+            prefix=os.getenv("CACHE_PREFIX", "ai-service"),
+            version_check_seconds=float(os.getenv("CACHE_VERSION_CHECK_SECONDS", "1")),
+            socket_timeout=float(os.getenv("CACHE_SOCKET_TIMEOUT", "0.25")),
+            failure_threshold=int(os.getenv("CACHE_FAILURE_THRESHOLD", "3")),
+            open_seconds=float(os.getenv("CACHE_CIRCUIT_OPEN_SECONDS", "5")),
+        )
+    raise ValueError(f"Unsupported CACHE_BACKEND: {backend}")
+
+cache = create_cache()
@@ -1,4 +1,5 @@
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, Text, Index
+from sqlalchemy import create_engine, make_url, Column, Integer, String, DateTime, Text, Index
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import declarative_base
 from sqlalchemy.orm import sessionmaker
 from datetime import datetime, timezone
@@ -12,6 +13,17 @@ DB_URI = os.getenv("DB_URI")
 
 engine = create_engine(DB_URI)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def async_database_url(uri: str):
+    """The same database through an asyncio driver (psycopg 3 for Postgres)."""
+    url = make_url(uri)
+    if url.drivername in ("postgresql", "postgresql+psycopg2"):
+        url = url.set(drivername="postgresql+psycopg")
+    return url
+
+# For the agent tools: a cancelled turn cancels their queries instead of leaving them running in a thread
+async_engine = create_async_engine(async_database_url(DB_URI))
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
 Base = declarative_base()
 
 class TodoItem(Base):
@@ -28,6 +40,21 @@ class TodoItem(Base):
     createdAt = Column(DateTime, default=lambda: datetime.now(timezone.utc), index=True)
     updatedAt = Column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
 
+class ConversationThread(Base):
+    """A user's chat conversation; the messages themselves live in the LangGraph checkpoints."""
+    __tablename__ = "conversation_threads"
+    __table_args__ = (
+        # Listing a user's conversations, most recent first
+        Index('idx_thread_user_updated', 'userId', 'updatedAt', 'threadId'),
+    )
+
+    threadId = Column(String, primary_key=True)
+    userId = Column(Integer, nullable=False)
+    title = Column(String, nullable=False, default="")
+    turns = Column(Integer, nullable=False, default=0)
+    createdAt = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    updatedAt = Column(DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc))
+
 def create_tables():
     Base.metadata.create_all(bind=engine)
     
@@ -0,0 +1,237 @@
+import asyncio
+import json
+import random
+import re
+import threading
+import time
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, HumanMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from pydantic import Field, PrivateAttr
+from src.config.llm_gateway import current_user
+
+
+class FakeRateLimitError(Exception):
+    """Stand-in for the provider's 429 RESOURCE_EXHAUSTED error."""
+    code = 429
+
+
+class FakeChatModel(BaseChatModel):
+    """Offline chat model for load tests and benchmarks.
+
+    Replies with ``responses`` in turn (or echoes the last message), after
+    ``latency`` seconds, streaming at ``tokens_per_second``. A call fails with
+    FakeRateLimitError with probability ``error_rate``, and every call beyond
+    ``max_in_flight`` concurrent ones (0 = unlimited) fails like an exhausted
+    provider quota.
+
+    ``script`` makes routing and tool use deterministic. The first rule whose
+    ``match`` regex is found in the user's question applies: the run's
+    ``user_input`` metadata when the caller sets it (the router does, as its
+    prompt is rendered into one long message), else the last user message:
+        {"match": "học phí", "routes": ["rag_agent"],
+         "tool_calls": {"rag_retrieve": {"input": {"query": "{query}"}}},
+         "reply": "..."}
+    With the router's RouteDecision schema bound, the call returns ``routes``.
+    With tools bound, it calls the first bound tool listed in ``tool_calls``,
+    unless a tool result already follows the user message. Otherwise it answers
+    with ``reply``. ``{query}`` and ``{user_id}`` (the current_user of the
+    request) are substituted in arguments and replies. Without a matching rule
+    the ReAct agents answer directly.
+    """
+
+    responses: List[str] = Field(default_factory=list)
+    script: List[Dict[str, Any]] = Field(default_factory=list)
+    latency: float = 0.5
+    latency_jitter: float = 0.0
+    tokens_per_second: float = 50.0
+    error_rate: float = 0.0
+    max_in_flight: int = 0
+    seed: Optional[int] = None
+
+    _calls: int = PrivateAttr(default=0)
+    _errors: int = PrivateAttr(default=0)
+    _in_flight: int = PrivateAttr(default=0)
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+    _rng: random.Random = PrivateAttr(default=None)
+
+    def model_post_init(self, __context: Any):
+        self._rng = random.Random(self.seed)
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat-model"
+
+    @property
+    def calls(self) -> int:
+        return self._calls
+
+    @property
+    def errors(self) -> int:
+        return self._errors
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def bind_tools(self, tools, *, tool_choice=None, **kwargs):
+        return self.bind(tools=[convert_to_openai_tool(tool) for tool in tools], **kwargs)
+
+    @staticmethod
+    def _fill(value: Any, values: Dict[str, str]) -> Any:
+        if isinstance(value, str):
+            for key, replacement in values.items():
+                value = value.replace("{" + key + "}", replacement)
+            return value
+        if isinstance(value, dict):
+            return {key: FakeChatModel._fill(item, values) for key, item in value.items()}
+        if isinstance(value, list):
+            return [FakeChatModel._fill(item, values) for item in value]
+        return value
+
+    def _scripted_reply(self, messages: List[BaseMessage], tools: List[dict], index: int, question: Optional[str] = None) -> AIMessage:
+        turn = 0
+        for i, message in enumerate(messages):
+            if isinstance(message, HumanMessage):
+                turn = i
+        query = question if question is not None else messages[turn].content if messages else ""
+        values = {"query": query if isinstance(query, str) else json.dumps(query), "user_id": current_user.get() or ""}
+        rule = next((r for r in self.script if re.search(r["match"], values["query"], re.IGNORECASE)), None)
+        tool_names = [tool["function"]["name"] for tool in tools]
+
+        if rule is not None and "RouteDecision" in tool_names:
+            call = {"name": "RouteDecision", "args": {"routes": rule.get("routes", ["generic_agent"])}}
+            return AIMessage(content="", tool_calls=[{**call, "id": f"fake-call-{index}"}])
+        answered = any(isinstance(message, ToolMessage) for message in messages[turn:])
+        if rule is not None and not answered:
+            for name in tool_names:
+                if name in rule.get("tool_calls", {}):
+                    args = self._fill(rule["tool_calls"][name], values)
+                    return AIMessage(content="", tool_calls=[{"name": name, "args": args, "id": f"fake-call-{index}"}])
+        if rule is not None and rule.get("reply"):
+            return AIMessage(content=self._fill(rule["reply"], values))
+        if self.responses:
+            return AIMessage(content=self.responses[index % len(self.responses)])
+        return AIMessage(content=f"Echo: {messages[-1].content}" if messages else "Echo")
+
+    def _start_call(self, messages: List[BaseMessage], tools: Optional[List[dict]] = None, run_manager=None) -> tuple:
+        """(delay, reply) for a new call; reply is None when the call must fail with a 429.
+
+        Every call must be paired with ``_end_call``.
+        """
+        with self._lock:
+            index = self._calls
+            self._calls += 1
+            self._in_flight += 1
+            failed = self._rng.random() < self.error_rate or 0 < self.max_in_flight < self._in_flight
+            if failed:
+                self._errors += 1
+            delay = max(0.0, self.latency + self._rng.uniform(-self.latency_jitter, self.latency_jitter))
+        if failed:
+            # Rejections come back fast, like a real quota error
+            return min(delay, 0.05), None
+        question = (run_manager.metadata or {}).get("user_input") if run_manager is not None else None
+        return delay, self._scripted_reply(messages, tools or [], index, question)
+
+    def _end_call(self):
+        with self._lock:
+            self._in_flight -= 1
+
+    @staticmethod
+    def _chunks(reply: AIMessage) -> List[str]:
+        if reply.tool_calls:
+            # A tool call arrives as one chunk
+            return [""]
+        words = reply.content.split(" ")
+        return [word + (" " if i < len(words) - 1 else "") for i, word in enumerate(words)]
+
+    @staticmethod
+    def _chunk(reply: AIMessage, text: str) -> ChatGenerationChunk:
+        if reply.tool_calls:
+            return ChatGenerationChunk(message=AIMessageChunk(
+                content="",
+                tool_call_chunks=[
+                    {"name": call["name"], "args": json.dumps(call["args"], ensure_ascii=False), "id": call["id"], "index": i}
+                    for i, call in enumerate(reply.tool_calls)
+                ],
+            ))
+        return ChatGenerationChunk(message=AIMessageChunk(content=text))
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        delay, reply = self._start_call(messages, kwargs.get("tools"), run_manager)
+        try:
+            time.sleep(delay)
+            if reply is None:
+                raise FakeRateLimitError("429 Resource has been exhausted (e.g. check quota).")
+            time.sleep(len(self._chunks(reply)) / self.tokens_per_second)
+            return ChatResult(generations=[ChatGeneration(message=reply)])
+        finally:
+            self._end_call()
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        delay, reply = self._start_call(messages, kwargs.get("tools"), run_manager)
+        try:
+            await asyncio.sleep(delay)
+            if reply is None:
+                raise FakeRateLimitError("429 Resource has been exhausted (e.g. check quota).")
+            await asyncio.sleep(len(self._chunks(reply)) / self.tokens_per_second)
+            return ChatResult(generations=[ChatGeneration(message=reply)])
+        finally:
+            self._end_call()
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        delay, reply = self._start_call(messages, kwargs.get("tools"), run_manager)
+        try:
+            time.sleep(delay)
+            if reply is None:
+                raise FakeRateLimitError("429 Resource has been exhausted (e.g. check quota).")
+            for text in self._chunks(reply):
+                time.sleep(1 / self.tokens_per_second)
+                chunk = self._chunk(reply, text)
+                if run_manager:
+                    run_manager.on_llm_new_token(text, chunk=chunk)
+                yield chunk
+        finally:
+            self._end_call()
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        delay, reply = self._start_call(messages, kwargs.get("tools"), run_manager)
+        try:
+            await asyncio.sleep(delay)
+            if reply is None:
+                raise FakeRateLimitError("429 Resource has been exhausted (e.g. check quota).")
+            for text in self._chunks(reply):
+                await asyncio.sleep(1 / self.tokens_per_second)
+                chunk = self._chunk(reply, text)
+                if run_manager:
+                    await run_manager.on_llm_new_token(text, chunk=chunk)
+                yield chunk
+        finally:
+            self._end_call()
@@ -1,10 +1,120 @@
 from langchain_google_genai import ChatGoogleGenerativeAI
+from langchain_core.language_models.chat_models import BaseChatModel
+from src.config.fake_llm import FakeChatModel
+from src.config.llm_gateway import LLMGateway, LLMLimiter
+from dataclasses import dataclass, replace
+from typing import Dict, Optional
 from dotenv import load_dotenv
+import json
+import os
 
 load_dotenv(override=True)
 
-llm = ChatGoogleGenerativeAI(
-    model="gemini-2.5-flash",
-    temperature=0.3,
-    max_retries=2,
-)
\ No newline at end of file
+NODES = ("router", "summarize", "rag_agent", "schedule_agent", "generic_agent", "analytic_agent", "supervisor")
+
+@dataclass(frozen=True)
+class ModelConfig:
+    """Model settings of one graph node."""
+    model: str = "gemini-2.5-flash"
+    temperature: float = 0.3
+    max_tokens: Optional[int] = None
+    timeout: Optional[float] = None  # seconds per provider request
+    thinking_budget: Optional[int] = None  # 0 disables Gemini 2.5 thinking
+
+DEFAULT_MODEL_CONFIGS: Dict[str, ModelConfig] = {
+    # The router only emits one of four labels through structured output
+    "router": ModelConfig(model="gemini-2.5-flash-lite", temperature=0.0, max_tokens=64, timeout=10, thinking_budget=0),
+    "summarize": ModelConfig(model="gemini-2.5-flash-lite", temperature=0.2, max_tokens=1024, timeout=30, thinking_budget=0),
+    "rag_agent": ModelConfig(timeout=60),
+    "schedule_agent": ModelConfig(timeout=60),
+    "generic_agent": ModelConfig(timeout=60),
+    "analytic_agent": ModelConfig(timeout=60),
+    "supervisor": ModelConfig(timeout=60),
+}
+
+ENV_FIELDS = {
+    "MODEL": ("model", str),
+    "TEMPERATURE": ("temperature", float),
+    "MAX_TOKENS": ("max_tokens", int),
+    "TIMEOUT": ("timeout", float),
+    "THINKING_BUDGET": ("thinking_budget", int),
+}
+
+def load_model_configs() -> Dict[str, ModelConfig]:
+    """Defaults, overridden by the JSON file at LLM_CONFIG_FILE, then by LLM_<NODE>_<FIELD>
+    variables (e.g. LLM_ROUTER_MODEL, LLM_RAG_AGENT_MAX_TOKENS)."""
+    configs = dict(DEFAULT_MODEL_CONFIGS)
+    config_file = os.getenv("LLM_CONFIG_FILE")
+    if config_file:
+        with open(config_file, "r", encoding="utf-8") as f:
+            for node, fields in json.load(f).items():
+                configs[node] = replace(configs.get(node, ModelConfig()), **fields)
+    for node in NODES:
+        overrides = {}
+        for suffix, (field, cast) in ENV_FIELDS.items():
+            value = os.getenv(f"LLM_{node.upper()}_{suffix}")
+            if value:
+                overrides[field] = cast(value)
+        if overrides:
+            configs[node] = replace(configs[node], **overrides)
+    return configs
+
+def load_fake_script(path: Optional[str]) -> list:
+    """Scripted routes and tool calls for the fake provider (see FakeChatModel)."""
+    if not path:
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def create_provider_llm(config: ModelConfig) -> BaseChatModel:
+    """Provider client selected by LLM_PROVIDER (google | fake)."""
+    provider = os.getenv("LLM_PROVIDER", "google").lower()
+    if provider == "google":
+        return ChatGoogleGenerativeAI(
+            model=config.model,
+            temperature=config.temperature,
+            max_output_tokens=config.max_tokens,
+            timeout=config.timeout,
+            thinking_budget=config.thinking_budget,
+            max_retries=1,  # a single attempt; LLMGateway owns retries
+        )
+    if provider == "fake":
+        return FakeChatModel(
+            latency=float(os.getenv("FAKE_LLM_LATENCY", "0.5")),
+            tokens_per_second=float(os.getenv("FAKE_LLM_TOKENS_PER_SECOND", "50")),
+            error_rate=float(os.getenv("FAKE_LLM_ERROR_RATE", "0")),
+            max_in_flight=int(os.getenv("FAKE_LLM_MAX_IN_FLIGHT", "0")),
+            script=load_fake_script(os.getenv("FAKE_LLM_SCRIPT")),
+        )
+    raise ValueError(f"Unsupported LLM_PROVIDER: {provider}")
+
+def create_limiter() -> LLMLimiter:
+    return LLMLimiter(
+        max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", "8")),
+        max_concurrency_per_user=int(os.getenv("LLM_MAX_CONCURRENCY_PER_USER", "2")),
+        requests_per_minute=float(os.getenv("LLM_REQUESTS_PER_MINUTE", "0")),
+        tokens_per_minute=float(os.getenv("LLM_TOKENS_PER_MINUTE", "0")),
+    )
+
+def create_llm(config: ModelConfig, limiter: Optional[LLMLimiter] = None, node: str = "unknown") -> LLMGateway:
+    return LLMGateway(
+        inner=create_provider_llm(config),
+        limiter=limiter or create_limiter(),
+        node=node,
+        max_attempts=int(os.getenv("LLM_MAX_ATTEMPTS", "4")),
+        deadline_seconds=float(os.getenv("LLM_DEADLINE_SECONDS", "60")),
+        coalesce=os.getenv("LLM_COALESCE", "true").lower() == "true",
+    )
+
+model_configs = load_model_configs()
+# Gemini quotas are per model, so nodes on the same model share one limiter
+_limiters: Dict[str, LLMLimiter] = {}
+_llms: Dict[str, LLMGateway] = {}
+
+def get_llm(node: str) -> LLMGateway:
+    """The gateway-wrapped model configured for a graph node."""
+    if node not in _llms:
+        config = model_configs[node]
+        limiter = _limiters.setdefault(config.model, create_limiter())
+        _llms[node] = create_llm(config, limiter, node)
+    return _llms[node]
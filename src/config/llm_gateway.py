@@ -0,0 +1,439 @@
+import asyncio
+import contextvars
+import hashlib
+import json
+import random
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from loguru import logger
+from pydantic import Field, PrivateAttr
+from src.monitoring.metrics import metrics, llm_request_duration, llm_tokens
+from src.utils.token_counter import count_messages_tokens, count_tokens, message_text
+
+# User on whose behalf LLM calls are made; set per request by the chat router
+current_user: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("llm_current_user", default=None)
+
+RETRYABLE_STATUS_CODES = (429, 500, 503)
+
+
+class LLMDeadlineExceeded(TimeoutError):
+    """The call could not be admitted or retried before its deadline."""
+
+
+class _LeaderCancelled(Exception):
+    """The coalesced call a follower waited on was cancelled; the follower makes the call itself."""
+
+
+def is_retryable(exc: Exception) -> bool:
+    """Rate limits and transient provider errors (google.api_core exposes the HTTP status as ``code``)."""
+    code = getattr(exc, "code", None) or getattr(exc, "status_code", None)
+    if code in RETRYABLE_STATUS_CODES:
+        return True
+    message = str(exc)
+    return "429" in message or "RESOURCE_EXHAUSTED" in message
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at ``rate`` per second up to ``capacity``.
+
+    Usable from both the event loop and worker threads.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self, amount: float) -> float:
+        """Take ``amount`` tokens, possibly going into debt; returns the seconds to wait."""
+        amount = min(amount, self.capacity)
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= amount
+            return max(0.0, -self._tokens / self.rate)
+
+    def _refund(self, amount: float):
+        with self._lock:
+            self._tokens = min(self.capacity, self._tokens + min(amount, self.capacity))
+
+    async def acquire(self, amount: float = 1, deadline: Optional[float] = None):
+        wait = self._reserve(amount)
+        if deadline is not None and time.monotonic() + wait > deadline:
+            self._refund(amount)
+            raise LLMDeadlineExceeded("LLM rate limit wait exceeds the call deadline")
+        if wait:
+            await asyncio.sleep(wait)
+
+    def acquire_sync(self, amount: float = 1, deadline: Optional[float] = None):
+        wait = self._reserve(amount)
+        if deadline is not None and time.monotonic() + wait > deadline:
+            self._refund(amount)
+            raise LLMDeadlineExceeded("LLM rate limit wait exceeds the call deadline")
+        if wait:
+            time.sleep(wait)
+
+
+class LLMLimiter:
+    """Concurrency and rate limits for one provider quota, shared by the gateways that draw on it.
+
+    - a global and a per-user (``current_user``) concurrency limit,
+    - token buckets for requests and prompt tokens per minute (0 disables them).
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 8,
+        max_concurrency_per_user: int = 2,
+        requests_per_minute: float = 0,
+        tokens_per_minute: float = 0,
+    ):
+        self.max_concurrency = max_concurrency
+        self.max_concurrency_per_user = max_concurrency_per_user
+        self._global_semaphore: Optional[asyncio.Semaphore] = None
+        # user -> [semaphore, holders]; dropped once nobody holds or waits on it
+        self._user_semaphores: Dict[str, List[Any]] = {}
+        self._request_bucket = TokenBucket(requests_per_minute / 60, requests_per_minute) if requests_per_minute else None
+        self._token_bucket = TokenBucket(tokens_per_minute / 60, tokens_per_minute) if tokens_per_minute else None
+
+    @asynccontextmanager
+    async def admit(self, deadline: float):
+        if self._global_semaphore is None:
+            self._global_semaphore = asyncio.Semaphore(self.max_concurrency)
+        user = current_user.get()
+        entry = None
+        if user is not None:
+            entry = self._user_semaphores.setdefault(user, [asyncio.Semaphore(self.max_concurrency_per_user), 0])
+            entry[1] += 1
+        try:
+            if entry is not None:
+                await self._wait(entry[0], deadline)
+            try:
+                await self._wait(self._global_semaphore, deadline)
+                try:
+                    yield
+                finally:
+                    self._global_semaphore.release()
+            finally:
+                if entry is not None:
+                    entry[0].release()
+        finally:
+            if entry is not None:
+                entry[1] -= 1
+                if not entry[1]:
+                    self._user_semaphores.pop(user, None)
+
+    @staticmethod
+    async def _wait(semaphore: asyncio.Semaphore, deadline: float):
+        try:
+            await asyncio.wait_for(semaphore.acquire(), timeout=max(0.0, deadline - time.monotonic()))
+        except asyncio.TimeoutError:
+            raise LLMDeadlineExceeded("Timed out waiting for an LLM concurrency slot")
+
+    async def throttle(self, messages: List[BaseMessage], deadline: float):
+        if self._request_bucket is not None:
+            await self._request_bucket.acquire(1, deadline)
+        if self._token_bucket is not None:
+            await self._token_bucket.acquire(count_messages_tokens(messages), deadline)
+
+    def throttle_sync(self, messages: List[BaseMessage], deadline: float):
+        if self._request_bucket is not None:
+            self._request_bucket.acquire_sync(1, deadline)
+        if self._token_bucket is not None:
+            self._token_bucket.acquire_sync(count_messages_tokens(messages), deadline)
+
+
+class LLMGateway(BaseChatModel):
+    """Chat model wrapper that every node calls instead of the provider client.
+
+    - admission through an LLMLimiter (concurrency and rate limits),
+    - retries of 429/5xx errors with full-jitter exponential backoff, never past
+      the call's deadline (the wrapped model should not retry on its own),
+    - coalescing: identical prompts already in flight share one provider call.
+
+    Calls the wrapped model's private generate/stream methods, so its callbacks
+    do not fire twice; the gateway's own run reports the tokens. The concurrency
+    limits apply to async calls; sync calls are rate limited and retried only.
+    """
+
+    inner: BaseChatModel
+    limiter: LLMLimiter = Field(default_factory=LLMLimiter)
+    node: str = "unknown"  # graph node label of the metrics
+    max_attempts: int = 4
+    base_delay: float = 1.0
+    max_delay: float = 20.0
+    deadline_seconds: float = 60.0
+    coalesce: bool = True
+
+    _in_flight: Dict[str, asyncio.Future] = PrivateAttr(default_factory=dict)
+    _stats: Dict[str, int] = PrivateAttr(default_factory=lambda: {"calls": 0, "retries": 0, "coalesced": 0, "deadline_exceeded": 0})
+
+    @property
+    def _llm_type(self) -> str:
+        return f"gateway-{self.inner._llm_type}"
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return dict(self._stats)
+
+    def bind_tools(self, tools, **kwargs):
+        # Let the wrapped model format the tools, then bind the same call kwargs to the gateway
+        bound = self.inner.bind_tools(tools, **kwargs)
+        return self.bind(**getattr(bound, "kwargs", {}))
+
+    def _backoff(self, attempt: int, exc: Exception, deadline: float) -> float:
+        """Delay before the next attempt, or re-raise if out of attempts or time."""
+        if attempt + 1 >= self.max_attempts or not is_retryable(exc):
+            raise exc
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        if time.monotonic() + delay > deadline:
+            self._stats["deadline_exceeded"] += 1
+            raise exc
+        self._stats["retries"] += 1
+        logger.warning(f"LLM call failed ({exc}); retrying in {delay:.2f}s")
+        return delay
+
+    @staticmethod
+    def _coalesce_key(messages: List[BaseMessage], stop: Optional[List[str]], kwargs: Dict[str, Any]) -> str:
+        payload = json.dumps(
+            {
+                "messages": [message.model_dump(exclude={"id"}) for message in messages],
+                "stop": stop,
+                "kwargs": kwargs,
+            },
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    async def _follow(self, key: str) -> Optional[ChatResult]:
+        """Result of the identical call in flight, or None if there is none or its caller went away.
+
+        A cancelled leader (e.g. its client disconnected) must not cancel the
+        other users' turns: its followers start over, one of them as the new leader.
+        """
+        while key in self._in_flight:
+            try:
+                result = await asyncio.shield(self._in_flight[key])
+            except _LeaderCancelled:
+                continue
+            self._stats["coalesced"] += 1
+            return result
+        return None
+
+    @staticmethod
+    def _fail_followers(future: Optional[asyncio.Future], exc: BaseException):
+        if future is None or future.done():
+            return
+        # Cancellation is the leader's own; anything else is the provider's answer to this prompt
+        cancelled = isinstance(exc, (asyncio.CancelledError, GeneratorExit))
+        future.set_exception(_LeaderCancelled() if cancelled else exc)
+        future.exception()  # followers re-raise it; avoid "never retrieved" warnings
+
+    def _record(self, messages: List[BaseMessage], message: Optional[BaseMessage], started: float):
+        """Duration and token metrics of one provider attempt; ``message`` is None when it failed."""
+        if not metrics.enabled:
+            return
+        status = "error" if message is None else "ok"
+        llm_request_duration.observe(time.perf_counter() - started, node=self.node, status=status)
+        if message is None:
+            return
+        usage = getattr(message, "usage_metadata", None)
+        # Fall back to estimates for providers that report no usage
+        input_tokens = usage["input_tokens"] if usage else count_messages_tokens(messages)
+        output_tokens = usage["output_tokens"] if usage else count_tokens(message_text(message))
+        llm_tokens.inc(input_tokens, node=self.node, direction="input")
+        llm_tokens.inc(output_tokens, node=self.node, direction="output")
+
+    # Calls
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        key = self._coalesce_key(messages, stop, kwargs) if self.coalesce else None
+        future = None
+        if key is not None:
+            result = await self._follow(key)
+            if result is not None:
+                return result
+            future = asyncio.get_running_loop().create_future()
+            self._in_flight[key] = future
+        try:
+            result = await self._call(messages, stop, run_manager, **kwargs)
+            if future is not None:
+                future.set_result(result)
+            return result
+        except BaseException as exc:
+            self._fail_followers(future, exc)
+            raise
+        finally:
+            if key is not None:
+                self._in_flight.pop(key, None)
+
+    async def _call(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]],
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        deadline = time.monotonic() + self.deadline_seconds
+        self._stats["calls"] += 1
+        try:
+            async with self.limiter.admit(deadline):
+                attempt = 0
+                while True:
+                    await self.limiter.throttle(messages, deadline)
+                    started = time.perf_counter()
+                    try:
+                        result = await self.inner._agenerate(messages, stop=stop, run_manager=run_manager, **kwargs)
+                    except Exception as exc:
+                        self._record(messages, None, started)
+                        await asyncio.sleep(self._backoff(attempt, exc, deadline))
+                        attempt += 1
+                        continue
+                    self._record(messages, result.generations[0].message, started)
+                    return result
+        except LLMDeadlineExceeded:
+            self._stats["deadline_exceeded"] += 1
+            raise
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        key = self._coalesce_key(messages, stop, kwargs) if self.coalesce else None
+        # Follower: wait for the leader's complete answer and emit it as one chunk
+        result = await self._follow(key) if key is not None else None
+        if result is not None:
+            message = result.generations[0].message
+            chunk = ChatGenerationChunk(message=AIMessageChunk(
+                content=message.content,
+                tool_calls=getattr(message, "tool_calls", []),
+                usage_metadata=getattr(message, "usage_metadata", None),
+            ))
+            if run_manager:
+                await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+            return
+
+        future = asyncio.get_running_loop().create_future() if key is not None else None
+        if future is not None:
+            self._in_flight[key] = future
+        try:
+            aggregate = None
+            # The inner model reports its tokens to run_manager itself
+            async for chunk in self._call_stream(messages, stop, run_manager, **kwargs):
+                aggregate = chunk if aggregate is None else aggregate + chunk
+                yield chunk
+            if future is not None:
+                message = aggregate.message if aggregate is not None else AIMessageChunk(content="")
+                future.set_result(ChatResult(generations=[ChatGeneration(message=message)]))
+        except BaseException as exc:
+            self._fail_followers(future, exc)
+            raise
+        finally:
+            # Stream closed early by the consumer
+            self._fail_followers(future, asyncio.CancelledError())
+            if key is not None:
+                self._in_flight.pop(key, None)
+
+    async def _call_stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]],
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ):
+        deadline = time.monotonic() + self.deadline_seconds
+        self._stats["calls"] += 1
+        try:
+            async with self.limiter.admit(deadline):
+                attempt = 0
+                while True:
+                    await self.limiter.throttle(messages, deadline)
+                    started_at = time.perf_counter()
+                    started = False
+                    # Only assembled for the token metrics
+                    aggregate = AIMessageChunk(content="")
+                    try:
+                        async for chunk in self.inner._astream(messages, stop=stop, run_manager=run_manager, **kwargs):
+                            started = True
+                            if metrics.enabled:
+                                aggregate += chunk.message
+                            yield chunk
+                        self._record(messages, aggregate, started_at)
+                        return
+                    except Exception as exc:
+                        self._record(messages, None, started_at)
+                        # Tokens already sent to the client cannot be taken back
+                        if started:
+                            raise
+                        await asyncio.sleep(self._backoff(attempt, exc, deadline))
+                        attempt += 1
+        except LLMDeadlineExceeded:
+            self._stats["deadline_exceeded"] += 1
+            raise
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        deadline = time.monotonic() + self.deadline_seconds
+        self._stats["calls"] += 1
+        attempt = 0
+        while True:
+            self.limiter.throttle_sync(messages, deadline)
+            started = time.perf_counter()
+            try:
+                result = self.inner._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+            except Exception as exc:
+                self._record(messages, None, started)
+                time.sleep(self._backoff(attempt, exc, deadline))
+                attempt += 1
+                continue
+            self._record(messages, result.generations[0].message, started)
+            return result
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        deadline = time.monotonic() + self.deadline_seconds
+        self._stats["calls"] += 1
+        attempt = 0
+        while True:
+            self.limiter.throttle_sync(messages, deadline)
+            started = False
+            try:
+                for chunk in self.inner._stream(messages, stop=stop, run_manager=run_manager, **kwargs):
+                    started = True
+                    yield chunk
+                return
+            except Exception as exc:
+                if started:
+                    raise
+                time.sleep(self._backoff(attempt, exc, deadline))
+                attempt += 1
@@ -1,43 +1,75 @@
-from langchain_pinecone import PineconeVectorStore
 from langchain_huggingface import HuggingFaceEmbeddings
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
-from typing import List, Dict, Any, Optional
-from langchain.schema import Document
-from langchain.vectorstores import VectorStore
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from src.retrieval import VectorStoreCRUD, PineconeVectorStoreCRUD, LocalVectorStoreCRUD, BM25Index, DocumentManifest, IngestionJobManager, IngestionJobStore
+from src.cache import CachedEmbeddings
+from src.config.cache import cache
 from dotenv import load_dotenv
+import os
 
 load_dotenv()
 
-class VectorStoreCRUD:
-    def __init__(self, k: int = 3, score_threshold: float = 0.3) -> VectorStore:
-        self.embeddings = HuggingFaceEmbeddings(
-            model_name="Alibaba-NLP/gte-multilingual-base",
-            model_kwargs={
-                'device': 'cpu',  # Dùng 'cuda' nếu có GPU
-                'trust_remote_code': True  # Required for Alibaba GTE models
-            },
-            encode_kwargs={'normalize_embeddings': True}  # Normalize embeddings
-        )
-        #self.embeddings = GoogleGenerativeAIEmbeddings(model="models/embedding-001")
-        self.vector_store = PineconeVectorStore(
-            index_name="school-info",
-            embedding=self.embeddings
-        )
-        self.retriever = self.vector_store.as_retriever(
-            search_type="similarity_score_threshold",
-            search_kwargs={"k": k, "score_threshold": score_threshold},
-        )
+def create_embeddings():
+    """Embedding model selected by EMBEDDINGS_PROVIDER (huggingface | fake), with cached query embeddings."""
+    embeddings, model = _create_embedding_model()
+    if os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() != "true":
+        return embeddings
+    return CachedEmbeddings(
+        embeddings,
+        cache,
+        model=model,
+        ttl_seconds=float(os.getenv("EMBEDDING_CACHE_TTL", "86400")),
+    )
 
-    async def search(self, query: str, filter: Optional[Dict[str, Any]] = None):
-        return await self.retriever.ainvoke(query, filter=filter)
+def _create_embedding_model():
+    provider = os.getenv("EMBEDDINGS_PROVIDER", "huggingface").lower()
+    if provider == "fake":
+        # Deterministic hash-based vectors for offline benchmarks; no model download
+        size = int(os.getenv("FAKE_EMBEDDINGS_SIZE", "768"))
+        return DeterministicFakeEmbedding(size=size), f"fake-{size}"
+    if provider != "huggingface":
+        raise ValueError(f"Unsupported EMBEDDINGS_PROVIDER: {provider}")
+    return HuggingFaceEmbeddings(
+        model_name="Alibaba-NLP/gte-multilingual-base",
+        model_kwargs={
+            'device': 'cpu',  # Dùng 'cuda' nếu có GPU
+            'trust_remote_code': True  # Required for Alibaba GTE models
+        },
+        encode_kwargs={'normalize_embeddings': True}  # Normalize embeddings
+    ), "Alibaba-NLP/gte-multilingual-base"
+    #return GoogleGenerativeAIEmbeddings(model="models/embedding-001")
 
-    async def add_documents(self, documents: List[Document], ids: List[str]):
-        await self.vector_store.aadd_documents(documents, ids=ids)
+def create_vector_store_crud(k: int = 3, score_threshold: float = 0.3) -> VectorStoreCRUD:
+    """Create the vector store backend selected by VECTOR_STORE_BACKEND (pinecone | local)."""
+    backend = os.getenv("VECTOR_STORE_BACKEND", "pinecone").lower()
+    embeddings = create_embeddings()
+    options = {
+        "k": k,
+        "score_threshold": score_threshold,
+        "keyword_index": BM25Index(os.getenv("BM25_INDEX_PATH", "data/bm25_index.sqlite")),
+        "search_mode": os.getenv("RETRIEVAL_MODE", "dense").lower(),
+        "rrf_k": int(os.getenv("RRF_K", "60")),
+        "candidate_k": int(os.getenv("HYBRID_CANDIDATES", "20")),
+    }
 
-    async def get_documents(self, filter: Optional[Dict[str, Any]] = None):
-        return await self.vector_store.asimilarity_search("", 10000, filter=filter)
-
-    async def delete_documents(self, ids: List[str]):
-        await self.vector_store.adelete(ids=ids)
+    if backend == "pinecone":
+        return PineconeVectorStoreCRUD(embeddings, **options)
+    if backend == "local":
+        return LocalVectorStoreCRUD(
+            embeddings,
+            directory=os.getenv("LOCAL_VECTOR_STORE_DIR", "data/vector_store"),
+            index_type=os.getenv("LOCAL_VECTOR_STORE_INDEX", "flat"),
+            **options,
+        )
+    raise ValueError(f"Unsupported VECTOR_STORE_BACKEND: {backend}")
 
-vector_store_crud = VectorStoreCRUD()
\ No newline at end of file
+vector_store_crud = create_vector_store_crud()
+document_manifest = DocumentManifest(os.getenv("DOCUMENT_MANIFEST_PATH", "data/manifest.sqlite"))
+ingestion_jobs = IngestionJobManager(
+    vector_store_crud,
+    document_manifest,
+    workers=int(os.getenv("INGESTION_WORKERS", "2")),
+    batch_size=int(os.getenv("EMBEDDING_BATCH_SIZE", "64")),
+    upsert_concurrency=int(os.getenv("UPSERT_CONCURRENCY", "4")),
+    store=IngestionJobStore(os.getenv("INGESTION_JOBS_PATH", document_manifest.path)),
+)
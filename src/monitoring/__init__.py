@@ -0,0 +1,18 @@
+"""
+Monitoring package for the AI service.
+Contains in-process latency tracking for the chat hot path and the
+Prometheus metrics served at /metrics.
+"""
+
+from .latency import LatencyTracker, ttft_tracker
+from .metrics import MetricsRegistry, metrics
+from .instrumentation import TurnMetricsHandler, instrument_node
+
+__all__ = [
+    'LatencyTracker',
+    'ttft_tracker',
+    'MetricsRegistry',
+    'metrics',
+    'TurnMetricsHandler',
+    'instrument_node',
+]
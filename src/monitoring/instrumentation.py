@@ -0,0 +1,82 @@
+import functools
+import time
+from typing import Any, Dict, Optional, Tuple
+from uuid import UUID
+from langchain_core.callbacks import AsyncCallbackHandler
+from src.monitoring.metrics import metrics, node_duration, react_step_duration, tool_duration
+
+# Steps beyond this share one label value, to bound the label cardinality
+MAX_STEP_LABEL = 5
+
+
+def instrument_node(name: str, node):
+    """Wrap an async graph node to record its duration; a no-op when metrics are disabled."""
+    if not metrics.enabled:
+        return node
+
+    # functools.wraps keeps the signature LangGraph inspects to decide whether to pass the config
+    @functools.wraps(node)
+    async def timed(*args, **kwargs):
+        started = time.perf_counter()
+        status = "error"
+        try:
+            result = await node(*args, **kwargs)
+            status = "ok"
+            return result
+        finally:
+            node_duration.observe(time.perf_counter() - started, node=name, status=status)
+
+    return timed
+
+
+def step_label(step: int) -> str:
+    return str(step) if step < MAX_STEP_LABEL else f"{MAX_STEP_LABEL}+"
+
+
+class TurnMetricsHandler(AsyncCallbackHandler):
+    """Per-turn callback handler: duration of each agent's nth model call and of every tool call.
+
+    Attach one instance to the config of a graph run; ``tool_calls`` is the
+    number of tool calls the turn made.
+    """
+
+    def __init__(self):
+        self.tool_calls = 0
+        self._steps: Dict[str, int] = {}
+        self._model_runs: Dict[UUID, Tuple[str, str, float]] = {}
+        self._tool_runs: Dict[UUID, Tuple[str, float]] = {}
+
+    @staticmethod
+    def _agent(metadata: Optional[Dict[str, Any]]) -> str:
+        metadata = metadata or {}
+        # The outermost graph node: the agent for calls inside a ReAct subgraph
+        namespace = metadata.get("langgraph_checkpoint_ns", "")
+        return namespace.split(":")[0] if namespace else metadata.get("langgraph_node", "unknown")
+
+    async def on_chat_model_start(self, serialized, messages, *, run_id: UUID, metadata=None, **kwargs):
+        agent = self._agent(metadata)
+        self._steps[agent] = self._steps.get(agent, 0) + 1
+        self._model_runs[run_id] = (agent, step_label(self._steps[agent]), time.perf_counter())
+
+    async def on_llm_end(self, response, *, run_id: UUID, **kwargs):
+        run = self._model_runs.pop(run_id, None)
+        if run is not None:
+            react_step_duration.observe(time.perf_counter() - run[2], agent=run[0], step=run[1])
+
+    async def on_llm_error(self, error, *, run_id: UUID, **kwargs):
+        self._model_runs.pop(run_id, None)
+
+    async def on_tool_start(self, serialized, input_str, *, run_id: UUID, **kwargs):
+        self.tool_calls += 1
+        name = kwargs.get("name") or (serialized or {}).get("name", "unknown")
+        self._tool_runs[run_id] = (name, time.perf_counter())
+
+    async def on_tool_end(self, output, *, run_id: UUID, **kwargs):
+        run = self._tool_runs.pop(run_id, None)
+        if run is not None:
+            tool_duration.observe(time.perf_counter() - run[1], tool=run[0], status="ok")
+
+    async def on_tool_error(self, error, *, run_id: UUID, **kwargs):
+        run = self._tool_runs.pop(run_id, None)
+        if run is not None:
+            tool_duration.observe(time.perf_counter() - run[1], tool=run[0], status="error")
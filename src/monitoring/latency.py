@@ -0,0 +1,38 @@
+from collections import deque
+from typing import Dict, Deque, Any
+import math
+
+
+class LatencyTracker:
+    """Rolling window of latency samples per label with percentile summaries."""
+
+    def __init__(self, window: int = 1000):
+        self.window = window
+        self._samples: Dict[str, Deque[float]] = {}
+        self._counts: Dict[str, int] = {}
+
+    def record(self, label: str, seconds: float):
+        self._samples.setdefault(label, deque(maxlen=self.window)).append(seconds)
+        self._counts[label] = self._counts.get(label, 0) + 1
+
+    def percentile(self, label: str, p: float) -> float:
+        samples = sorted(self._samples.get(label, ()))
+        if not samples:
+            return 0.0
+        index = max(0, math.ceil(p / 100 * len(samples)) - 1)
+        return samples[index]
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            label: {
+                "count": self._counts[label],
+                "window": len(samples),
+                "p50_ms": round(self.percentile(label, 50) * 1000, 1),
+                "p99_ms": round(self.percentile(label, 99) * 1000, 1),
+            }
+            for label, samples in self._samples.items()
+        }
+
+
+# Time to first streamed token of /chatbot/stream, labelled by turn type
+ttft_tracker = LatencyTracker()
@@ -0,0 +1,232 @@
+import bisect
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Seconds; covers a fast tool call up to a long ReAct turn
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric(ABC):
+    kind = ""
+
+    def __init__(self, registry: "MetricsRegistry", name: str, help: str, labels: Tuple[str, ...]):
+        self.registry = registry
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labels)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"] + self._samples()
+
+    @abstractmethod
+    def _samples(self) -> List[str]:
+        """Sample lines in the Prometheus text format."""
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        if not self.registry.enabled:
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}" for key, value in items]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def set(self, value: float, **labels):
+        if not self.registry.enabled:
+            return
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1.0, **labels):
+        if not self.registry.enabled:
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}" for key, value in items]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, *args, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(*args)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts (last is +Inf), sum]
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels):
+        if not self.registry.enabled:
+            return
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of the block, also when it raises."""
+        if not self.registry.enabled:
+            yield
+            return
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, (list(series[0]), series[1])) for key, series in self._series.items())
+        lines = []
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """In-process metrics rendered in the Prometheus text exposition format.
+
+    With ``enabled`` off every record call returns immediately, so the
+    instrumentation can stay on the hot path.
+    """
+
+    def __init__(self, enabled: bool = True, namespace: str = ""):
+        self.enabled = enabled
+        self.namespace = namespace
+        self._metrics: Dict[str, _Metric] = {}
+
+    def _register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric already registered: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def _name(self, name: str) -> str:
+        return f"{self.namespace}_{name}" if self.namespace else name
+
+    def counter(self, name: str, help: str, labels: Tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(self, self._name(name), help, labels))
+
+    def gauge(self, name: str, help: str, labels: Tuple[str, ...] = ()) -> Gauge:
+        return self._register(Gauge(self, self._name(name), help, labels))
+
+    def histogram(self, name: str, help: str, labels: Tuple[str, ...] = (), buckets: Optional[Tuple[float, ...]] = None) -> Histogram:
+        return self._register(Histogram(self, self._name(name), help, labels, buckets=buckets or DEFAULT_BUCKETS))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry(
+    enabled=os.getenv("METRICS_ENABLED", "false").lower() == "true",
+    namespace=os.getenv("METRICS_NAMESPACE", "ai_service"),
+)
+
+# Graph and turn
+node_duration = metrics.histogram("graph_node_duration_seconds", "Duration of a graph node run.", ("node", "status"))
+turn_duration = metrics.histogram("chat_turn_duration_seconds", "Duration of a /chatbot/stream turn.", ("status",))
+react_step_duration = metrics.histogram(
+    "react_step_duration_seconds", "Duration of the nth model call of an agent within a turn.", ("agent", "step")
+)
+tool_calls_per_turn = metrics.histogram(
+    "tool_calls_per_turn", "Tool calls made during one turn.", buckets=(0, 1, 2, 3, 4, 6, 8, 12)
+)
+
+# Tools
+tool_duration = metrics.histogram("tool_duration_seconds", "Duration of a tool call.", ("tool", "status"))
+
+# LLM
+llm_request_duration = metrics.histogram("llm_request_duration_seconds", "Duration of a provider call.", ("node", "status"))
+llm_tokens = metrics.counter("llm_tokens_total", "LLM tokens by node and direction (input/output).", ("node", "direction"))
+
+# Postgres connection pool
+pool_wait = metrics.histogram(
+    "db_pool_wait_seconds", "Time spent waiting for a connection from the checkpointer pool.",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0),
+)
+pool_connections = metrics.gauge("db_pool_connections", "Checkpointer pool connections by state.", ("state",))
+
+# Auth
+auth_duration = metrics.histogram("auth_duration_seconds", "Duration of token validation.", ("status",))
+
+# Admission control of /chatbot/stream
+admission_queue_depth = metrics.gauge("admission_queue_depth", "Chat turns waiting for an admission slot.")
+admission_in_flight = metrics.gauge("admission_in_flight", "Chat turns holding an admission slot.")
+admission_wait = metrics.histogram(
+    "admission_wait_seconds", "Time a chat turn waited for admission.", ("outcome",),
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+admission_rejected = metrics.counter("admission_rejected_total", "Chat turns rejected with 429.", ("reason",))
+
+# Cache backend (src/cache)
+cache_requests = metrics.counter(
+    "cache_requests_total", "Cache lookups (hit / miss) and failed backend calls (error).", ("backend", "namespace", "result")
+)
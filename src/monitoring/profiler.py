@@ -0,0 +1,133 @@
+import cProfile
+import io
+import os
+import pstats
+import re
+import sys
+import sysconfig
+import threading
+import time
+from collections import Counter
+from typing import Optional
+from uuid import uuid4
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Both the admin sampling endpoint and the per-request cProfile header
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+# Shared secret for the X-Profile-Token header; per-request profiling is off without it
+PROFILING_TOKEN = os.getenv("PROFILING_TOKEN", "")
+PROFILING_MAX_SECONDS = float(os.getenv("PROFILING_MAX_SECONDS", "60"))
+PROFILE_OUTPUT_DIR = os.getenv("PROFILE_OUTPUT_DIR", "data/profiles")
+
+_STDLIB = sysconfig.get_paths()["stdlib"]
+# Leaf frames of threads that are blocked rather than running Python code
+_IDLE_FUNCTIONS = {"wait", "select", "poll", "accept", "get", "_wait_for_tstate_lock", "sleep"}
+_PROFILE_ID = re.compile(r"^[0-9a-f]{32}$")
+
+
+class ProfilerBusy(Exception):
+    """Another profile is already running in this process."""
+
+
+def _frame_label(code) -> str:
+    return f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})"
+
+
+def _is_idle(code) -> bool:
+    return code.co_name in _IDLE_FUNCTIONS and code.co_filename.startswith(_STDLIB)
+
+
+class SamplingProfiler:
+    """Statistical profiler over every thread of the process, event loop included.
+
+    A background thread reads ``sys._current_frames()`` every ``interval``
+    seconds; the profiled code is never paused beyond the GIL hand-off, so it
+    is safe on a live worker. Only one profile runs at a time.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    def sample(self, seconds: float, interval: float = 0.01, include_idle: bool = False) -> Counter:
+        """Collapsed stacks ("thread;outer;...;leaf") -> number of samples."""
+        if not self._lock.acquire(blocking=False):
+            raise ProfilerBusy("A profile is already running")
+        try:
+            own = threading.get_ident()
+            counts: Counter = Counter()
+            deadline = time.monotonic() + seconds
+            while time.monotonic() < deadline:
+                names = {thread.ident: thread.name for thread in threading.enumerate()}
+                for ident, frame in sys._current_frames().items():
+                    if ident == own or (not include_idle and _is_idle(frame.f_code)):
+                        continue
+                    stack = []
+                    while frame is not None:
+                        stack.append(_frame_label(frame.f_code))
+                        frame = frame.f_back
+                    stack.append(names.get(ident, str(ident)))
+                    counts[";".join(reversed(stack))] += 1
+                time.sleep(interval)
+            return counts
+        finally:
+            self._lock.release()
+
+    @staticmethod
+    def collapsed(counts: Counter) -> str:
+        """Brendan Gregg's collapsed-stack format, the input of flamegraph.pl, speedscope and inferno."""
+        return "".join(f"{stack} {count}\n" for stack, count in sorted(counts.items()))
+
+
+sampling_profiler = SamplingProfiler()
+
+
+class RequestProfiler:
+    """cProfile runs of single requests, saved as .prof files under ``directory``.
+
+    cProfile hooks the event loop thread, so coroutines of other requests that
+    run during the profiled one are included; calls made in worker threads
+    (asyncio.to_thread) are not. One request is profiled at a time.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._lock = threading.Lock()
+
+    def start(self) -> Optional[cProfile.Profile]:
+        """An enabled profiler, or None if another request is being profiled."""
+        if not self._lock.acquire(blocking=False):
+            return None
+        profiler = cProfile.Profile()
+        profiler.enable()
+        return profiler
+
+    def stop(self, profiler: cProfile.Profile):
+        profiler.disable()
+        self._lock.release()
+
+    def path(self, profile_id: str) -> str:
+        if not _PROFILE_ID.match(profile_id):
+            raise ValueError(f"Invalid profile id: {profile_id}")
+        return os.path.join(self.directory, f"{profile_id}.prof")
+
+    @staticmethod
+    def new_id() -> str:
+        return uuid4().hex
+
+    def save(self, profiler: cProfile.Profile, profile_id: str):
+        os.makedirs(self.directory, exist_ok=True)
+        profiler.dump_stats(self.path(profile_id))
+
+    def report(self, profile_id: str, sort: str = "cumulative", limit: int = 50) -> str:
+        """pstats text of a saved profile; raises FileNotFoundError if it does not exist."""
+        path = self.path(profile_id)
+        if not os.path.exists(path):
+            raise FileNotFoundError(path)
+        output = io.StringIO()
+        pstats.Stats(path, stream=output).sort_stats(sort).print_stats(limit)
+        return output.getvalue()
+
+
+request_profiler = RequestProfiler(PROFILE_OUTPUT_DIR)
@@ -0,0 +1,203 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence
+from dotenv import load_dotenv
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import BaseCheckpointSaver, ChannelVersions, Checkpoint, CheckpointMetadata, CheckpointTuple
+
+load_dotenv()
+
+# Let clients ask for a trace with debug=true; off means the flag is ignored
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "true").lower() == "true"
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 2)
+
+
+class TurnTrace:
+    """Timeline of one chat turn: graph nodes, tools, LLM calls and checkpoint I/O.
+
+    Every event carries ``t_ms``, the offset from the start of the request, and
+    end events carry ``duration_ms``. Events are queued until ``drain`` so the
+    stream can interleave them with the answer.
+    """
+
+    def __init__(self, started_at: float):
+        self.started_at = started_at
+        self.events: List[Dict[str, Any]] = []
+        self._pending: List[Dict[str, Any]] = []
+        self._starts: Dict[str, float] = {}
+        self._streaming: set = set()
+
+    def record(self, event: str, name: str, duration: Optional[float] = None, **fields) -> Dict[str, Any]:
+        item = {"type": "trace", "event": event, "name": name, "t_ms": _ms(time.perf_counter() - self.started_at)}
+        if duration is not None:
+            item["duration_ms"] = _ms(duration)
+        item.update(fields)
+        self.events.append(item)
+        self._pending.append(item)
+        return item
+
+    def drain(self) -> List[Dict[str, Any]]:
+        pending, self._pending = self._pending, []
+        return pending
+
+    def _start(self, run_id: str, event: str, name: str, **fields):
+        self._starts[run_id] = time.perf_counter()
+        self.record(event, name, **fields)
+
+    def _end(self, run_id: str, event: str, name: str, **fields):
+        started = self._starts.pop(run_id, None)
+        self.record(event, name, time.perf_counter() - started if started is not None else None, **fields)
+
+    def observe(self, event: dict):
+        """Record the timing events found in one ``astream_events`` (v2) event."""
+        kind = event["event"]
+        metadata = event.get("metadata", {})
+        run_id = str(event.get("run_id", ""))
+        # The outermost graph node: the agent for steps inside a ReAct subgraph
+        namespace = metadata.get("langgraph_checkpoint_ns", "")
+        fields = {"agent": namespace.split(":")[0]} if namespace else {}
+
+        if kind in ("on_chain_start", "on_chain_end") and event["name"] == metadata.get("langgraph_node"):
+            if kind == "on_chain_start":
+                self._start(run_id, "node_start", event["name"], **fields)
+            else:
+                self._end(run_id, "node_end", event["name"], **fields)
+        elif kind == "on_tool_start":
+            self._start(run_id, "tool_start", event["name"], **fields)
+        elif kind in ("on_tool_end", "on_tool_error"):
+            self._end(run_id, "tool_end", event["name"], status="ok" if kind == "on_tool_end" else "error", **fields)
+        elif kind == "on_chat_model_start":
+            self._start(run_id, "llm_start", metadata.get("langgraph_node", event["name"]), **fields)
+        elif kind == "on_chat_model_stream" and run_id not in self._streaming:
+            self._streaming.add(run_id)
+            started = self._starts.get(run_id)
+            self.record(
+                "llm_first_token", metadata.get("langgraph_node", event["name"]),
+                time.perf_counter() - started if started is not None else None, **fields,
+            )
+        elif kind == "on_chat_model_end":
+            self._streaming.discard(run_id)
+            self._end(run_id, "llm_last_token", metadata.get("langgraph_node", event["name"]), **fields)
+
+    def finish(self, status: str) -> Dict[str, Any]:
+        return self.record("turn_end", "turn", time.perf_counter() - self.started_at, status=status)
+
+
+class TracedCheckpointer(BaseCheckpointSaver):
+    """Delegates to another checkpointer and records the duration of its reads and writes in a trace."""
+
+    def __init__(self, inner: BaseCheckpointSaver, trace: TurnTrace):
+        super().__init__(serde=inner.serde)
+        self.inner = inner
+        self.trace = trace
+
+    @property
+    def config_specs(self):
+        return self.inner.config_specs
+
+    def get_next_version(self, current, channel):
+        return self.inner.get_next_version(current, channel)
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        started = time.perf_counter()
+        result = await self.inner.aget_tuple(config)
+        self.trace.record("checkpoint_read", "aget_tuple", time.perf_counter() - started, found=result is not None)
+        return result
+
+    async def alist(self, config, *, filter=None, before=None, limit=None) -> AsyncIterator[CheckpointTuple]:
+        async for item in self.inner.alist(config, filter=filter, before=before, limit=limit):
+            yield item
+
+    async def aput(
+        self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata, new_versions: ChannelVersions
+    ) -> RunnableConfig:
+        started = time.perf_counter()
+        result = await self.inner.aput(config, checkpoint, metadata, new_versions)
+        self.trace.record("checkpoint_write", "aput", time.perf_counter() - started, step=metadata.get("step"))
+        return result
+
+    async def aput_writes(self, config: RunnableConfig, writes: Sequence, task_id: str, task_path: str = "") -> None:
+        started = time.perf_counter()
+        await self.inner.aput_writes(config, writes, task_id, task_path)
+        self.trace.record("checkpoint_write", "aput_writes", time.perf_counter() - started, writes=len(writes))
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await self.inner.adelete_thread(thread_id)
+
+    def get_tuple(self, config):
+        return self.inner.get_tuple(config)
+
+    def list(self, config, *, filter=None, before=None, limit=None):
+        return self.inner.list(config, filter=filter, before=before, limit=limit)
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        return self.inner.put(config, checkpoint, metadata, new_versions)
+
+    def put_writes(self, config, writes, task_id, task_path=""):
+        return self.inner.put_writes(config, writes, task_id, task_path)
+
+    def delete_thread(self, thread_id):
+        return self.inner.delete_thread(thread_id)
+
+
+class TraceStore:
+    """Local SQLite store of turn traces, keeping the latest ``retention_turns`` per conversation."""
+
+    def __init__(self, path: str, retention_turns: int = 50):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.retention_turns = retention_turns
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS traces (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                conversation_id TEXT NOT NULL,
+                user_id TEXT NOT NULL,
+                created_at TEXT NOT NULL,
+                events TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_traces_conversation ON traces (conversation_id, id);
+            """
+        )
+
+    def save(self, conversation_id: str, user_id: str, events: List[Dict[str, Any]]):
+        created_at = datetime.now(timezone.utc).isoformat()
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO traces (conversation_id, user_id, created_at, events) VALUES (?, ?, ?, ?)",
+                (conversation_id, str(user_id), created_at, json.dumps(events, ensure_ascii=False)),
+            )
+            self._db.execute(
+                "DELETE FROM traces WHERE conversation_id = ? AND id NOT IN "
+                "(SELECT id FROM traces WHERE conversation_id = ? ORDER BY id DESC LIMIT ?)",
+                (conversation_id, conversation_id, self.retention_turns),
+            )
+            self._db.commit()
+
+    def list(self, conversation_id: str, user_id: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """Latest traces of a conversation that belong to ``user_id``, newest first."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id, created_at, events FROM traces WHERE conversation_id = ? AND user_id = ? "
+                "ORDER BY id DESC LIMIT ?",
+                (conversation_id, str(user_id), limit),
+            ).fetchall()
+        return [
+            {"trace_id": trace_id, "created_at": created_at, "events": json.loads(events)}
+            for trace_id, created_at, events in rows
+        ]
+
+
+trace_store = TraceStore(
+    os.getenv("TRACE_STORE_PATH", "data/traces.sqlite"),
+    retention_turns=int(os.getenv("TRACE_RETENTION_TURNS", "50")),
+)
@@ -0,0 +1,33 @@
+"""
+Retrieval package for the school knowledge base.
+Contains the vector store backends used by the RAG agent.
+"""
+
+from .base import VectorStoreCRUD, SEARCH_MODES
+from .bm25 import BM25Index, tokenize
+from .fusion import reciprocal_rank_fusion
+from .manifest import DocumentManifest, content_hash
+from .ingestion import IngestionResult, chunk_id, load_and_split, ingest_chunks
+from .jobs import IngestionJob, IngestionJobManager, IngestionJobStore, FileProgress
+from .pinecone_store import PineconeVectorStoreCRUD
+from .local_store import LocalVectorStoreCRUD
+
+__all__ = [
+    'VectorStoreCRUD',
+    'SEARCH_MODES',
+    'BM25Index',
+    'tokenize',
+    'reciprocal_rank_fusion',
+    'DocumentManifest',
+    'content_hash',
+    'IngestionResult',
+    'chunk_id',
+    'load_and_split',
+    'ingest_chunks',
+    'IngestionJob',
+    'IngestionJobManager',
+    'IngestionJobStore',
+    'FileProgress',
+    'PineconeVectorStoreCRUD',
+    'LocalVectorStoreCRUD',
+]
@@ -0,0 +1,154 @@
+import asyncio
+from abc import ABC, abstractmethod
+from typing import Awaitable, Callable, List, Dict, Any, Optional
+from langchain.schema import Document
+from langchain_core.embeddings import Embeddings
+from loguru import logger
+from src.retrieval.bm25 import BM25Index
+from src.retrieval.fusion import reciprocal_rank_fusion
+
+SEARCH_MODES = ("dense", "hybrid")
+DELETE_BATCH_SIZE = 1000
+
+
+class VectorStoreCRUD(ABC):
+    """Backend-independent interface for the school knowledge base vector store.
+
+    Backends implement dense search and storage; this class adds the optional
+    BM25 keyword index, kept in sync on add/delete, and hybrid search that fuses
+    both rankings with reciprocal-rank fusion. Every chunk hybrid search returns
+    meets the dense score threshold, keyword-only hits included.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        k: int = 3,
+        score_threshold: float = 0.3,
+        keyword_index: Optional[BM25Index] = None,
+        search_mode: str = "dense",
+        rrf_k: int = 60,
+        candidate_k: int = 20,
+    ):
+        if search_mode not in SEARCH_MODES:
+            raise ValueError(f"Unsupported search mode: {search_mode}")
+        self.embeddings = embeddings
+        self.k = k
+        self.score_threshold = score_threshold
+        self.keyword_index = keyword_index
+        self.search_mode = search_mode
+        self.rrf_k = rrf_k
+        self.candidate_k = candidate_k
+        # Bumped on every write so caches derived from the store can detect changes
+        self.version = 0
+        self._change_listeners: List[Callable[[], Awaitable[Any]]] = []
+
+    @abstractmethod
+    async def dense_search(self, query: str, k: int, filter: Optional[Dict[str, Any]] = None) -> List[Document]:
+        """Return up to k chunks whose similarity is above the score threshold, best first."""
+
+    @abstractmethod
+    async def relevance_scores(self, query: str, ids: List[str]) -> Dict[str, float]:
+        """Relevance of the given chunks to the query, on the scale of the score threshold; unknown ids are left out."""
+
+    @abstractmethod
+    async def _add_embeddings(self, documents: List[Document], ids: List[str], vectors: List[List[float]]):
+        """Upsert chunks with precomputed embeddings under the given ids."""
+
+    @abstractmethod
+    async def get_documents(self, filter: Optional[Dict[str, Any]] = None) -> List[Document]:
+        """Return the stored chunks matching the metadata filter."""
+
+    @abstractmethod
+    async def get_documents_by_ids(self, ids: List[str]) -> List[Document]:
+        """Fetch chunks by id, skipping ids that are not stored."""
+
+    @abstractmethod
+    async def _delete_documents(self, ids: List[str]):
+        """Delete chunks by id."""
+
+    @abstractmethod
+    async def _delete_all(self):
+        """Delete every chunk in the store."""
+
+    def add_change_listener(self, listener: Callable[[], Awaitable[Any]]):
+        """Await ``listener()`` after every write, e.g. to invalidate a cache shared with other workers."""
+        self._change_listeners.append(listener)
+
+    async def _changed(self):
+        self.version += 1
+        for listener in self._change_listeners:
+            try:
+                await listener()
+            except Exception as e:
+                logger.error(f"Vector store change listener failed: {e}")
+
+    async def search(self, query: str, filter: Optional[Dict[str, Any]] = None, mode: Optional[str] = None) -> List[Document]:
+        mode = mode or self.search_mode
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Unsupported search mode: {mode}")
+        if mode == "dense" or self.keyword_index is None or not len(self.keyword_index):
+            return await self.dense_search(query, self.k, filter=filter)
+
+        dense_docs, keyword_hits = await asyncio.gather(
+            self.dense_search(query, self.candidate_k, filter=filter),
+            asyncio.to_thread(self.keyword_index.search, query, self.candidate_k, filter),
+        )
+        documents = {doc.id: doc for doc in dense_docs}
+        # Dense hits passed the score threshold already; keyword-only hits must pass it too
+        keyword_only = [chunk_id for chunk_id, _ in keyword_hits if chunk_id not in documents]
+        if keyword_only:
+            relevance = await self.relevance_scores(query, keyword_only)
+            keyword_hits = [
+                (chunk_id, score) for chunk_id, score in keyword_hits
+                if chunk_id in documents or relevance.get(chunk_id, float("-inf")) >= self.score_threshold
+            ]
+        fused = reciprocal_rank_fusion(
+            [[doc.id for doc in dense_docs], [chunk_id for chunk_id, _ in keyword_hits]],
+            k=self.rrf_k,
+        )
+
+        results = []
+        for chunk_id, _ in fused:
+            doc = documents.get(chunk_id) or self.keyword_index.get_document(chunk_id)
+            if doc is not None:
+                results.append(doc)
+            if len(results) == self.k:
+                break
+        return results
+
+    async def add_documents(self, documents: List[Document], ids: List[str]):
+        if not documents:
+            return
+        vectors = await self.embeddings.aembed_documents([doc.page_content for doc in documents])
+        await self.add_embeddings(documents, ids, vectors)
+
+    async def add_embeddings(self, documents: List[Document], ids: List[str], vectors: List[List[float]]):
+        """Upsert chunks whose embeddings were computed by the caller (e.g. in batches)."""
+        await self._add_embeddings(documents, ids, vectors)
+        await self._changed()
+        if self.keyword_index is not None:
+            await asyncio.to_thread(self.keyword_index.add, documents, ids)
+
+
+    async def delete_documents(self, ids: List[str]):
+        for start in range(0, len(ids), DELETE_BATCH_SIZE):
+            batch = ids[start:start + DELETE_BATCH_SIZE]
+            await self._delete_documents(batch)
+            await self._changed()
+            if self.keyword_index is not None:
+                await asyncio.to_thread(self.keyword_index.remove, batch)
+
+    async def delete_all(self):
+        await self._delete_all()
+        await self._changed()
+        if self.keyword_index is not None:
+            await asyncio.to_thread(self.keyword_index.clear)
+
+    async def rebuild_keyword_index(self) -> int:
+        """Rebuild the BM25 index from every chunk in the store; returns the chunk count."""
+        if self.keyword_index is None:
+            return 0
+        documents = await self.get_documents()
+        await asyncio.to_thread(self.keyword_index.replace, documents, [doc.id for doc in documents])
+        return len(documents)
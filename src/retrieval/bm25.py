@@ -0,0 +1,239 @@
+import json
+import math
+import os
+import re
+import sqlite3
+import threading
+import unicodedata
+from collections import Counter
+from contextlib import contextmanager
+from typing import List, Dict, Any, Optional, Tuple
+from langchain.schema import Document
+
+# Keep codes and amounts such as "SWP391", "28.700.000" or "QĐ-123/2024" as single tokens
+TOKEN_PATTERN = re.compile(r"\w+(?:[.,/-]\w+)*")
+TOKEN_SEPARATORS = re.compile(r"[.,/-]")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase, NFC-normalised word tokens.
+
+    Compound tokens also emit their separator-free form and their parts, so
+    "SWP391/2024" matches queries for "swp391/2024", "swp3912024" and "swp391".
+    """
+    text = unicodedata.normalize("NFC", text).lower()
+    tokens = []
+    for token in TOKEN_PATTERN.findall(text):
+        tokens.append(token)
+        if TOKEN_SEPARATORS.search(token):
+            tokens.append(TOKEN_SEPARATORS.sub("", token))
+            tokens.extend(part for part in TOKEN_SEPARATORS.split(token) if part)
+    return tokens
+
+
+class BM25Index:
+    """Inverted-index BM25 over chunk texts, persisted in SQLite.
+
+    The index also keeps each chunk's text and metadata so keyword-only hits can
+    be returned without a round trip to the vector store. Adding or removing
+    chunks writes only their rows, and every search reads the file, so the
+    workers of a host share one index: a chunk indexed by one is found by all,
+    and concurrent writers do not lose each other's updates. Without a path the
+    index lives in memory.
+    """
+
+    def __init__(self, path: Optional[str] = None, k1: float = 1.5, b: float = 0.75):
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.Lock()
+        if path:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # Autocommit: writes open their own BEGIN IMMEDIATE transactions
+        self._db = sqlite3.connect(path or ":memory:", check_same_thread=False, isolation_level=None)
+        if path:
+            # Searches in other workers keep reading while one worker writes
+            self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS bm25_documents (
+                chunk_id TEXT PRIMARY KEY,
+                text TEXT NOT NULL,
+                metadata TEXT NOT NULL,
+                length INTEGER NOT NULL
+            );
+            -- length repeats the chunk's length so a search reads postings only
+            CREATE TABLE IF NOT EXISTS bm25_postings (
+                term TEXT NOT NULL,
+                chunk_id TEXT NOT NULL,
+                tf INTEGER NOT NULL,
+                length INTEGER NOT NULL,
+                PRIMARY KEY (term, chunk_id)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS idx_bm25_postings_chunk ON bm25_postings (chunk_id);
+            CREATE TABLE IF NOT EXISTS bm25_stats (
+                id INTEGER PRIMARY KEY CHECK (id = 0),
+                documents INTEGER NOT NULL,
+                total_length INTEGER NOT NULL
+            );
+            INSERT OR IGNORE INTO bm25_stats (id, documents, total_length) VALUES (0, 0, 0);
+            """
+        )
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT documents FROM bm25_stats").fetchone()[0]
+
+    @contextmanager
+    def _write(self):
+        """One write transaction; BEGIN IMMEDIATE makes writers of other workers queue instead of failing."""
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                yield
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            self._db.execute("COMMIT")
+
+    def add(self, documents: List[Document], ids: List[str]):
+        """Index chunks, replacing those already indexed under the same ids."""
+        with self._write():
+            self._remove(ids)
+            self._add(documents, ids)
+
+    def remove(self, ids: List[str]):
+        with self._write():
+            self._remove(ids)
+
+    def replace(self, documents: List[Document], ids: List[str]):
+        """Rebuild the index from the given chunks; searches see the old or the new index, never a mix."""
+        with self._write():
+            self._clear()
+            self._add(documents, ids)
+
+    def clear(self):
+        with self._write():
+            self._clear()
+
+    def _clear(self):
+        self._db.execute("DELETE FROM bm25_postings")
+        self._db.execute("DELETE FROM bm25_documents")
+        self._db.execute("UPDATE bm25_stats SET documents = 0, total_length = 0")
+
+    def _add(self, documents: List[Document], ids: List[str]):
+        rows = {}
+        for chunk_id, doc in zip(ids, documents):
+            # The last copy of a repeated id wins, as with an upsert
+            term_counts = Counter(tokenize(doc.page_content))
+            rows[chunk_id] = (doc, term_counts, sum(term_counts.values()))
+        self._db.executemany(
+            "INSERT INTO bm25_documents (chunk_id, text, metadata, length) VALUES (?, ?, ?, ?)",
+            [
+                (chunk_id, doc.page_content, json.dumps(doc.metadata, ensure_ascii=False, default=str), length)
+                for chunk_id, (doc, _, length) in rows.items()
+            ],
+        )
+        self._db.executemany(
+            "INSERT INTO bm25_postings (term, chunk_id, tf, length) VALUES (?, ?, ?, ?)",
+            [
+                (term, chunk_id, count, length)
+                for chunk_id, (_, term_counts, length) in rows.items()
+                for term, count in term_counts.items()
+            ],
+        )
+        self._db.execute(
+            "UPDATE bm25_stats SET documents = documents + ?, total_length = total_length + ?",
+            (len(rows), sum(length for _, _, length in rows.values())),
+        )
+
+    def _remove(self, ids: List[str]):
+        for start in range(0, len(ids), 500):
+            batch = list(dict.fromkeys(ids[start:start + 500]))
+            placeholders = ", ".join("?" * len(batch))
+            removed, length = self._db.execute(
+                f"SELECT COUNT(*), COALESCE(SUM(length), 0) FROM bm25_documents WHERE chunk_id IN ({placeholders})",
+                batch,
+            ).fetchone()
+            if not removed:
+                continue
+            self._db.execute(f"DELETE FROM bm25_postings WHERE chunk_id IN ({placeholders})", batch)
+            self._db.execute(f"DELETE FROM bm25_documents WHERE chunk_id IN ({placeholders})", batch)
+            self._db.execute(
+                "UPDATE bm25_stats SET documents = documents - ?, total_length = total_length - ?",
+                (removed, length),
+            )
+
+    def search(self, query: str, k: int, filter: Optional[Dict[str, Any]] = None) -> List[Tuple[str, float]]:
+        """Return up to ``k`` (chunk id, BM25 score) pairs with a positive score, best first."""
+        terms = list(set(tokenize(query)))
+        if not terms:
+            return []
+        with self._lock:
+            # One read transaction: statistics and postings come from the same snapshot
+            self._db.execute("BEGIN")
+            try:
+                n_docs, total_length = self._db.execute("SELECT documents, total_length FROM bm25_stats").fetchone()
+                if not n_docs:
+                    return []
+                placeholders = ", ".join("?" * len(terms))
+                document_frequency = self._db.execute(
+                    f"SELECT term, COUNT(*) FROM bm25_postings WHERE term IN ({placeholders}) GROUP BY term", terms
+                ).fetchall()
+                if not document_frequency:
+                    return []
+                idf = [
+                    value
+                    for term, df in document_frequency
+                    for value in (term, math.log(1 + (n_docs - df + 0.5) / (df + 0.5)))
+                ]
+                # Scored and ranked inside SQLite: common terms have postings for most of the corpus
+                ranked = self._db.execute(
+                    f"WITH query_terms (term, idf) AS (VALUES {', '.join(['(?, ?)'] * len(document_frequency))}) "
+                    "SELECT p.chunk_id, SUM(q.idf * p.tf * (? + 1) / (p.tf + ? * (1 - ? + ? * p.length / ?))) AS score "
+                    "FROM query_terms q JOIN bm25_postings p ON p.term = q.term "
+                    "GROUP BY p.chunk_id ORDER BY score DESC" + ("" if filter else " LIMIT ?"),
+                    [*idf, self.k1, self.k1, self.b, self.b, total_length / n_docs, *([] if filter else [k])],
+                )
+                if not filter:
+                    return ranked.fetchall()
+                # Read metadata of the best hits only, until k of them match the filter
+                hits = []
+                while len(hits) < k:
+                    batch = ranked.fetchmany(200)
+                    if not batch:
+                        break
+                    metadata = dict(self._db.execute(
+                        f"SELECT chunk_id, metadata FROM bm25_documents WHERE chunk_id IN ({', '.join('?' * len(batch))})",
+                        [chunk_id for chunk_id, _ in batch],
+                    ))
+                    hits.extend(
+                        (chunk_id, score) for chunk_id, score in batch
+                        if _matches(json.loads(metadata[chunk_id]), filter)
+                    )
+                return hits[:k]
+            finally:
+                self._db.execute("COMMIT")
+
+    def get_document(self, chunk_id: str) -> Optional[Document]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT text, metadata FROM bm25_documents WHERE chunk_id = ?", (chunk_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return Document(id=chunk_id, page_content=row[0], metadata=json.loads(row[1]))
+
+
+def _matches(metadata: Dict[str, Any], filter: Dict[str, Any]) -> bool:
+    """Evaluate the equality / ``$eq`` / ``$in`` subset of the Pinecone filter syntax."""
+    for key, condition in filter.items():
+        value = metadata.get(key)
+        if isinstance(condition, dict):
+            if "$in" in condition and value not in condition["$in"]:
+                return False
+            if "$eq" in condition and value != condition["$eq"]:
+                return False
+        elif value != condition:
+            return False
+    return True
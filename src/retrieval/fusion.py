@@ -0,0 +1,24 @@
+from typing import List, Tuple, Optional, Sequence
+
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[Sequence[str]],
+    k: int = 60,
+    weights: Optional[Sequence[float]] = None,
+) -> List[Tuple[str, float]]:
+    """Fuse several ranked id lists with RRF: score(d) = sum_i w_i / (k + rank_i(d)).
+
+    Args:
+        rankings: Ranked lists of ids, best first
+        k: Rank constant; larger values flatten the contribution of top ranks
+        weights: Optional per-ranking weights, defaults to 1.0 each
+
+    Returns:
+        (id, fused score) pairs sorted by descending score
+    """
+    weights = weights or [1.0] * len(rankings)
+    scores = {}
+    for ranking, weight in zip(rankings, weights):
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + weight / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
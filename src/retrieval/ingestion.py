@@ -0,0 +1,128 @@
+import asyncio
+from dataclasses import dataclass
+from typing import List, Dict, Optional, Callable
+from uuid import NAMESPACE_URL, uuid5
+from langchain.schema import Document
+from langchain_community.document_loaders import PyMuPDFLoader
+from langchain_community.document_loaders import UnstructuredWordDocumentLoader
+from langchain_community.document_loaders import TextLoader
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from src.retrieval.base import VectorStoreCRUD
+from src.retrieval.manifest import DocumentManifest, content_hash
+
+CHUNK_ID_NAMESPACE = uuid5(NAMESPACE_URL, "todo-multi-agent/school-info/chunks")
+
+
+def chunk_id(filename: str, chunk_hash: str) -> str:
+    """Deterministic chunk id derived from (file, content hash)."""
+    return str(uuid5(CHUNK_ID_NAMESPACE, f"{filename}:{chunk_hash}"))
+
+
+def load_and_split(file_path: str, filename: str) -> List[Document]:
+    """Parse a PDF/DOCX/TXT file and split it into chunks tagged with ``source_file``."""
+    if filename.endswith(".pdf"):
+        loader = PyMuPDFLoader(file_path)
+    elif filename.endswith(".docx"):
+        loader = UnstructuredWordDocumentLoader(file_path)
+    elif filename.endswith(".txt"):
+        loader = TextLoader(file_path)
+    else:
+        raise ValueError(f"Unsupported file format: {filename}")
+
+    docs = loader.load()
+    splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
+    chunks = splitter.split_documents(docs)
+
+    for chunk in chunks:
+        chunk.metadata.update({'source_file': filename})
+    return chunks
+
+
+@dataclass
+class IngestionResult:
+    chunks_count: int
+    added: int
+    unchanged: int
+    removed: int
+
+
+async def ingest_chunks(
+    vector_store: VectorStoreCRUD,
+    manifest: DocumentManifest,
+    filename: str,
+    chunks: List[Document],
+    batch_size: int = 64,
+    upsert_semaphore: Optional[asyncio.Semaphore] = None,
+    on_progress: Optional[Callable[[int, int], None]] = None,
+) -> IngestionResult:
+    """Incrementally (re-)ingest a file's chunks.
+
+    Only chunks whose (file, content hash) id is not in the manifest yet are
+    embedded and upserted; chunks that disappeared from the file are deleted.
+    New chunks are written before stale ones are removed, so the file never
+    vanishes from search mid-update.
+
+    New chunks are embedded ``batch_size`` at a time; each batch is upserted
+    while the next one is embedded, with at most ``upsert_semaphore`` upserts in
+    flight. ``on_progress(embedded, total)`` is called after every batch.
+    """
+    current: Dict[str, str] = {}
+    unique_chunks: Dict[str, Document] = {}
+    for chunk in chunks:
+        chunk_hash = content_hash(chunk.page_content)
+        chunk_key = chunk_id(filename, chunk_hash)
+        if chunk_key not in current:
+            current[chunk_key] = chunk_hash
+            unique_chunks[chunk_key] = chunk
+
+    existing = manifest.chunk_hashes(filename)
+    new_ids = [chunk_key for chunk_key in current if chunk_key not in existing]
+    stale_ids = [chunk_key for chunk_key in existing if chunk_key not in current]
+
+    if new_ids:
+        await _embed_and_upsert(
+            vector_store,
+            [unique_chunks[chunk_key] for chunk_key in new_ids],
+            new_ids,
+            batch_size,
+            upsert_semaphore or asyncio.Semaphore(1),
+            on_progress,
+        )
+    if stale_ids:
+        await vector_store.delete_documents(ids=stale_ids)
+    manifest.replace_file(filename, current.items())
+
+    return IngestionResult(
+        chunks_count=len(current),
+        added=len(new_ids),
+        unchanged=len(current) - len(new_ids),
+        removed=len(stale_ids),
+    )
+
+
+async def _embed_and_upsert(
+    vector_store: VectorStoreCRUD,
+    documents: List[Document],
+    ids: List[str],
+    batch_size: int,
+    upsert_semaphore: asyncio.Semaphore,
+    on_progress: Optional[Callable[[int, int], None]],
+):
+    async def upsert(batch_docs, batch_ids, vectors):
+        async with upsert_semaphore:
+            await vector_store.add_embeddings(batch_docs, batch_ids, vectors)
+
+    upserts = []
+    try:
+        for start in range(0, len(documents), batch_size):
+            batch_docs = documents[start:start + batch_size]
+            batch_ids = ids[start:start + batch_size]
+            vectors = await vector_store.embeddings.aembed_documents([doc.page_content for doc in batch_docs])
+            upserts.append(asyncio.create_task(upsert(batch_docs, batch_ids, vectors)))
+            if on_progress:
+                on_progress(start + len(batch_docs), len(documents))
+        await asyncio.gather(*upserts)
+    except BaseException:
+        for task in upserts:
+            task.cancel()
+        raise
@@ -0,0 +1,248 @@
+import asyncio
+import json
+import multiprocessing
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field, asdict
+from datetime import datetime, timezone
+from typing import List, Dict, Any, Optional, Tuple
+from uuid import uuid4
+from loguru import logger
+from src.retrieval.base import VectorStoreCRUD
+from src.retrieval.manifest import DocumentManifest
+from src.retrieval.ingestion import load_and_split, ingest_chunks
+from src.utils.keyed_locks import KeyedLocks
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+@dataclass
+class FileProgress:
+    file_path: str
+    status: str = "queued"  # queued, parsing, embedding, done, failed
+    chunks_count: int = 0
+    chunks_embedded: int = 0
+    added: int = 0
+    unchanged: int = 0
+    removed: int = 0
+    success: bool = False
+    message: str = "Waiting to be processed"
+
+
+@dataclass
+class IngestionJob:
+    job_id: str
+    status: str = "queued"  # queued, running, done, failed (at least one file failed)
+    created_at: str = field(default_factory=_now)
+    finished_at: Optional[str] = None
+    files: List[FileProgress] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "IngestionJob":
+        return cls(**{**data, "files": [FileProgress(**progress) for progress in data["files"]]})
+
+
+class IngestionJobStore:
+    """SQLite copy of job state, so any worker on the host can answer a job status request."""
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS ingestion_jobs (
+                job_id TEXT PRIMARY KEY,
+                created_at TEXT NOT NULL,
+                state TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_ingestion_jobs_created ON ingestion_jobs (created_at);
+            """
+        )
+
+    def add(self, job: IngestionJob, keep: int):
+        """Record a new job and delete all but the ``keep`` most recent ones."""
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO ingestion_jobs (job_id, created_at, state) VALUES (?, ?, ?)",
+                (job.job_id, job.created_at, json.dumps(job.to_dict())),
+            )
+            self._db.execute(
+                "DELETE FROM ingestion_jobs WHERE job_id NOT IN "
+                "(SELECT job_id FROM ingestion_jobs ORDER BY created_at DESC LIMIT ?)",
+                (keep,),
+            )
+            self._db.commit()
+
+    def save(self, job: IngestionJob):
+        """Update a recorded job; one already trimmed away stays deleted."""
+        with self._lock:
+            self._db.execute(
+                "UPDATE ingestion_jobs SET state = ? WHERE job_id = ?", (json.dumps(job.to_dict()), job.job_id)
+            )
+            self._db.commit()
+
+    def get(self, job_id: str) -> Optional[IngestionJob]:
+        with self._lock:
+            row = self._db.execute("SELECT state FROM ingestion_jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return IngestionJob.from_dict(json.loads(row[0])) if row is not None else None
+
+
+class IngestionJobManager:
+    """Runs /vector-store/add-documents uploads as background jobs.
+
+    Parsing and splitting (PyMuPDF / Unstructured, CPU bound and blocking) run in a
+    process pool; embeddings are computed in batches and upserted with bounded
+    concurrency. Running jobs live in the worker that accepted the upload. With a
+    ``store`` their state is also written to SQLite (progress at most every
+    ``save_interval`` seconds), so the other workers on the host can report it;
+    only the most recent ``max_jobs`` jobs are kept.
+    """
+
+    def __init__(
+        self,
+        vector_store: VectorStoreCRUD,
+        manifest: DocumentManifest,
+        workers: int = 2,
+        batch_size: int = 64,
+        upsert_concurrency: int = 4,
+        max_jobs: int = 100,
+        store: Optional[IngestionJobStore] = None,
+        save_interval: float = 1.0,
+    ):
+        self.vector_store = vector_store
+        self.manifest = manifest
+        self.workers = workers
+        self.batch_size = batch_size
+        self.upsert_concurrency = upsert_concurrency
+        self.max_jobs = max_jobs
+        self.store = store
+        self.save_interval = save_interval
+        self._jobs: "OrderedDict[str, IngestionJob]" = OrderedDict()
+        self._tasks: Dict[str, asyncio.Task] = {}
+        # job id -> monotonic time its state was last saved
+        self._saved_at: Dict[str, float] = {}
+        self._file_locks = KeyedLocks()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._upsert_semaphore: Optional[asyncio.Semaphore] = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # Not fork: a forked child would inherit the event loop, the SQLite handle and client sockets
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._executor
+
+    def get(self, job_id: str) -> Optional[IngestionJob]:
+        job = self._jobs.get(job_id)
+        if job is None and self.store is not None:
+            job = self.store.get(job_id)
+        return job
+
+    def _save(self, job: IngestionJob, force: bool = True):
+        """Write the job's state to the store; progress updates (``force=False``) are throttled."""
+        if self.store is None:
+            return
+        now = time.monotonic()
+        if not force and now - self._saved_at.get(job.job_id, 0.0) < self.save_interval:
+            return
+        self._saved_at[job.job_id] = now
+        try:
+            self.store.save(job)
+        except sqlite3.Error as e:
+            # A status the other workers cannot see must not fail the ingestion itself
+            logger.warning(f"Saving ingestion job {job.job_id} failed: {e}")
+
+    def submit(self, files: List[Tuple[str, str]], temp_dir: str) -> IngestionJob:
+        """Start a job for already-saved uploads given as (filename, path) pairs.
+
+        ``temp_dir`` is removed when the job finishes.
+        """
+        job = IngestionJob(job_id=str(uuid4()), files=[FileProgress(file_path=filename) for filename, _ in files])
+        self._jobs[job.job_id] = job
+        while len(self._jobs) > self.max_jobs:
+            self._jobs.popitem(last=False)
+        if self.store is not None:
+            try:
+                self.store.add(job, self.max_jobs)
+            except sqlite3.Error as e:
+                logger.warning(f"Recording ingestion job {job.job_id} failed: {e}")
+
+        task = asyncio.create_task(self._run(job, files, temp_dir))
+        self._tasks[job.job_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(job.job_id, None))
+        return job
+
+    async def _run(self, job: IngestionJob, files: List[Tuple[str, str]], temp_dir: str):
+        if self._upsert_semaphore is None:
+            self._upsert_semaphore = asyncio.Semaphore(self.upsert_concurrency)
+        job.status = "running"
+        self._save(job)
+        try:
+            await asyncio.gather(*[
+                self._ingest_file(job, progress, path)
+                for progress, (_, path) in zip(job.files, files)
+            ])
+            job.status = "done" if all(progress.success for progress in job.files) else "failed"
+        finally:
+            job.finished_at = _now()
+            shutil.rmtree(temp_dir, ignore_errors=True)
+            self._save(job)
+            self._saved_at.pop(job.job_id, None)
+
+    async def _ingest_file(self, job: IngestionJob, progress: FileProgress, path: str):
+        filename = progress.file_path
+        try:
+            progress.status = "parsing"
+            progress.message = "Parsing and splitting file"
+            self._save(job)
+            loop = asyncio.get_running_loop()
+            chunks = await loop.run_in_executor(self._get_executor(), load_and_split, path, filename)
+            progress.chunks_count = len(chunks)
+
+            # Two jobs re-ingesting the same file would race on its manifest entries
+            async with self._file_locks.hold(filename):
+                progress.status = "embedding"
+                progress.message = "Embedding and indexing chunks"
+                self._save(job)
+
+                def on_progress(embedded: int, total: int):
+                    progress.chunks_embedded = embedded
+                    self._save(job, force=False)
+
+                result = await ingest_chunks(
+                    self.vector_store,
+                    self.manifest,
+                    filename,
+                    chunks,
+                    batch_size=self.batch_size,
+                    upsert_semaphore=self._upsert_semaphore,
+                    on_progress=on_progress,
+                )
+
+            progress.chunks_count = result.chunks_count
+            progress.added = result.added
+            progress.unchanged = result.unchanged
+            progress.removed = result.removed
+            progress.status = "done"
+            progress.success = True
+            progress.message = (
+                f"File processed and indexed successfully. {result.added} chunks added, "
+                f"{result.unchanged} unchanged, {result.removed} removed."
+            )
+        except Exception as e:
+            logger.error(f"Ingestion of {filename} failed: {e}")
+            progress.status = "failed"
+            progress.success = False
+            progress.message = f"Error processing file: {str(e)}"
+        self._save(job)
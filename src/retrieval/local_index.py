@@ -0,0 +1,216 @@
+import os
+from typing import Dict, List, Optional, Tuple, Iterable
+import numpy as np
+
+try:
+    import hnswlib
+except ImportError:  # HNSW is optional, exact search works without it
+    hnswlib = None
+
+
+class LocalVectorIndex:
+    """Append-only float32 vector matrix stored on disk and memory-mapped for search.
+
+    Rows are addressed by their position in the matrix. Deleted rows stay in the
+    file as tombstones until the owner compacts the index. Vectors are L2
+    normalised on insert, so the inner product is the cosine similarity.
+
+    With ``index_type="hnsw"`` (requires ``hnswlib``) an HNSW graph is kept next to
+    the matrix and used for approximate search; the matrix remains the source of
+    truth and is used for exact search and re-ranking.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        dim: int,
+        index_type: str = "flat",
+        hnsw_m: int = 16,
+        hnsw_ef_construction: int = 200,
+        hnsw_ef_search: int = 64,
+    ):
+        if index_type not in ("flat", "hnsw"):
+            raise ValueError(f"Unsupported index type: {index_type}")
+        if index_type == "hnsw" and hnswlib is None:
+            raise ImportError("index_type='hnsw' requires the 'hnswlib' package")
+
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.dim = dim
+        self.index_type = index_type
+        self.vectors_path = os.path.join(directory, "vectors.f32")
+        self.hnsw_path = os.path.join(directory, "index.hnsw")
+        self.hnsw_m = hnsw_m
+        self.hnsw_ef_construction = hnsw_ef_construction
+        self.hnsw_ef_search = hnsw_ef_search
+
+        if not os.path.exists(self.vectors_path):
+            open(self.vectors_path, "wb").close()
+
+        self._matrix: Optional[np.memmap] = None
+        self._alive = np.zeros(0, dtype=bool)
+        self._hnsw = None
+        self._remap()
+
+    @property
+    def size(self) -> int:
+        """Total number of rows in the matrix, including tombstones."""
+        return len(self._alive)
+
+    @property
+    def live_count(self) -> int:
+        return int(self._alive.sum())
+
+    def _remap(self):
+        rows = os.path.getsize(self.vectors_path) // (4 * self.dim)
+        self._matrix = (
+            np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(rows, self.dim))
+            if rows else None
+        )
+        if rows > len(self._alive):
+            self._alive = np.concatenate([self._alive, np.ones(rows - len(self._alive), dtype=bool)])
+
+    def load(self, live_rows: Iterable[int]) -> bool:
+        """Restore the live-row mask (owned by the metadata store) and the HNSW graph.
+
+        Returns False when the saved graph is missing or stale and the matrix has
+        tombstones. A graph rebuilt from the live rows alone would look stale again
+        at the next start, so the owner must compact instead, which rebuilds and
+        saves it; until then search is exact.
+        """
+        self._alive = np.zeros(self.size, dtype=bool)
+        live_rows = np.fromiter(live_rows, dtype=np.int64)
+        self._alive[live_rows] = True
+
+        if self.index_type != "hnsw":
+            return True
+        if os.path.exists(self.hnsw_path):
+            self._hnsw = hnswlib.Index(space="ip", dim=self.dim)
+            self._hnsw.load_index(self.hnsw_path, max_elements=max(self.size, 1))
+            self._hnsw.set_ef(self.hnsw_ef_search)
+            # The graph keeps deleted rows marked, so a current one covers every row
+            if self._hnsw.get_current_count() == self.size:
+                return True
+        # Missing, or the matrix was written after the last save
+        self._hnsw = None
+        if self.live_count < self.size:
+            return False
+        self._build_hnsw()
+        self.save()
+        return True
+
+    def _build_hnsw(self):
+        self._hnsw = hnswlib.Index(space="ip", dim=self.dim)
+        self._hnsw.init_index(
+            max_elements=max(self.size, 1024),
+            ef_construction=self.hnsw_ef_construction,
+            M=self.hnsw_m,
+        )
+        self._hnsw.set_ef(self.hnsw_ef_search)
+        live_rows = np.flatnonzero(self._alive)
+        if len(live_rows):
+            self._hnsw.add_items(np.asarray(self._matrix[live_rows]), live_rows)
+
+    def append(self, vectors: np.ndarray) -> List[int]:
+        """Append vectors and return the rows assigned to them."""
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.where(norms == 0, 1, norms)
+
+        start = self.size
+        with open(self.vectors_path, "ab") as f:
+            f.write(vectors.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        self._remap()
+        rows = list(range(start, start + len(vectors)))
+
+        if self._hnsw is not None:
+            if self._hnsw.get_max_elements() < self.size:
+                self._hnsw.resize_index(max(self.size, 2 * self._hnsw.get_max_elements()))
+            self._hnsw.add_items(vectors, np.asarray(rows))
+        return rows
+
+    def remove(self, rows: Iterable[int]):
+        for row in rows:
+            if self._alive[row]:
+                self._alive[row] = False
+                if self._hnsw is not None:
+                    self._hnsw.mark_deleted(row)
+
+    def compact(self) -> Dict[int, int]:
+        """Rewrite the matrix without tombstones and return the old -> new row mapping."""
+        live_rows = np.flatnonzero(self._alive)
+        tmp_path = self.vectors_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            if len(live_rows):
+                f.write(np.asarray(self._matrix[live_rows]).tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        self._matrix = None
+        os.replace(tmp_path, self.vectors_path)
+
+        self._alive = np.zeros(0, dtype=bool)
+        self._remap()
+        if self.index_type == "hnsw":
+            self._build_hnsw()
+            self.save()
+        return {int(old): new for new, old in enumerate(live_rows)}
+
+    def save(self):
+        if self._hnsw is not None:
+            self._hnsw.save_index(self.hnsw_path)
+
+    def search(
+        self,
+        query: np.ndarray,
+        k: int,
+        allowed_rows: Optional[np.ndarray] = None,
+        exact: bool = False,
+    ) -> List[Tuple[int, float]]:
+        """Return up to ``k`` (row, cosine similarity) pairs, best first."""
+        query = np.asarray(query, dtype=np.float32).reshape(self.dim)
+        norm = np.linalg.norm(query)
+        if norm:
+            query = query / norm
+
+        if self._hnsw is not None and not exact:
+            hits = self._search_hnsw(query, k, allowed_rows)
+            if hits is not None:
+                return hits
+        return self._search_exact(query, k, allowed_rows)
+
+    def _search_exact(self, query: np.ndarray, k: int, allowed_rows: Optional[np.ndarray]) -> List[Tuple[int, float]]:
+        candidates = np.flatnonzero(self._alive)
+        if allowed_rows is not None:
+            candidates = np.intersect1d(candidates, allowed_rows, assume_unique=True)
+        if not len(candidates) or k <= 0:
+            return []
+
+        if len(candidates) == self.size:
+            scores = self._matrix @ query
+        else:
+            scores = self._matrix[candidates] @ query
+
+        k = min(k, len(candidates))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(candidates[i]), float(scores[i])) for i in top]
+
+    def _search_hnsw(self, query: np.ndarray, k: int, allowed_rows: Optional[np.ndarray]) -> Optional[List[Tuple[int, float]]]:
+        live = self.live_count if allowed_rows is None else len(allowed_rows)
+        k = min(k, live)
+        if k <= 0:
+            return []
+
+        kwargs = {}
+        if allowed_rows is not None:
+            allowed = set(int(row) for row in allowed_rows)
+            kwargs["filter"] = lambda label: label in allowed
+        try:
+            labels, distances = self._hnsw.knn_query(query, k=k, **kwargs)
+        except RuntimeError:
+            # hnswlib cannot always fill k results (small ef, heavy filtering)
+            return None
+        # space="ip" reports 1 - inner product as the distance
+        return [(int(label), float(1.0 - dist)) for label, dist in zip(labels[0], distances[0])]
@@ -0,0 +1,238 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+from typing import List, Dict, Any, Optional, Tuple
+import numpy as np
+from langchain.schema import Document
+from langchain_core.embeddings import Embeddings
+from src.retrieval.base import VectorStoreCRUD
+from src.retrieval.local_index import LocalVectorIndex
+
+
+class LocalVectorStoreCRUD(VectorStoreCRUD):
+    """Offline vector store persisted in a local directory.
+
+    Layout of ``directory``:
+        vectors.f32       memory-mapped float32 embedding matrix (see LocalVectorIndex)
+        index.hnsw        optional HNSW graph over the matrix rows
+        metadata.sqlite   sidecar store: chunk id, matrix row, text and metadata
+    """
+
+    # Compact the matrix once tombstones outnumber live rows
+    COMPACT_MIN_DEAD_ROWS = 1000
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        directory: str,
+        index_type: str = "flat",
+        **kwargs,
+    ):
+        super().__init__(embeddings, **kwargs)
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.index_type = index_type
+        self._lock = threading.Lock()
+
+        self._db = sqlite3.connect(os.path.join(directory, "metadata.sqlite"), check_same_thread=False)
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS chunks (
+                row INTEGER PRIMARY KEY,
+                id TEXT NOT NULL UNIQUE,
+                page_content TEXT NOT NULL,
+                metadata TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS settings (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            );
+            """
+        )
+        self._index: Optional[LocalVectorIndex] = None
+        dim = self._get_setting("dim")
+        if dim is not None:
+            self._open_index(int(dim))
+
+    def _get_setting(self, key: str) -> Optional[str]:
+        row = self._db.execute("SELECT value FROM settings WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _open_index(self, dim: int):
+        self._index = LocalVectorIndex(self.directory, dim, index_type=self.index_type)
+        live_rows = [row for (row,) in self._db.execute("SELECT row FROM chunks")]
+        if not self._index.load(live_rows):
+            # Compact once so later starts load the saved graph instead of rebuilding it
+            self._compact()
+
+    async def dense_search(self, query: str, k: int, filter: Optional[Dict[str, Any]] = None):
+        query_vector = await self.embeddings.aembed_query(query)
+        return await asyncio.to_thread(self._search, query_vector, k, filter)
+
+    def _search(self, query_vector: List[float], k: int, filter: Optional[Dict[str, Any]]) -> List[Document]:
+        with self._lock:
+            if self._index is None:
+                return []
+            allowed_rows = self._rows_matching(filter) if filter else None
+            hits = self._index.search(np.asarray(query_vector, dtype=np.float32), k, allowed_rows)
+            hits = [(row, score) for row, score in hits if score >= self.score_threshold]
+            return self._load_rows(hits)
+
+    async def relevance_scores(self, query: str, ids: List[str]) -> Dict[str, float]:
+        query_vector = await self.embeddings.aembed_query(query)
+        return await asyncio.to_thread(self._relevance, query_vector, ids)
+
+    def _relevance(self, query_vector: List[float], ids: List[str]) -> Dict[str, float]:
+        with self._lock:
+            if self._index is None or not ids:
+                return {}
+            rows = dict(self._db.execute(f"SELECT row, id FROM chunks WHERE id IN ({', '.join('?' * len(ids))})", ids))
+            if not rows:
+                return {}
+            hits = self._index.search(
+                np.asarray(query_vector, dtype=np.float32),
+                len(rows),
+                np.fromiter(rows, dtype=np.int64),
+                exact=True,
+            )
+            return {rows[row]: score for row, score in hits}
+
+    def _rows_matching(self, filter: Dict[str, Any]) -> np.ndarray:
+        where, params = self._filter_clause(filter)
+        query = f"SELECT row FROM chunks WHERE {where}"
+        return np.fromiter((row for (row,) in self._db.execute(query, params)), dtype=np.int64)
+
+    @staticmethod
+    def _filter_clause(filter: Dict[str, Any]) -> Tuple[str, List[Any]]:
+        """Translate an equality / ``$eq`` / ``$in`` metadata filter to a SQL condition."""
+        clauses, params = [], []
+        for key, condition in filter.items():
+            path = f"$.{key}"
+            if isinstance(condition, dict) and "$in" in condition:
+                values = list(condition["$in"])
+                clauses.append(f"json_extract(metadata, ?) IN ({', '.join('?' * len(values))})")
+                params.extend([path, *values])
+            else:
+                if isinstance(condition, dict):
+                    condition = condition.get("$eq")
+                clauses.append("json_extract(metadata, ?) = ?")
+                params.extend([path, condition])
+        return " AND ".join(clauses), params
+
+    def _load_rows(self, hits: List[Tuple[int, float]]) -> List[Document]:
+        if not hits:
+            return []
+        rows = [row for row, _ in hits]
+        records = {
+            row: (chunk_id, page_content, metadata)
+            for row, chunk_id, page_content, metadata in self._db.execute(
+                f"SELECT row, id, page_content, metadata FROM chunks WHERE row IN ({', '.join('?' * len(rows))})",
+                rows,
+            )
+        }
+        return [
+            Document(id=records[row][0], page_content=records[row][1], metadata=json.loads(records[row][2]))
+            for row in rows
+            if row in records
+        ]
+
+    async def _add_embeddings(self, documents: List[Document], ids: List[str], vectors: List[List[float]]):
+        await asyncio.to_thread(self._add, documents, ids, np.asarray(vectors, dtype=np.float32))
+
+    def _add(self, documents: List[Document], ids: List[str], vectors: np.ndarray):
+        with self._lock:
+            if self._index is None:
+                self._db.execute("INSERT OR REPLACE INTO settings (key, value) VALUES ('dim', ?)", (str(vectors.shape[1]),))
+                self._db.commit()
+                self._open_index(vectors.shape[1])
+
+            # Upsert semantics: re-added ids replace their previous row
+            self._delete_ids(ids)
+            rows = self._index.append(vectors)
+            self._db.executemany(
+                "INSERT INTO chunks (row, id, page_content, metadata) VALUES (?, ?, ?, ?)",
+                [
+                    (row, chunk_id, doc.page_content, json.dumps(doc.metadata, ensure_ascii=False, default=str))
+                    for row, chunk_id, doc in zip(rows, ids, documents)
+                ],
+            )
+            self._db.commit()
+            self._index.save()
+
+    async def get_documents(self, filter: Optional[Dict[str, Any]] = None):
+        return await asyncio.to_thread(self._get_documents, filter)
+
+    def _get_documents(self, filter: Optional[Dict[str, Any]]) -> List[Document]:
+        with self._lock:
+            if self._index is None:
+                return []
+            where, params = self._filter_clause(filter) if filter else ("1 = 1", [])
+            return [
+                Document(id=chunk_id, page_content=page_content, metadata=json.loads(metadata))
+                for chunk_id, page_content, metadata in self._db.execute(
+                    f"SELECT id, page_content, metadata FROM chunks WHERE {where} ORDER BY row", params
+                )
+            ]
+
+    async def get_documents_by_ids(self, ids: List[str]):
+        return await asyncio.to_thread(self._get_documents_by_ids, ids)
+
+    def _get_documents_by_ids(self, ids: List[str]) -> List[Document]:
+        with self._lock:
+            documents = {}
+            for start in range(0, len(ids), 500):
+                batch = ids[start:start + 500]
+                for chunk_id, page_content, metadata in self._db.execute(
+                    f"SELECT id, page_content, metadata FROM chunks WHERE id IN ({', '.join('?' * len(batch))})",
+                    batch,
+                ):
+                    documents[chunk_id] = Document(id=chunk_id, page_content=page_content, metadata=json.loads(metadata))
+            return [documents[chunk_id] for chunk_id in ids if chunk_id in documents]
+
+    async def _delete_documents(self, ids: List[str]):
+        await asyncio.to_thread(self._delete, ids)
+
+    def _delete(self, ids: List[str]):
+        with self._lock:
+            if self._index is None:
+                return
+            self._delete_ids(ids)
+            self._db.commit()
+            self._maybe_compact()
+            self._index.save()
+
+    async def _delete_all(self):
+        await asyncio.to_thread(self._clear)
+
+    def _clear(self):
+        with self._lock:
+            if self._index is None:
+                return
+            self._index.remove([row for (row,) in self._db.execute("SELECT row FROM chunks")])
+            self._db.execute("DELETE FROM chunks")
+            self._db.commit()
+            self._maybe_compact()
+            self._index.save()
+
+    def _delete_ids(self, ids: List[str]):
+        for start in range(0, len(ids), 500):
+            batch = ids[start:start + 500]
+            placeholders = ", ".join("?" * len(batch))
+            rows = [row for (row,) in self._db.execute(f"SELECT row FROM chunks WHERE id IN ({placeholders})", batch)]
+            self._index.remove(rows)
+            self._db.execute(f"DELETE FROM chunks WHERE id IN ({placeholders})", batch)
+
+    def _maybe_compact(self):
+        dead_rows = self._index.size - self._index.live_count
+        if dead_rows < self.COMPACT_MIN_DEAD_ROWS or dead_rows < self._index.live_count:
+            return
+        self._compact()
+
+    def _compact(self):
+        mapping = self._index.compact()
+        # Shift rows in two passes so the primary key never collides mid-update
+        self._db.executemany("UPDATE chunks SET row = ? WHERE row = ?", [(-new - 1, old) for old, new in mapping.items()])
+        self._db.execute("UPDATE chunks SET row = -row - 1")
+        self._db.commit()
@@ -0,0 +1,129 @@
+import hashlib
+import os
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from typing import List, Dict, Any, Optional, Tuple, Iterable
+
+
+def content_hash(text: str) -> str:
+    """SHA-256 of a chunk's text, used to detect changed chunks."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class DocumentManifest:
+    """Persistent SQLite map of ingested file -> chunk ids -> content hash.
+
+    The manifest is the local source of truth for what has been ingested, so
+    listing and deleting by file never have to enumerate the vector store.
+    """
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS manifest (
+                chunk_id TEXT PRIMARY KEY,
+                filename TEXT NOT NULL,
+                chunk_index INTEGER NOT NULL,
+                content_hash TEXT NOT NULL,
+                ingested_at TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_manifest_file ON manifest (filename, chunk_index);
+            """
+        )
+
+    def add_chunks(self, filename: str, chunks: Iterable[Tuple[str, str]]):
+        """Record (chunk_id, content_hash) pairs for a file, in chunk order."""
+        ingested_at = datetime.now(timezone.utc).isoformat()
+        with self._lock:
+            start = self._db.execute(
+                "SELECT COALESCE(MAX(chunk_index) + 1, 0) FROM manifest WHERE filename = ?", (filename,)
+            ).fetchone()[0]
+            self._db.executemany(
+                "INSERT OR REPLACE INTO manifest (chunk_id, filename, chunk_index, content_hash, ingested_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [
+                    (chunk_id, filename, start + offset, chunk_hash, ingested_at)
+                    for offset, (chunk_id, chunk_hash) in enumerate(chunks)
+                ],
+            )
+            self._db.commit()
+
+    def replace_file(self, filename: str, chunks: Iterable[Tuple[str, str]]):
+        """Replace a file's entries with the given (chunk_id, content_hash) pairs, in chunk order."""
+        ingested_at = datetime.now(timezone.utc).isoformat()
+        with self._lock:
+            self._db.execute("DELETE FROM manifest WHERE filename = ?", (filename,))
+            self._db.executemany(
+                "INSERT OR REPLACE INTO manifest (chunk_id, filename, chunk_index, content_hash, ingested_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [
+                    (chunk_id, filename, index, chunk_hash, ingested_at)
+                    for index, (chunk_id, chunk_hash) in enumerate(chunks)
+                ],
+            )
+            self._db.commit()
+
+    def remove_chunks(self, chunk_ids: List[str]):
+        with self._lock:
+            for start in range(0, len(chunk_ids), 500):
+                batch = chunk_ids[start:start + 500]
+                self._db.execute(f"DELETE FROM manifest WHERE chunk_id IN ({', '.join('?' * len(batch))})", batch)
+            self._db.commit()
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM manifest")
+            self._db.commit()
+
+    def chunk_ids(self, filenames: Optional[List[str]] = None) -> List[str]:
+        """Chunk ids of the given files, or of the whole corpus."""
+        with self._lock:
+            if filenames is None:
+                return [chunk_id for (chunk_id,) in self._db.execute("SELECT chunk_id FROM manifest")]
+            return [
+                chunk_id
+                for (chunk_id,) in self._db.execute(
+                    f"SELECT chunk_id FROM manifest WHERE filename IN ({', '.join('?' * len(filenames))})",
+                    filenames,
+                )
+            ]
+
+    def chunk_hashes(self, filename: str) -> Dict[str, str]:
+        with self._lock:
+            return dict(self._db.execute(
+                "SELECT chunk_id, content_hash FROM manifest WHERE filename = ?", (filename,)
+            ))
+
+    def list_files(self, offset: int = 0, limit: int = 50) -> Tuple[int, List[Dict[str, Any]]]:
+        """Page through ingested files; returns (total files, page)."""
+        with self._lock:
+            total = self._db.execute("SELECT COUNT(DISTINCT filename) FROM manifest").fetchone()[0]
+            rows = self._db.execute(
+                "SELECT filename, COUNT(*), MAX(ingested_at) FROM manifest "
+                "GROUP BY filename ORDER BY filename LIMIT ? OFFSET ?",
+                (limit, offset),
+            ).fetchall()
+        return total, [
+            {"filename": filename, "chunks_count": chunks_count, "ingested_at": ingested_at}
+            for filename, chunks_count, ingested_at in rows
+        ]
+
+    def list_chunks(self, filename: Optional[str] = None, offset: int = 0, limit: int = 100) -> Tuple[int, List[Dict[str, Any]]]:
+        """Page through the chunks of one file (or of the whole corpus); returns (total chunks, page)."""
+        where, params = ("WHERE filename = ?", [filename]) if filename is not None else ("", [])
+        with self._lock:
+            total = self._db.execute(f"SELECT COUNT(*) FROM manifest {where}", params).fetchone()[0]
+            rows = self._db.execute(
+                f"SELECT chunk_id, filename, chunk_index, content_hash FROM manifest {where} "
+                "ORDER BY filename, chunk_index LIMIT ? OFFSET ?",
+                [*params, limit, offset],
+            ).fetchall()
+        return total, [
+            {"chunk_id": chunk_id, "filename": name, "chunk_index": chunk_index, "content_hash": chunk_hash}
+            for chunk_id, name, chunk_index, chunk_hash in rows
+        ]
@@ -0,0 +1,86 @@
+import asyncio
+import numpy as np
+from langchain_pinecone import PineconeVectorStore
+from typing import List, Dict, Any, Optional
+from langchain.schema import Document
+from langchain_core.embeddings import Embeddings
+from src.retrieval.base import VectorStoreCRUD
+
+# Keep fetch requests well under Pinecone's URL length limit
+FETCH_BATCH_SIZE = 200
+UPSERT_BATCH_SIZE = 100
+
+
+class PineconeVectorStoreCRUD(VectorStoreCRUD):
+    """Vector store backed by the hosted Pinecone ``school-info`` index."""
+
+    def __init__(self, embeddings: Embeddings, index_name: str = "school-info", **kwargs):
+        super().__init__(embeddings, **kwargs)
+        self.vector_store = PineconeVectorStore(
+            index_name=index_name,
+            embedding=self.embeddings
+        )
+
+    async def dense_search(self, query: str, k: int, filter: Optional[Dict[str, Any]] = None):
+        docs_and_scores = await self.vector_store.asimilarity_search_with_relevance_scores(
+            query, k=k, filter=filter, score_threshold=self.score_threshold
+        )
+        return [doc for doc, _ in docs_and_scores]
+
+    async def relevance_scores(self, query: str, ids: List[str]) -> Dict[str, float]:
+        query_vector = await self.embeddings.aembed_query(query)
+        return await asyncio.to_thread(self._relevance, np.asarray(query_vector, dtype=np.float32), ids)
+
+    def _relevance(self, query: np.ndarray, ids: List[str]) -> Dict[str, float]:
+        """Score fetched vectors the way the index scores a query, then apply the store's relevance function."""
+        relevance_fn = self.vector_store._select_relevance_score_fn()
+        strategy = self.vector_store.distance_strategy.name
+        scores = {}
+        for start in range(0, len(ids), FETCH_BATCH_SIZE):
+            response = self.vector_store.index.fetch(ids=ids[start:start + FETCH_BATCH_SIZE])
+            for chunk_id, vector in response.vectors.items():
+                values = np.asarray(vector.values, dtype=np.float32)
+                if strategy == "COSINE":
+                    norms = float(np.linalg.norm(query) * np.linalg.norm(values))
+                    raw = float(query @ values) / norms if norms else 0.0
+                elif strategy == "MAX_INNER_PRODUCT":
+                    raw = float(query @ values)
+                else:
+                    raw = float(np.linalg.norm(query - values))
+                scores[chunk_id] = relevance_fn(raw)
+        return scores
+
+    async def _add_embeddings(self, documents: List[Document], ids: List[str], vectors: List[List[float]]):
+        await asyncio.to_thread(self._upsert, documents, ids, vectors)
+
+    def _upsert(self, documents: List[Document], ids: List[str], vectors: List[List[float]]):
+        text_key = self.vector_store._text_key
+        records = [
+            {"id": chunk_id, "values": list(vector), "metadata": {**doc.metadata, text_key: doc.page_content}}
+            for chunk_id, doc, vector in zip(ids, documents, vectors)
+        ]
+        for start in range(0, len(records), UPSERT_BATCH_SIZE):
+            self.vector_store.index.upsert(vectors=records[start:start + UPSERT_BATCH_SIZE])
+
+    async def get_documents(self, filter: Optional[Dict[str, Any]] = None):
+        return await self.vector_store.asimilarity_search("", 10000, filter=filter)
+
+    async def get_documents_by_ids(self, ids: List[str]):
+        return await asyncio.to_thread(self._fetch, ids)
+
+    def _fetch(self, ids: List[str]) -> List[Document]:
+        text_key = self.vector_store._text_key
+        documents = {}
+        for start in range(0, len(ids), FETCH_BATCH_SIZE):
+            response = self.vector_store.index.fetch(ids=ids[start:start + FETCH_BATCH_SIZE])
+            for chunk_id, vector in response.vectors.items():
+                metadata = dict(vector.metadata or {})
+                page_content = metadata.pop(text_key, "")
+                documents[chunk_id] = Document(id=chunk_id, page_content=page_content, metadata=metadata)
+        return [documents[chunk_id] for chunk_id in ids if chunk_id in documents]
+
+    async def _delete_documents(self, ids: List[str]):
+        await self.vector_store.adelete(ids=ids)
+
+    async def _delete_all(self):
+        await self.vector_store.adelete(delete_all=True)
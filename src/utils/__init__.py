@@ -12,6 +12,13 @@ from .date_helpers import (
     get_weekday_name,
     get_hour_range_string
 )
+from .keyed_locks import KeyedLocks, thread_locks
+from .disconnect import cancel_on_disconnect, wait_for_disconnect
+from .token_counter import (
+    count_tokens,
+    count_message_tokens,
+    count_messages_tokens
+)
 
 __all__ = [
     # Database helpers
@@ -22,4 +29,17 @@ __all__ = [
     'get_date_range',
     'get_weekday_name',
     'get_hour_range_string',
+
+    # Locks
+    'KeyedLocks',
+    'thread_locks',
+
+    # Client disconnects
+    'cancel_on_disconnect',
+    'wait_for_disconnect',
+
+    # Token counting
+    'count_tokens',
+    'count_message_tokens',
+    'count_messages_tokens',
 ]
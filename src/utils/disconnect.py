@@ -0,0 +1,49 @@
+import asyncio
+from typing import AsyncIterator, TypeVar
+from starlette.requests import Request
+
+T = TypeVar("T")
+
+_DONE = object()
+
+
+async def wait_for_disconnect(request: Request):
+    """Return once the client has closed the connection (the request body must already be read)."""
+    while True:
+        message = await request.receive()
+        if message["type"] == "http.disconnect":
+            return
+
+
+async def cancel_on_disconnect(request: Request, source: AsyncIterator[T]) -> AsyncIterator[T]:
+    """Relay ``source``, driven in its own task, and cancel that task when the client disconnects.
+
+    The cancellation reaches ``source`` at the await it is blocked on (e.g. the
+    next graph event), once, in a task the server does not own, so its cleanup
+    can still await. This holds whether the server reports the disconnect
+    (cancelling this generator) or only the watcher on ``request`` sees it.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+
+    async def pump():
+        try:
+            async for item in source:
+                queue.put_nowait(item)
+        finally:
+            queue.put_nowait(_DONE)
+
+    task = asyncio.create_task(pump())
+    watcher = asyncio.create_task(wait_for_disconnect(request))
+    watcher.add_done_callback(lambda done: done.cancelled() or task.cancel())
+    try:
+        while True:
+            item = await queue.get()
+            if item is _DONE:
+                break
+            yield item
+        if not task.cancelled():
+            # Re-raise an error of the source
+            await task
+    finally:
+        watcher.cancel()
+        task.cancel()
@@ -0,0 +1,51 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Dict, Hashable, Optional
+
+
+class KeyedLocks:
+    """asyncio locks keyed by id (e.g. a conversation thread), dropped once unused."""
+
+    def __init__(self):
+        self._locks: Dict[Hashable, asyncio.Lock] = {}
+        self._users: Dict[Hashable, int] = {}
+
+    def locked(self, key: Hashable) -> bool:
+        lock = self._locks.get(key)
+        return lock is not None and lock.locked()
+
+    async def acquire(self, key: Hashable, timeout: Optional[float] = None) -> bool:
+        """Wait up to ``timeout`` seconds (None: forever) for the lock; every True must be paired with ``release``."""
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        self._users[key] = self._users.get(key, 0) + 1
+        try:
+            await asyncio.wait_for(lock.acquire(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            self._forget(key)
+            return False
+        except BaseException:
+            self._forget(key)
+            raise
+
+    def release(self, key: Hashable):
+        self._locks[key].release()
+        self._forget(key)
+
+    def _forget(self, key: Hashable):
+        self._users[key] -= 1
+        if not self._users[key]:
+            del self._users[key]
+            del self._locks[key]
+
+    @asynccontextmanager
+    async def hold(self, key: Hashable):
+        await self.acquire(key)
+        try:
+            yield
+        finally:
+            self.release(key)
+
+
+# Serialises work on the same conversation thread (graph turns, background summaries)
+thread_locks = KeyedLocks()
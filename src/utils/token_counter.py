@@ -0,0 +1,35 @@
+import math
+from typing import Iterable
+from langchain_core.messages import BaseMessage
+
+# Gemini does not ship a local tokenizer; Vietnamese text averages roughly three
+# characters per token, which slightly overestimates English and keeps budgets safe.
+CHARS_PER_TOKEN = 3
+# Role markers and separators added around every message
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def count_tokens(text: str) -> int:
+    """Estimate the number of tokens in a piece of text."""
+    if not text:
+        return 0
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def message_text(message: BaseMessage) -> str:
+    """Text of a message, flattening multi-part (list) content."""
+    content = message.content
+    if isinstance(content, str):
+        return content
+    return "".join(
+        part if isinstance(part, str) else part.get("text", "")
+        for part in content
+    )
+
+
+def count_message_tokens(message: BaseMessage) -> int:
+    return count_tokens(message_text(message)) + MESSAGE_OVERHEAD_TOKENS
+
+
+def count_messages_tokens(messages: Iterable[BaseMessage]) -> int:
+    return sum(count_message_tokens(message) for message in messages)